@@ -0,0 +1,208 @@
+"""Admission control for LLM calls: concurrency limit, fair bounded queue and deadlines."""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional
+
+from app.config import settings
+from app.logger import logger
+from app.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, LLM_IN_FLIGHT, STAGE_LATENCY
+
+
+ANONYMOUS_CLIENT = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    """A request that cannot be served in time; maps to an HTTP error with Retry-After."""
+
+    status_code = 503
+    reason = "rejected"
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFull(AdmissionRejected):
+    """The LLM queue (or this client's share of it) is full."""
+
+    status_code = 429
+    reason = "queue_full"
+
+
+class QueueTimeout(AdmissionRejected):
+    """The request waited longer than the queue deadline."""
+
+    status_code = 503
+    reason = "queue_timeout"
+
+
+class ProviderRateLimited(AdmissionRejected):
+    """The LLM provider rejected the call with a rate limit."""
+
+    status_code = 503
+    reason = "provider_rate_limited"
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    """Whether an LLM client error is a provider rate limit (HTTP 429)."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+
+def provider_retry_after(error: BaseException, default: int = 1) -> int:
+    """Retry-After advertised by the provider's rate-limit response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(1, math.ceil(float(headers.get("retry-after", default))))
+    except (TypeError, ValueError):
+        return default
+
+
+class _Ticket:
+    """A queued request waiting for an LLM slot."""
+
+    __slots__ = ("client", "granted")
+
+    def __init__(self, client: str):
+        self.client = client
+        self.granted = False
+
+
+class AdmissionController:
+    """
+    Bounds concurrent LLM calls and queues the excess fairly.
+
+    At most `max_concurrent` callers hold a slot. Others wait in per-client
+    FIFO queues served round-robin, so one busy client cannot starve the
+    rest. Callers are rejected immediately when the queue (or the client's
+    share of it) is full, and when they have waited past `queue_timeout`;
+    both carry a Retry-After estimated from recent call durations.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_queued_per_client: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.max_concurrent = max_concurrent or settings.LLM_MAX_CONCURRENCY
+        self.max_queue = settings.ADMISSION_QUEUE_SIZE if max_queue is None else max_queue
+        self.max_queued_per_client = max_queued_per_client or settings.ADMISSION_MAX_QUEUED_PER_CLIENT
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        # Clients with waiting requests, in round-robin order
+        self._queues: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+        # Moving average of how long a slot is held, for Retry-After
+        self._avg_service_time = 1.0
+
+    @contextmanager
+    def slot(self, client: Optional[str] = None) -> Iterator[None]:
+        """Hold an LLM slot for the duration of the block."""
+        self.acquire(client)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def acquire(self, client: Optional[str] = None) -> None:
+        """
+        Wait for an LLM slot.
+
+        Raises:
+            QueueFull: If the queue or the client's share of it is full
+            QueueTimeout: If no slot was granted within queue_timeout
+        """
+        client = client or ANONYMOUS_CLIENT
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrent and self._queued == 0:
+                self._active += 1
+                LLM_IN_FLIGHT.set(self._active)
+                return
+
+            queue = self._queues.get(client)
+            if self._queued >= self.max_queue:
+                raise self._reject(QueueFull, "LLM queue is full")
+            if queue is not None and len(queue) >= self.max_queued_per_client:
+                raise self._reject(QueueFull, f"Too many queued requests for client '{client}'")
+
+            ticket = _Ticket(client)
+            self._queues.setdefault(client, deque()).append(ticket)
+            self._queued += 1
+            ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+            deadline = start + self.queue_timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._withdraw(ticket)
+                    raise self._reject(QueueTimeout, f"No LLM capacity within {self.queue_timeout:g}s")
+                self._cond.wait(remaining)
+
+        STAGE_LATENCY.observe(time.monotonic() - start, pipeline="ask", stage="admission_wait")
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """Give a slot back and hand it to the next queued client."""
+        with self._cond:
+            self._active -= 1
+            if service_time is not None:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            self._grant_next()
+            LLM_IN_FLIGHT.set(self._active)
+            self._cond.notify_all()
+
+    def retry_after(self) -> int:
+        """Seconds until a new request could plausibly be served."""
+        backlog = (self._queued + 1) / self.max_concurrent
+        return max(1, math.ceil(backlog * self._avg_service_time))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "clients_waiting": len(self._queues),
+            }
+
+    def _grant_next(self) -> None:
+        while self._active < self.max_concurrent and self._queued:
+            client, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            if queue:
+                # Serve other clients before this one's next request
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            ticket.granted = True
+            self._queued -= 1
+            self._active += 1
+        ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+    def _withdraw(self, ticket: _Ticket) -> None:
+        queue = self._queues.get(ticket.client)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            self._queued -= 1
+            if not queue:
+                del self._queues[ticket.client]
+        ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+    def _reject(self, error_type, message: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.inc(reason=error_type.reason)
+        logger.warning(f"Admission rejected: {message}")
+        return error_type(message, retry_after=self.retry_after())
+
+
+# Shared limiter for all LLM calls in this process
+llm_admission = AdmissionController()
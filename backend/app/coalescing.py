@@ -0,0 +1,79 @@
+"""Single-flight coalescing: concurrent identical calls share one in-flight computation."""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.logger import logger
+from app.metrics import COALESCED_REQUESTS
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question used as a coalescing key."""
+    return " ".join(question.casefold().split())
+
+
+class _Call:
+    """One in-flight computation and the waiters sharing it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Run at most one computation per key at a time.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving while it is in flight wait and receive the same result or
+    exception. The key is forgotten as soon as the leader finishes, so
+    later calls compute afresh. A waiter gives up on the leader after
+    `timeout` seconds and computes the result itself, so a stuck leader
+    cannot hold its followers forever.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = None):
+        self.name = name
+        self.timeout = timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn for key, or wait for the identical call already in flight.
+
+        Returns:
+            The result and whether it was shared from another caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            COALESCED_REQUESTS.inc(flight=self.name)
+            if not call.done.wait(self.timeout):
+                logger.warning(f"Shared {self.name} call still running after {self.timeout}s, computing separately")
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
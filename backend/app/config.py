@@ -16,14 +16,129 @@ class Settings:
     # Paths
     VECTOR_DB_PATH: str = os.getenv("VECTOR_DB_PATH", "data/vectorstore")
     DOCS_PATH: str = os.getenv("DOCS_PATH", "data/uploads")
+    COLLECTIONS_PATH: str = os.getenv("COLLECTIONS_PATH", "data/collections")
+    # Extracted page text by file hash, reused when re-chunking or re-embedding
+    TEXT_CACHE_PATH: str = os.getenv("TEXT_CACHE_PATH", "data/text_cache")
+    TEXT_CACHE_ENABLED: bool = os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true"
+    # Write-ahead log of ingestion jobs (accepted jobs, parsed pages, embedded
+    # batches, index writes), so a restart resumes unfinished jobs from their checkpoints
+    WAL_PATH: str = os.getenv("WAL_PATH", "data/wal")
+    WAL_ENABLED: bool = os.getenv("WAL_ENABLED", "true").lower() == "true"
+    # Index files checked at startup: off, fast (sizes) or full (checksums)
+    INTEGRITY_CHECK: str = os.getenv("INTEGRITY_CHECK", "fast")
+
+    # Collection settings
+    MAX_RESIDENT_COLLECTIONS: int = int(os.getenv("MAX_RESIDENT_COLLECTIONS", "8"))
+    COLLECTION_IDLE_SECONDS: float = float(os.getenv("COLLECTION_IDLE_SECONDS", "900"))
+
+    # Upload settings
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    MAX_ARCHIVE_MEMBERS: int = int(os.getenv("MAX_ARCHIVE_MEMBERS", "10000"))
 
     # Chunking settings
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "500"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "50"))
 
+    # Near-duplicate chunks (MinHash similarity of word shingles at or above
+    # DEDUP_THRESHOLD) are stored once and cite every source they appear in
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+    DEDUP_SHINGLE_WORDS: int = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+    DEDUP_NUM_PERM: int = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_BANDS: int = int(os.getenv("DEDUP_BANDS", "32"))
+
+    # Load the embedding model and default index in the background at startup
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+    # Conversation sessions for /ask: at most MAX_SESSIONS, dropped after SESSION_TTL_SECONDS
+    # idle. History in the prompt stays within SESSION_HISTORY_TOKENS (estimated); once
+    # turns exceed it, all but the SESSION_RECENT_TURNS latest are folded into a running
+    # summary of at most SESSION_SUMMARY_TOKENS
+    MAX_SESSIONS: int = int(os.getenv("MAX_SESSIONS", "1000"))
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    SESSION_HISTORY_TOKENS: int = int(os.getenv("SESSION_HISTORY_TOKENS", "800"))
+    SESSION_SUMMARY_TOKENS: int = int(os.getenv("SESSION_SUMMARY_TOKENS", "250"))
+    SESSION_RECENT_TURNS: int = int(os.getenv("SESSION_RECENT_TURNS", "3"))
+    # Rewrite follow-ups into standalone questions (one extra LLM call) before retrieval
+    SESSION_REWRITE_QUERIES: bool = os.getenv("SESSION_REWRITE_QUERIES", "true").lower() == "true"
+    # Longest standalone question a rewrite may return (asked questions are not limited)
+    MAX_QUESTION_CHARS: int = int(os.getenv("MAX_QUESTION_CHARS", "2000"))
+
+    # Job store bounds: finished jobs are kept for JOB_TTL_SECONDS, at most MAX_JOBS overall
+    MAX_JOBS: int = int(os.getenv("MAX_JOBS", "10000"))
+    JOB_TTL_SECONDS: float = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+    # Ingestion progress: chunks embedded per progress update, and keep-alive
+    # interval (seconds) for idle progress streams
+    INGEST_EMBED_BATCH_SIZE: int = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+    PROGRESS_KEEPALIVE_SECONDS: float = float(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15"))
+
+    # Background rebuilds and model migrations: chunks embedded per batch, and the
+    # fraction of wall time spent embedding (sleeping the rest leaves CPU for queries)
+    REBUILD_EMBED_BATCH_SIZE: int = int(os.getenv("REBUILD_EMBED_BATCH_SIZE", "64"))
+    REBUILD_MAX_DUTY: float = float(os.getenv("REBUILD_MAX_DUTY", "0.5"))
+
+    # Embedding settings
+    # Model for new collections; existing ones keep theirs until migrated
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8
+    ONNX_MODEL_DIR: str = os.getenv("ONNX_MODEL_DIR", "data/models")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_THREADS: int = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+    # Sharding settings (the shard layout is fixed when a collection is created)
+    INDEX_SHARDS: int = int(os.getenv("INDEX_SHARDS", "1"))
+    SHARD_PARTITIONING: str = os.getenv("SHARD_PARTITIONING", "hash")  # hash | source
+    SHARD_BACKEND: str = os.getenv("SHARD_BACKEND", "local")  # local | process
+
+    # Vector precision (float32 | float16 | int8) and full-precision rescoring
+    VECTOR_PRECISION: str = os.getenv("VECTOR_PRECISION", "float32")
+    RESCORE_FACTOR: int = int(os.getenv("RESCORE_FACTOR", "4"))
+
+    # LLM providers, in preference order (groq | openai | ollama)
+    LLM_PROVIDERS: str = os.getenv("LLM_PROVIDERS", "groq")
+    GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
+    OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    # Override provider endpoints, e.g. to point at the load-test stub (python -m app.stub_llm)
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+
+    # Hedging: race the next provider when one is slower than its recent p-th percentile
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_DEFAULT_DELAY: float = float(os.getenv("HEDGE_DEFAULT_DELAY", "2.0"))
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+    HEDGE_MAX_DELAY: float = float(os.getenv("HEDGE_MAX_DELAY", "10.0"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    # Give up on a prompt when no provider has answered within this many seconds
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+    # Admission control for LLM calls
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+    ADMISSION_MAX_QUEUED_PER_CLIENT: int = int(os.getenv("ADMISSION_MAX_QUEUED_PER_CLIENT", "8"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+
     # Retrieval settings
     SIMILARITY_THRESHOLD: float = float("1.5")
     TOP_K: int = int(os.getenv("TOP_K", "3"))
+    # Widen the best NEIGHBOR_EXPAND_HITS hits by up to NEIGHBOR_WINDOW chunks on each
+    # side, while the context stays within CONTEXT_TOKEN_BUDGET (estimated) tokens
+    NEIGHBOR_WINDOW: int = int(os.getenv("NEIGHBOR_WINDOW", "1"))
+    NEIGHBOR_EXPAND_HITS: int = int(os.getenv("NEIGHBOR_EXPAND_HITS", "2"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    # Share one computation between identical concurrent /ask requests
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+    # Profiling settings
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", "")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "data/profiles")
+    PROFILE_SAMPLE_INTERVAL: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
 
 
 settings = Settings()
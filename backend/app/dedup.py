@@ -0,0 +1,201 @@
+"""MinHash signatures and an LSH index for finding near-duplicate chunks at ingestion."""
+
+import os
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.logger import logger
+
+
+DEDUP_FILE = "minhash.npz"
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Fixed seed so signatures stay comparable across processes and restarts
+HASH_SEED = 1
+
+
+@lru_cache(maxsize=None)
+def _hash_params(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiply-shift hash functions standing in for random permutations."""
+    rng = np.random.default_rng(HASH_SEED)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingles(text: str, size: Optional[int] = None) -> List[str]:
+    """Overlapping word n-grams of the lowercased text (the whole text if shorter)."""
+    size = size or settings.DEDUP_SHINGLE_WORDS
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def signature(text: str, num_perm: Optional[int] = None) -> np.ndarray:
+    """MinHash signature of a text; equal positions estimate Jaccard similarity of the shingle sets."""
+    num_perm = num_perm or settings.DEDUP_NUM_PERM
+    a, b = _hash_params(num_perm)
+    hashes = np.array(
+        [zlib.crc32(shingle.encode()) for shingle in set(shingles(text))], dtype=np.uint64
+    )
+    # Unsigned overflow is the intended modulo 2^64; keep the high 32 bits
+    permuted = (hashes[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(first == second))
+
+
+class MinHashLSH:
+    """
+    Banded locality-sensitive hashing over MinHash signatures.
+
+    Signatures are split into `bands` bands; chunks sharing any band are
+    candidates, and candidates are confirmed by their estimated similarity.
+    """
+
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.bands = bands or settings.DEDUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError("DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS")
+        self.rows = self.num_perm // self.bands
+        self.ids: List[str] = []
+        self.signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _keys(self, sig: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, chunk_id: str, sig: np.ndarray) -> None:
+        position = len(self.ids)
+        self.ids.append(chunk_id)
+        self.signatures.append(sig)
+        for band, key in self._keys(sig):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def query(
+        self,
+        sig: np.ndarray,
+        threshold: Optional[float] = None,
+        exclude: FrozenSet[str] = frozenset()
+    ) -> Optional[str]:
+        """Id of the most similar indexed chunk at or above threshold, skipping excluded ids."""
+        threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        candidates = set()
+        for band, key in self._keys(sig):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best_id, best = None, threshold
+        for position in candidates:
+            chunk_id = self.ids[position]
+            if chunk_id in exclude:
+                continue
+            score = similarity(self.signatures[position], sig)
+            if score >= best:
+                best_id, best = chunk_id, score
+        return best_id
+
+    def extend(self, other: "MinHashLSH") -> None:
+        """Add every chunk of another index."""
+        for chunk_id, sig in zip(other.ids, other.signatures):
+            self.add(chunk_id, sig)
+
+    def copy(self) -> "MinHashLSH":
+        """An independent copy that can be extended while this one is queried."""
+        clone = MinHashLSH(self.num_perm, self.bands)
+        clone.ids = list(self.ids)
+        clone.signatures = list(self.signatures)
+        clone._buckets = [{key: list(positions) for key, positions in buckets.items()} for buckets in self._buckets]
+        return clone
+
+    def without(self, chunk_ids: Iterable[str]) -> "MinHashLSH":
+        """A copy of the index without the given chunks."""
+        removed = set(chunk_ids)
+        pruned = MinHashLSH(self.num_perm, self.bands)
+        for chunk_id, sig in zip(self.ids, self.signatures):
+            if chunk_id not in removed:
+                pruned.add(chunk_id, sig)
+        return pruned
+
+    def save(self, path: str) -> None:
+        """Atomically write the ids and signatures to path."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        signatures = np.stack(self.signatures) if self.signatures else np.zeros((0, self.num_perm), np.uint32)
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            signatures=signatures,
+            params=np.array([self.num_perm, self.bands, settings.DEDUP_SHINGLE_WORDS])
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSH":
+        """Load an index, or an empty one if missing or built with other parameters."""
+        lsh = cls()
+        try:
+            with np.load(path) as data:
+                params = tuple(int(v) for v in data["params"])
+                if params != (lsh.num_perm, lsh.bands, settings.DEDUP_SHINGLE_WORDS):
+                    logger.warning(f"Ignoring near-duplicate index {path} built with other parameters")
+                    return lsh
+                for chunk_id, sig in zip(data["ids"].tolist(), data["signatures"]):
+                    lsh.add(chunk_id, sig)
+        except FileNotFoundError:
+            pass
+        return lsh
+
+
+_lsh_cache: Dict[str, Tuple[Tuple[int, int], MinHashLSH]] = {}
+_lsh_cache_lock = threading.Lock()
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_index(index_path: str) -> MinHashLSH:
+    """
+    The near-duplicate index of a collection, cached until its file changes.
+
+    The cached index is shared with concurrent readers and never modified
+    in place: writers hold the collection's write lock, change a copy()
+    and swap it in with save_index.
+    """
+    path = os.path.join(index_path, DEDUP_FILE)
+    version = _file_version(path)
+    with _lsh_cache_lock:
+        cached = _lsh_cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    lsh = MinHashLSH.load(path)
+    with _lsh_cache_lock:
+        _lsh_cache[path] = (version, lsh)
+    return lsh
+
+
+def save_index(lsh: MinHashLSH, index_path: str) -> None:
+    path = os.path.join(index_path, DEDUP_FILE)
+    lsh.save(path)
+    with _lsh_cache_lock:
+        _lsh_cache[path] = (_file_version(path), lsh)
@@ -0,0 +1,205 @@
+"""Embedding backends for sentence-transformers models: PyTorch reference and ONNX Runtime (float32 / int8)."""
+
+import argparse
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.logger import logger
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+# Sequence length sentence-transformers uses for the MiniLM models
+MAX_SEQ_LENGTH = 256
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Mean of token embeddings over real tokens, L2-normalized like the reference model."""
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    summed = (hidden * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+def model_repo(model: str) -> str:
+    """Hub repository of a model; bare names refer to sentence-transformers models."""
+    return model if "/" in model else f"sentence-transformers/{model}"
+
+
+def onnx_model_paths(quantized: bool, model_dir: Optional[str] = None, model: Optional[str] = None) -> Dict[str, str]:
+    model = model or settings.EMBEDDING_MODEL
+    root = os.path.join(model_dir or settings.ONNX_MODEL_DIR, model.replace("/", "--"))
+    return {
+        "root": root,
+        "model": os.path.join(root, "onnx", "model.int8.onnx" if quantized else "model.onnx"),
+        "float_model": os.path.join(root, "onnx", "model.onnx"),
+        "tokenizer": os.path.join(root, "tokenizer.json"),
+    }
+
+
+def ensure_onnx_model(
+    quantized: bool = False,
+    model_dir: Optional[str] = None,
+    model: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Make sure the exported ONNX model and tokenizer are on disk.
+
+    The float32 export is fetched from the model's Hub repository; the
+    int8 variant is produced locally with dynamic quantization so it
+    matches the instruction set of this machine.
+    """
+    paths = onnx_model_paths(quantized, model_dir, model)
+    if not os.path.exists(paths["float_model"]) or not os.path.exists(paths["tokenizer"]):
+        from huggingface_hub import hf_hub_download
+
+        repo = model_repo(model or settings.EMBEDDING_MODEL)
+        logger.info(f"Downloading ONNX export of {repo}")
+        for filename in ("onnx/model.onnx", "tokenizer.json"):
+            hf_hub_download(repo, filename, local_dir=paths["root"])
+
+    if quantized and not os.path.exists(paths["model"]):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("Quantizing ONNX embedding model to int8")
+        tmp_path = f"{paths['model']}.tmp"
+        quantize_dynamic(paths["float_model"], tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, paths["model"])
+    return paths
+
+
+class OnnxEmbeddings(Embeddings):
+    """A sentence-transformers model running on ONNX Runtime, without PyTorch."""
+
+    def __init__(
+        self,
+        quantized: bool = False,
+        model_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        model: Optional[str] = None
+    ):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        paths = ensure_onnx_model(quantized, model_dir, model)
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+
+        self.tokenizer = Tokenizer.from_file(paths["tokenizer"])
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        if settings.EMBEDDING_THREADS:
+            options.intra_op_num_threads = settings.EMBEDDING_THREADS
+        self.session = onnxruntime.InferenceSession(
+            paths["model"], options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        hidden = self.session.run(None, inputs)[0]
+        return mean_pool(hidden, inputs["attention_mask"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [
+            self._embed_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def create_embeddings(backend: Optional[str] = None, model: Optional[str] = None) -> Embeddings:
+    """Create an embeddings model (settings.EMBEDDING_MODEL by default) for a backend (torch, onnx or onnx-int8)."""
+    backend = backend or settings.EMBEDDING_BACKEND
+    model = model or settings.EMBEDDING_MODEL
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model_repo(model))
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(quantized=backend == "onnx-int8", model=model)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+_embeddings_lock = threading.Lock()
+_embeddings: Dict[Tuple[str, str], Embeddings] = {}
+
+
+def get_embeddings(backend: Optional[str] = None, model: Optional[str] = None) -> Embeddings:
+    """Shared embeddings model per backend and model, created once per process."""
+    backend = backend or settings.EMBEDDING_BACKEND
+    model = model or settings.EMBEDDING_MODEL
+    with _embeddings_lock:
+        if (backend, model) not in _embeddings:
+            logger.info(f"Loading {model} with the {backend} backend")
+            _embeddings[(backend, model)] = create_embeddings(backend, model)
+        return _embeddings[(backend, model)]
+
+
+def cosine_parity(reference: Embeddings, candidate: Embeddings, texts: List[str]) -> Dict[str, float]:
+    """Cosine similarity between a candidate backend's embeddings and the reference."""
+    expected = np.array(reference.embed_documents(texts), dtype=np.float32)
+    actual = np.array(candidate.embed_documents(texts), dtype=np.float32)
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {"mean": float(cosines.mean()), "min": float(cosines.min())}
+
+
+def throughput(embeddings: Embeddings, texts: List[str], repeats: int = 3) -> float:
+    """Best-of-N documents embedded per second."""
+    embeddings.embed_documents(texts[:8])  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def _sample_texts(limit: int) -> List[str]:
+    """Chunks of the documents in DOCS_PATH, as ingestion would embed them."""
+    from app.ingest import load_document, split_documents
+    from app.uploads import is_supported
+
+    texts: List[str] = []
+    for filename in sorted(os.listdir(settings.DOCS_PATH)):
+        if filename.startswith(".") or not is_supported(filename):
+            continue
+        chunks = split_documents(load_document(os.path.join(settings.DOCS_PATH, filename)))
+        texts.extend(chunk.page_content for chunk in chunks)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity and throughput of embedding backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--texts", type=int, default=256)
+    args = parser.parse_args()
+
+    texts = _sample_texts(args.texts)
+    reference = create_embeddings("torch")
+    for backend in args.backends:
+        model = reference if backend == "torch" else create_embeddings(backend)
+        parity = cosine_parity(reference, model, texts)
+        print(
+            f"{backend:10s} {throughput(model, texts):8.1f} docs/s  "
+            f"cosine vs torch: mean={parity['mean']:.5f} min={parity['min']:.5f}"
+        )
@@ -0,0 +1,243 @@
+"""Named collections, each with its own FAISS index and lazily loaded resident copy."""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.logger import logger
+from app.manifest import MANIFEST_FILE
+from app.metrics import CACHE_HITS, CACHE_MISSES, RESIDENT_COLLECTIONS
+from app.sharding import read_layout, shard_versions
+
+
+DEFAULT_COLLECTION = "default"
+INDEX_FILE = "index.faiss"
+EMBEDDING_FILE = "embedding.json"
+
+# Indexes saved before they were tagged with their model were embedded with this one
+LEGACY_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class InvalidCollectionName(ValueError):
+    """Raised for collection names that are not safe directory names."""
+
+
+class CollectionNotFound(KeyError):
+    """Raised when a collection has no index on disk."""
+
+
+def validate_collection(name: str) -> str:
+    """Return the collection name if valid, else raise InvalidCollectionName."""
+    if not COLLECTION_NAME_PATTERN.match(name or ""):
+        raise InvalidCollectionName(
+            "Collection names must be 1-64 letters, digits, '-' or '_'"
+        )
+    return name
+
+
+def collection_path(name: str = DEFAULT_COLLECTION) -> str:
+    """Directory holding a collection's index, manifest and sidecar files."""
+    validate_collection(name)
+    # The default collection keeps the original single-index location
+    if name == DEFAULT_COLLECTION:
+        return settings.VECTOR_DB_PATH
+    return os.path.join(settings.COLLECTIONS_PATH, name)
+
+
+def index_version(path: str) -> Optional[Tuple]:
+    """
+    Version of the saved index at path, or None when there is none.
+
+    Single indexes use the (mtime, size) of index.faiss; sharded
+    collections combine the versions of all their shards.
+    """
+    layout = read_layout(path)
+    if layout is not None:
+        versions = shard_versions(path, layout)
+        return versions if any(versions) else None
+    try:
+        stat = os.stat(os.path.join(path, INDEX_FILE))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def index_model(path: str) -> str:
+    """
+    Embedding model the index at path was built with.
+
+    Untagged indexes predate model tagging and use the legacy model; a
+    path without an index gets the configured EMBEDDING_MODEL.
+    """
+    try:
+        with open(os.path.join(path, EMBEDDING_FILE)) as f:
+            return json.load(f)["model"]
+    except FileNotFoundError:
+        return LEGACY_EMBEDDING_MODEL if index_version(path) is not None else settings.EMBEDDING_MODEL
+
+
+def write_index_model(path: str, model: str) -> None:
+    """Tag the index at path with the embedding model its vectors come from."""
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(path, f"{EMBEDDING_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"model": model}, f)
+    os.replace(tmp_path, os.path.join(path, EMBEDDING_FILE))
+
+
+def index_generation(name: str = DEFAULT_COLLECTION) -> Tuple:
+    """
+    Version of everything a query on a collection reads.
+
+    Changes whenever the index is written or documents are deleted
+    (tombstones live in the manifest), so cached or shared answers
+    from an older generation are never reused.
+    """
+    path = collection_path(name)
+    try:
+        stat = os.stat(os.path.join(path, MANIFEST_FILE))
+        manifest_version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        manifest_version = None
+    return (index_version(path), manifest_version)
+
+
+def index_exists(name: str = DEFAULT_COLLECTION) -> bool:
+    """Whether a collection has a saved index."""
+    return index_version(collection_path(name)) is not None
+
+
+def list_collections() -> List[str]:
+    """Names of all collections with a saved index."""
+    names = []
+    if index_exists(DEFAULT_COLLECTION):
+        names.append(DEFAULT_COLLECTION)
+    if os.path.isdir(settings.COLLECTIONS_PATH):
+        for name in sorted(os.listdir(settings.COLLECTIONS_PATH)):
+            if COLLECTION_NAME_PATTERN.match(name) and name != DEFAULT_COLLECTION and index_exists(name):
+                names.append(name)
+    return names
+
+
+_write_locks: Dict[str, threading.RLock] = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name: str) -> threading.RLock:
+    """Lock serializing load -> add -> save on one collection's index."""
+    with _write_locks_guard:
+        if name not in _write_locks:
+            _write_locks[name] = threading.RLock()
+        return _write_locks[name]
+
+
+@dataclass
+class ResidentIndex:
+    """A loaded index and the file version it was loaded from."""
+    store: Any
+    version: Tuple
+    last_used: float
+
+
+class IndexRegistry:
+    """
+    Resident indexes keyed by collection.
+
+    Indexes are loaded on first use, reloaded when the saved index changes,
+    and evicted least-recently-used first when more than `max_resident`
+    are loaded or when idle for longer than `idle_seconds`.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        max_resident: Optional[int] = None,
+        idle_seconds: Optional[float] = None
+    ):
+        self.loader = loader
+        self.max_resident = max_resident or settings.MAX_RESIDENT_COLLECTIONS
+        self.idle_seconds = idle_seconds if idle_seconds is not None else settings.COLLECTION_IDLE_SECONDS
+        self._resident: "OrderedDict[str, ResidentIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str = DEFAULT_COLLECTION):
+        """Get the resident index of a collection, loading it if needed."""
+        path = collection_path(name)
+        version = index_version(path)
+        if version is None:
+            # A rebuild swapping directories holds the write lock; wait for the new index
+            with write_lock(name):
+                version = index_version(path)
+            if version is None:
+                raise CollectionNotFound(name)
+
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is not None and entry.version == version:
+                entry.last_used = time.monotonic()
+                self._resident.move_to_end(name)
+                CACHE_HITS.inc(cache="index")
+                return entry.store
+
+        # Load outside the registry lock so other collections stay available;
+        # the per-collection write lock keeps a writer from saving mid-load
+        with write_lock(name):
+            with self._lock:
+                entry = self._resident.get(name)
+                if entry is not None and entry.version == version:
+                    CACHE_HITS.inc(cache="index")
+                    return entry.store
+            CACHE_MISSES.inc(cache="index")
+            logger.info(f"Loading index for collection '{name}'")
+            store = self.loader(path)
+
+        with self._lock:
+            self._resident[name] = ResidentIndex(store=store, version=version, last_used=time.monotonic())
+            self._resident.move_to_end(name)
+            self._evict_locked()
+        return store
+
+    def evict(self, name: str) -> bool:
+        """Drop a collection from memory."""
+        with self._lock:
+            removed = self._resident.pop(name, None) is not None
+            RESIDENT_COLLECTIONS.set(len(self._resident))
+            return removed
+
+    def evict_idle(self) -> List[str]:
+        """Drop collections idle for longer than idle_seconds."""
+        with self._lock:
+            return self._evict_locked()
+
+    def resident(self) -> List[str]:
+        """Names of resident collections, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._resident.clear()
+            RESIDENT_COLLECTIONS.set(0)
+
+    def _evict_locked(self) -> List[str]:
+        evicted = []
+        now = time.monotonic()
+        for name, entry in list(self._resident.items()):
+            if self.idle_seconds and now - entry.last_used > self.idle_seconds:
+                del self._resident[name]
+                evicted.append(name)
+        while len(self._resident) > self.max_resident:
+            name, _ = self._resident.popitem(last=False)
+            evicted.append(name)
+        if evicted:
+            logger.info(f"Evicted idle collections: {', '.join(evicted)}")
+        RESIDENT_COLLECTIONS.set(len(self._resident))
+        return evicted
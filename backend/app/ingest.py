@@ -2,16 +2,31 @@
 
 import os
 import re
-from typing import List, Optional
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
 
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+import numpy as np
 from langchain_core.documents import Document
 
 from app.config import settings
+from app.embeddings import get_embeddings
 from app.logger import logger
+from app.metrics import CHUNKS_DEDUPLICATED, CHUNKS_DELETED, CHUNKS_INGESTED, timed
+from app import dedup, manifest, sharding, text_cache, wal
+from app.models import record_progress
+from app.index_store import (
+    DEFAULT_COLLECTION,
+    INDEX_FILE,
+    collection_path,
+    index_model,
+    index_version,
+    write_index_model,
+    write_lock,
+)
+from app.uploads import SUPPORTED_EXTENSIONS, file_sha256, source_name_for
 
 
 # Section header patterns for detection
@@ -67,10 +82,10 @@ def detect_section(text: str) -> Optional[str]:
     return None
 
 
-def enhance_metadata(doc: Document, file_path: str) -> Document:
+def enhance_metadata(doc: Document, file_path: str, source_name: Optional[str] = None) -> Document:
     """Enhance document metadata with source filename and section detection."""
-    # Extract just the filename from the path
-    filename = os.path.basename(file_path)
+    # Extract just the filename from the path, unless the stored name differs
+    filename = source_name or os.path.basename(file_path)
     doc.metadata['source'] = filename
 
     # PyPDFLoader already provides page numbers (0-indexed), convert to 1-indexed
@@ -85,59 +100,60 @@ def enhance_metadata(doc: Document, file_path: str) -> Document:
     return doc
 
 
-def get_embeddings():
-    """Get HuggingFace embeddings model."""
-    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-
-def load_vectorstore():
-    """Load existing FAISS vectorstore or return None."""
-    embeddings = get_embeddings()
-    if os.path.exists(settings.VECTOR_DB_PATH):
-        return FAISS.load_local(
-            settings.VECTOR_DB_PATH,
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-    return None
-
-
-def ingest_single_document(file_path: str) -> int:
+def load_document(
+    file_path: str,
+    source_name: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> List[Document]:
     """
-    Ingest a single document into the vector store.
+    Load a TXT or PDF file into page documents with enhanced metadata.
 
-    Args:
-        file_path: Path to the document to ingest
-
-    Returns:
-        Number of chunks added to the vector store
+    Pages of hashed files are served from the extracted-text cache (or the
+    journal of a resumed job) when present, and cached after parsing
+    otherwise.
     """
-    documents = []
-    filename = os.path.basename(file_path)
+    from langchain_community.document_loaders import TextLoader, PyPDFLoader
+
+    journal = wal.current()
+    if content_hash:
+        name = source_name or os.path.basename(file_path)
+        cached = text_cache.load_pages(content_hash, name)
+        if cached is None and journal is not None:
+            cached = journal.load_pages(content_hash, name)
+        if cached is not None:
+            record_progress(pages_parsed=len(cached))
+            return cached
 
     if file_path.endswith(".txt"):
-        docs = TextLoader(file_path).load()
-        for doc in docs:
-            doc = enhance_metadata(doc, file_path)
-        documents.extend(docs)
-
+        loader = TextLoader(file_path)
     elif file_path.endswith(".pdf"):
-        docs = PyPDFLoader(file_path).load()
-        for doc in docs:
-            doc = enhance_metadata(doc, file_path)
-        documents.extend(docs)
-
+        loader = PyPDFLoader(file_path)
     else:
-        logger.warning(f"Unsupported file type: {filename}")
-        return 0
-
-    if not documents:
-        logger.warning(f"No content extracted from: {filename}")
-        return 0
+        return []
+
+    docs = []
+    for doc in loader.lazy_load():
+        enhance_metadata(doc, file_path, source_name)
+        if content_hash:
+            doc.metadata['content_hash'] = content_hash
+        docs.append(doc)
+        record_progress(pages_parsed=1)
+    if content_hash and docs:
+        text_cache.store_pages(content_hash, docs)
+        if journal is not None:
+            journal.record_pages(content_hash, docs)
+    return docs
+
+
+def split_documents(documents: List[Document]) -> List[Document]:
+    """Split documents into chunks with section propagation and chunk indexing."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=settings.CHUNK_SIZE,
-        chunk_overlap=settings.CHUNK_OVERLAP
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        # Character offset of each chunk within its page, exposed by /search
+        add_start_index=True
     )
 
     chunks = splitter.split_documents(documents)
@@ -160,98 +176,597 @@ def ingest_single_document(file_path: str) -> int:
         elif detected:
             chunk.metadata['section'] = detected
 
-    embeddings = get_embeddings()
-
-    if os.path.exists(settings.VECTOR_DB_PATH):
-        logger.info("Loading existing FAISS index")
-        vectorstore = FAISS.load_local(
-            settings.VECTOR_DB_PATH,
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-        vectorstore.add_documents(chunks)
-    else:
-        logger.info("Creating new FAISS index")
-        vectorstore = FAISS.from_documents(chunks, embeddings)
+    return chunks
 
-    vectorstore.save_local(settings.VECTOR_DB_PATH)
 
-    logger.info(f"Ingested {len(chunks)} chunks from {filename}")
-    return len(chunks)
+def add_chunks_to_index(chunks: List[Document], collection: str = DEFAULT_COLLECTION) -> List[str]:
+    """
+    Embed chunks and append them to a collection's FAISS index on disk.
 
+    Chunks are embedded with the model the collection's index was built
+    with (EMBEDDING_MODEL for a new collection). Chunks from documents
+    already recorded in the manifest are dropped, and so are near-duplicates
+    of stored chunks (or of earlier chunks in the batch) when DEDUP_ENABLED;
+    their documents cite the stored chunk instead. Each new document is
+    recorded with the ids of its chunks. Every chunk gets an id assigned to
+    `chunk.id`.
 
-def ingest_documents() -> int:
+    Returns:
+        Ids of the chunks written to the index
     """
-    Ingest all documents from the uploads directory.
+    index_path = collection_path(collection)
+    model = index_model(index_path)
+    embeddings = get_embeddings(model=model)
+    for chunk in chunks:
+        chunk.id = str(uuid.uuid4())
+    signatures = _signatures(chunks)
+
+    # Near-duplicates of the index as it is now are never embedded
+    to_embed = _collapse_duplicates(chunks, signatures, index_path)[0]
+    vectors = dict(zip((chunk.id for chunk in to_embed), _embed_chunks(to_embed, embeddings, model=model)))
+
+    # Serialize load -> add -> save so concurrent jobs don't overwrite each other
+    with write_lock(collection):
+        if index_model(index_path) != model:
+            # A migration swapped in an index of another model while we were embedding
+            model = index_model(index_path)
+            embeddings = get_embeddings(model=model)
+            vectors = {}
+        known = manifest.load_manifest(index_path)["documents"]
+        new = [chunk for chunk in chunks if chunk.metadata.get('content_hash') not in known]
+        if not new:
+            return []
+        # Chunks written by other jobs since the first pass may make more duplicates
+        kept, duplicates, kept_signatures = _collapse_duplicates(new, signatures, index_path)
+        missing = [chunk for chunk in kept if chunk.id not in vectors]
+        if missing:
+            vectors.update(zip((chunk.id for chunk in missing), _embed_chunks(missing, embeddings, model=model)))
+
+        ids = [chunk.id for chunk in kept]
+        journal = wal.current()
+        if journal is not None:
+            written = {chunk.metadata.get('content_hash'): [] for chunk in new}
+            for chunk in kept:
+                written[chunk.metadata.get('content_hash')].append(chunk.id)
+            journal.record_commit(collection, written)
+        if kept:
+            created = index_version(index_path) is None
+            _write_to_index([(chunk, vectors[chunk.id]) for chunk in kept], ids, embeddings, index_path)
+            if created:
+                write_index_model(index_path, model)
+        if len(kept_signatures):
+            # Other jobs may be querying the cached index outside the write lock
+            lsh = dedup.load_index(index_path).copy()
+            lsh.extend(kept_signatures)
+            dedup.save_index(lsh, index_path)
+        _record_documents(new, kept, duplicates, index_path)
+        if journal is not None:
+            journal.record_committed()
+        record_progress(chunks_committed=len(ids))
+
+    CHUNKS_INGESTED.inc(len(ids))
+    if len(new) > len(kept):
+        CHUNKS_DEDUPLICATED.inc(len(new) - len(kept))
+        logger.info(f"Collapsed {len(new) - len(kept)} near-duplicate chunks into stored ones")
+    return ids
+
+
+def _signatures(chunks: List[Document]) -> Dict[str, np.ndarray]:
+    """MinHash signatures of chunks by chunk id, or none when deduplication is off."""
+    if not settings.DEDUP_ENABLED:
+        return {}
+    with timed("ingest", "minhash"):
+        return {chunk.id: dedup.signature(chunk.page_content) for chunk in chunks}
+
+
+def _collapse_duplicates(
+    chunks: List[Document],
+    signatures: Dict[str, np.ndarray],
+    index_path: Optional[str] = None,
+    stored: Optional[dedup.MinHashLSH] = None
+) -> Tuple[List[Document], Dict[str, List[Dict]], dedup.MinHashLSH]:
+    """
+    Separate chunks to store from near-duplicates of stored or earlier chunks.
+
+    Stored chunks come from `stored`, or the near-duplicate index of the
+    collection at index_path (skipping tombstoned chunks).
 
     Returns:
-        Total number of chunks added to the vector store
+        The chunks to store, duplicate references by content hash (the
+        stored chunk's id, the copy's location and its position among the
+        document's chunks) and the signatures of the chunks to store
+    """
+    batch = dedup.MinHashLSH()
+    if not signatures:
+        return chunks, {}, batch
+    tombstones = frozenset()
+    if stored is None:
+        stored = dedup.load_index(index_path)
+        tombstones = manifest.load_tombstones(index_path)
+
+    kept = []
+    duplicates: Dict[str, List[Dict]] = {}
+    positions: Dict[str, int] = {}
+    for chunk in chunks:
+        content_hash = chunk.metadata.get('content_hash')
+        position = positions[content_hash] = positions.get(content_hash, -1) + 1
+        signature = signatures[chunk.id]
+        match = None
+        if content_hash:
+            match = stored.query(signature, exclude=tombstones) or batch.query(signature)
+        if match is None:
+            kept.append(chunk)
+            batch.add(chunk.id, signature)
+            continue
+        duplicates.setdefault(content_hash, []).append({
+            "chunk_id": match,
+            "page": chunk.metadata.get('page'),
+            "section": chunk.metadata.get('section'),
+            "chunk_index": chunk.metadata.get('chunk_index'),
+            "position": position,
+        })
+    return kept, duplicates, batch
+
+
+def _embed_chunks(
+    chunks: List[Document],
+    embeddings,
+    batch_size: Optional[int] = None,
+    max_duty: float = 1.0,
+    model: Optional[str] = None
+) -> List[List[float]]:
     """
-    documents = []
+    Embed chunk texts in batches so the job's progress advances as chunks are embedded.
 
-    for file in os.listdir(settings.DOCS_PATH):
-        path = os.path.join(settings.DOCS_PATH, file)
+    With max_duty below 1, each batch is followed by a pause long enough
+    that embedding takes at most that fraction of wall time. Inside a
+    journaled job, each batch embedded with `model` is checkpointed, and
+    texts embedded before a restart are not embedded again.
+    """
+    texts = [chunk.page_content for chunk in chunks]
+    journal = wal.current() if model else None
+    done = {}
+    if journal is not None:
+        checkpointed = journal.embedded_vectors(model)
+        digests = [wal.text_digest(text) for text in texts]
+        done = {i: checkpointed[digest] for i, digest in enumerate(digests) if digest in checkpointed}
+        if done:
+            record_progress(chunks_embedded=len(done))
+            logger.info(f"Reusing {len(done)} embedded chunks from the journal of job {journal.job_id}")
+    pending = [i for i in range(len(texts)) if i not in done]
+    batch_size = batch_size or settings.INGEST_EMBED_BATCH_SIZE
+    with timed("ingest", "embed_documents"):
+        for start in range(0, len(pending), batch_size):
+            batch = [texts[i] for i in pending[start:start + batch_size]]
+            batch_start = time.perf_counter()
+            batch_vectors = embeddings.embed_documents(batch)
+            if journal is not None:
+                journal.record_batch(model, batch, batch_vectors)
+            done.update(zip(pending[start:start + batch_size], batch_vectors))
+            record_progress(chunks_embedded=len(batch))
+            if 0 < max_duty < 1:
+                time.sleep((time.perf_counter() - batch_start) * (1 - max_duty) / max_duty)
+    return [done[i] for i in range(len(texts))]
+
+
+def _write_to_index(new, ids: List[str], embeddings, index_path: str) -> None:
+    """Append embedded chunks to the collection's index, routing them to shards if sharded."""
+    layout = sharding.read_layout(index_path)
+    if layout is None and settings.INDEX_SHARDS > 1 and index_version(index_path) is None:
+        layout = sharding.write_layout(index_path, settings.INDEX_SHARDS, settings.SHARD_PARTITIONING)
+
+    if layout is None:
+        _append_to_faiss(index_path, new, ids, embeddings)
+        return
+
+    shards = {}
+    for (chunk, vector), chunk_id in zip(new, ids):
+        shard = sharding.shard_for(chunk_id, chunk.metadata.get('source', ''), layout)
+        items, shard_ids = shards.setdefault(shard, ([], []))
+        items.append((chunk, vector))
+        shard_ids.append(chunk_id)
+    for shard, (items, shard_ids) in shards.items():
+        _append_to_faiss(sharding.shard_path(index_path, shard), items, shard_ids, embeddings)
+
+
+def _faiss_paths(index_path: str) -> List[str]:
+    """Directories of the FAISS indexes making up a collection."""
+    layout = sharding.read_layout(index_path)
+    if layout is None:
+        return [index_path]
+    return [sharding.shard_path(index_path, shard) for shard in range(layout["shards"])]
+
+
+def _append_to_faiss(path: str, new, ids: List[str], embeddings) -> None:
+    """Append embedded chunks to one saved FAISS index, creating it if needed."""
+    from langchain_community.vectorstores import FAISS
+    from app import quantization
+
+    text_embeddings = [(chunk.page_content, vector) for chunk, vector in new]
+    metadatas = [chunk.metadata for chunk, _ in new]
+
+    with timed("ingest", "load_index"):
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            logger.info("Loading existing FAISS index")
+            vectorstore = FAISS.load_local(
+                path,
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+        else:
+            logger.info("Creating new FAISS index")
+            vectorstore = None
+
+    with timed("ingest", "write_index"):
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(
+                text_embeddings, embeddings, metadatas=metadatas, ids=ids
+            )
+        else:
+            vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        quantization.save_index(vectorstore, path)
+
+
+def _record_documents(
+    chunks: List[Document],
+    kept: List[Document],
+    duplicates: Dict[str, List[Dict]],
+    index_path: str
+) -> None:
+    """Record each hashed document of the chunks with its written chunks and duplicate references."""
+    documents = {}
+    for chunk in chunks:
+        content_hash = chunk.metadata.get('content_hash')
+        if content_hash:
+            documents.setdefault(content_hash, (chunk.metadata.get('source'), []))
+    for chunk in kept:
+        if chunk.metadata.get('content_hash') in documents:
+            documents[chunk.metadata['content_hash']][1].append(chunk.id)
+    for content_hash, (source, chunk_ids) in documents.items():
+        manifest.record_document(content_hash, source, chunk_ids, index_path, duplicates.get(content_hash))
+
+
+def prepare_chunks(
+    file_path: str,
+    source_name: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    collection: str = DEFAULT_COLLECTION
+) -> List[Document]:
+    """
+    Parse and chunk a document without touching the index.
+
+    Returns an empty list for unsupported, empty or already-ingested files.
+    """
+    filename = source_name or os.path.basename(file_path)
+
+    if not (file_path.endswith(".txt") or file_path.endswith(".pdf")):
+        logger.warning(f"Unsupported file type: {filename}")
+        return []
 
-        if file.endswith(".txt"):
-            docs = TextLoader(path).load()
-            for doc in docs:
-                doc = enhance_metadata(doc, path)
-            documents.extend(docs)
+    content_hash = content_hash or file_sha256(file_path)
+    if manifest.is_known(content_hash, collection_path(collection)):
+        logger.info(f"Skipping {filename}: content already ingested")
+        return []
 
-        elif file.endswith(".pdf"):
-            docs = PyPDFLoader(path).load()
-            for doc in docs:
-                doc = enhance_metadata(doc, path)
-            documents.extend(docs)
+    with timed("ingest", "parse"):
+        documents = load_document(file_path, source_name, content_hash)
 
     if not documents:
-        logger.warning("No documents found to ingest")
+        logger.warning(f"No content extracted from: {filename}")
+        return []
+
+    with timed("ingest", "split"):
+        return split_documents(documents)
+
+
+def ingest_single_document(
+    file_path: str,
+    source_name: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    collection: str = DEFAULT_COLLECTION
+) -> int:
+    """
+    Ingest a single document into the vector store.
+
+    Args:
+        file_path: Path to the document to ingest
+        source_name: Name to cite as the source (defaults to the file name)
+        content_hash: SHA-256 of the file, computed if not given
+        collection: Collection whose index receives the chunks
+
+    Returns:
+        Number of chunks added to the vector store
+    """
+    chunks = prepare_chunks(file_path, source_name, content_hash, collection)
+    if not chunks:
         return 0
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.CHUNK_SIZE,
-        chunk_overlap=settings.CHUNK_OVERLAP
-    )
+    chunk_ids = add_chunks_to_index(chunks, collection)
 
-    chunks = splitter.split_documents(documents)
+    filename = source_name or os.path.basename(file_path)
+    logger.info(f"Ingested {len(chunk_ids)} chunks from {filename}")
+    return len(chunk_ids)
 
-    # Propagate sections across chunks and add chunk indexing
-    current_section = None
-    for i, chunk in enumerate(chunks):
-        # Add chunk index for reference
-        chunk.metadata['chunk_index'] = i + 1
-        chunk.metadata['total_chunks'] = len(chunks)
 
-        # Detect section in this chunk
-        detected = detect_section(chunk.page_content)
-        if detected:
-            current_section = detected
+def replace_document(
+    file_path: str,
+    source_name: str,
+    content_hash: Optional[str] = None,
+    collection: str = DEFAULT_COLLECTION
+) -> int:
+    """
+    Ingest a new version of a source and tombstone the previous versions.
 
-        # Assign current section if chunk doesn't have one
-        if 'section' not in chunk.metadata and current_section:
-            chunk.metadata['section'] = current_section
-        elif detected:
-            chunk.metadata['section'] = detected
+    The new chunks are written before the old ones are tombstoned, so the
+    source stays searchable throughout.
+
+    Returns:
+        Number of chunks added to the vector store
+    """
+    content_hash = content_hash or file_sha256(file_path)
+    chunks_added = ingest_single_document(file_path, source_name, content_hash, collection)
+    delete_document(source_name, collection, keep_hash=content_hash)
+    return chunks_added
+
+
+def delete_document(
+    source: str,
+    collection: str = DEFAULT_COLLECTION,
+    keep_hash: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    Remove a source from search by tombstoning its chunks.
 
-    embeddings = get_embeddings()
+    Only the manifest is rewritten; the vectors stay in the index until
+    compact_collection rebuilds it.
 
-    if os.path.exists(settings.VECTOR_DB_PATH):
-        logger.info("Loading existing FAISS index")
-        vectorstore = FAISS.load_local(
-            settings.VECTOR_DB_PATH,
-            embeddings,
-            allow_dangerous_deserialization=True
+    Returns:
+        Number of documents removed and number of chunks tombstoned
+    """
+    with write_lock(collection):
+        documents, chunk_ids = manifest.tombstone_source(
+            source, collection_path(collection), keep_hash
         )
-        vectorstore.add_documents(chunks)
-    else:
-        logger.info("Creating new FAISS index")
-        vectorstore = FAISS.from_documents(chunks, embeddings)
+    if documents:
+        CHUNKS_DELETED.inc(len(chunk_ids))
+        logger.info(f"Tombstoned {len(chunk_ids)} chunks of {source} in '{collection}'")
+    return documents, len(chunk_ids)
 
-    vectorstore.save_local(settings.VECTOR_DB_PATH)
 
-    logger.info(f"Ingested {len(chunks)} chunks successfully.")
-    return len(chunks)
+def compact_collection(collection: str = DEFAULT_COLLECTION) -> int:
+    """
+    Physically remove tombstoned chunks from a collection's index.
+
+    Returns:
+        Number of vectors removed
+    """
+    from langchain_community.vectorstores import FAISS
+    from app import quantization
+
+    index_path = collection_path(collection)
+    with write_lock(collection):
+        tombstones = manifest.load_tombstones(index_path)
+        if not tombstones or index_version(index_path) is None:
+            return 0
+
+        removed = 0
+        with timed("ingest", "compact"):
+            for path in _faiss_paths(index_path):
+                if not os.path.exists(os.path.join(path, INDEX_FILE)):
+                    continue
+                vectorstore = FAISS.load_local(
+                    path,
+                    get_embeddings(model=index_model(index_path)),
+                    allow_dangerous_deserialization=True
+                )
+                present = set(vectorstore.index_to_docstore_id.values())
+                to_remove = [chunk_id for chunk_id in tombstones if chunk_id in present]
+                if to_remove:
+                    vectorstore.delete(to_remove)
+                    quantization.save_index(vectorstore, path)
+                    removed += len(to_remove)
+            manifest.clear_tombstones(list(tombstones), index_path)
+            lsh = dedup.load_index(index_path)
+            if len(lsh):
+                dedup.save_index(lsh.without(tombstones), index_path)
+
+    logger.info(f"Compacted '{collection}': removed {removed} vectors")
+    return removed
+
+
+class RebuildError(Exception):
+    """A collection cannot be rebuilt, e.g. because a document's text is unavailable."""
+
+
+def _uploaded_file(content_hash: str) -> Optional[str]:
+    """Content-addressed upload of a document, if it is still on disk."""
+    for extension in SUPPORTED_EXTENSIONS:
+        path = os.path.join(settings.DOCS_PATH, f"{content_hash}{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+_rebuilding = set()
+_rebuilding_lock = threading.Lock()
+
+
+def rebuild_collection(collection: str = DEFAULT_COLLECTION, model: Optional[str] = None) -> int:
+    """
+    Re-chunk and re-embed every document of a collection into a fresh index.
+
+    Pages come from the extracted-text cache, so the original files are
+    only parsed for documents ingested before the cache existed. The new
+    index uses the current chunking settings and the given embedding model
+    (by default the collection's own), and is built next to the live one
+    from a snapshot of the manifest. Searches and writes keep using the
+    live index meanwhile, and embedding is throttled to REBUILD_MAX_DUTY.
+    Documents added or deleted during the build are caught up under the
+    write lock, then the new index is swapped in.
+
+    Returns:
+        Number of chunks in the rebuilt index
+
+    Raises:
+        RebuildError: If a document is neither cached nor in the uploads
+            directory, or the collection is already being rebuilt
+    """
+    index_path = collection_path(collection)
+    build_path = f"{index_path}.rebuild"
+    with _rebuilding_lock:
+        if collection in _rebuilding:
+            raise RebuildError(f"Collection '{collection}' is already being rebuilt")
+        _rebuilding.add(collection)
+
+    try:
+        snapshot = manifest.load_manifest(index_path)["documents"]
+        if not snapshot:
+            return 0
+        model = model or index_model(index_path)
+        embeddings = get_embeddings(model=model)
+
+        shutil.rmtree(build_path, ignore_errors=True)
+        layout = sharding.read_layout(index_path)
+        if layout is not None:
+            sharding.write_layout(build_path, layout["shards"], layout["partitioning"])
+        lsh = dedup.MinHashLSH()
+        built = _rebuild_documents(
+            snapshot, embeddings, build_path, lsh, max_duty=settings.REBUILD_MAX_DUTY, model=model
+        )
+
+        with write_lock(collection):
+            documents = manifest.load_manifest(index_path)["documents"]
+            added = {h: entry for h, entry in documents.items() if h not in snapshot}
+            if added:
+                built.update(_rebuild_documents(added, embeddings, build_path, lsh, model=model))
+            rebuilt_documents = {}
+            for content_hash, entry in documents.items():
+                entry = {k: v for k, v in entry.items() if k != "duplicates"}
+                rebuilt_documents[content_hash] = {**entry, **built[content_hash]}
+            # Documents deleted since the snapshot are in the new index; hide them
+            deleted = [built[h] for h in snapshot if h not in documents]
+            rebuilt = {
+                "documents": rebuilt_documents,
+                "tombstones": sorted(
+                    manifest.referenced_chunk_ids(deleted)
+                    - manifest.referenced_chunk_ids(rebuilt_documents.values())
+                ),
+            }
+            manifest.save_manifest(rebuilt, build_path)
+            if len(lsh):
+                dedup.save_index(lsh, build_path)
+            write_index_model(build_path, model)
+            _swap_directories(build_path, index_path)
+    finally:
+        shutil.rmtree(build_path, ignore_errors=True)
+        with _rebuilding_lock:
+            _rebuilding.discard(collection)
+
+    total = sum(len(entry["chunk_ids"]) for entry in built.values())
+    logger.info(f"Rebuilt '{collection}' with {model}: {total} chunks from {len(built)} documents")
+    return total
+
+
+def _rebuild_documents(
+    documents: dict,
+    embeddings,
+    build_path: str,
+    lsh: dedup.MinHashLSH,
+    max_duty: float = 1.0,
+    model: Optional[str] = None
+) -> Dict[str, Dict]:
+    """
+    Chunk, embed and write manifest documents into the index at build_path.
+
+    Near-duplicates of chunks already in `lsh` (or earlier in the batch)
+    are collapsed, and the stored chunks are added to it.
+
+    Returns:
+        Manifest fields (chunk_ids and any duplicates) per content hash
+    """
+    chunks = []
+    missing = []
+    for content_hash, entry in documents.items():
+        # Cached pages first; the upload is only parsed if the cache has none
+        pages = load_document(_uploaded_file(content_hash) or "", entry["source"], content_hash)
+        if not pages:
+            missing.append(entry["source"])
+            continue
+        with timed("ingest", "split"):
+            chunks.extend(split_documents(pages))
+    if missing:
+        raise RebuildError(f"No cached text or upload for: {', '.join(sorted(missing))}")
+
+    for chunk in chunks:
+        chunk.id = str(uuid.uuid4())
+    kept, duplicates, kept_signatures = _collapse_duplicates(chunks, _signatures(chunks), stored=lsh)
+    vectors = _embed_chunks(kept, embeddings, settings.REBUILD_EMBED_BATCH_SIZE, max_duty, model)
+    if kept:
+        _write_to_index(list(zip(kept, vectors)), [chunk.id for chunk in kept], embeddings, build_path)
+    lsh.extend(kept_signatures)
+
+    built = {content_hash: {"chunk_ids": []} for content_hash in documents}
+    for chunk in kept:
+        built[chunk.metadata["content_hash"]]["chunk_ids"].append(chunk.id)
+    for content_hash, references in duplicates.items():
+        built[content_hash]["duplicates"] = references
+    return built
+
+
+def _swap_directories(new_path: str, live_path: str) -> None:
+    """Replace live_path with new_path, keeping the old directory until the new one is in place."""
+    old_path = f"{live_path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(live_path):
+        os.rename(live_path, old_path)
+    os.rename(new_path, live_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def ingest_documents(collection: str = DEFAULT_COLLECTION) -> int:
+    """
+    Ingest all documents from the uploads directory into a collection.
+
+    Returns:
+        Total number of chunks added to the vector store
+    """
+    chunks = []
+    known = manifest.load_manifest(collection_path(collection))["documents"]
+
+    for file in os.listdir(settings.DOCS_PATH):
+        path = os.path.join(settings.DOCS_PATH, file)
+        if file.startswith(".") or not (file.endswith(".txt") or file.endswith(".pdf")):
+            continue
+        content_hash = file_sha256(path)
+        if content_hash in known:
+            continue
+        with timed("ingest", "parse"):
+            pages = load_document(path, source_name_for(path), content_hash)
+        # Split each document on its own, as rebuilds do, so chunk indexes match
+        with timed("ingest", "split"):
+            chunks.extend(split_documents(pages))
+
+    if not chunks:
+        logger.warning("No documents found to ingest")
+        return 0
+
+    chunk_ids = add_chunks_to_index(chunks, collection)
+
+    logger.info(f"Ingested {len(chunk_ids)} chunks successfully.")
+    return len(chunk_ids)
 
 
 if __name__ == "__main__":
-    ingest_documents()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest the uploads directory or rebuild a collection's index")
+    parser.add_argument("command", nargs="?", choices=("ingest", "rebuild"), default="ingest")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--model", help="Embedding model to rebuild with (migrates the collection)")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        chunks = rebuild_collection(args.collection, args.model)
+        print(f"Rebuilt '{args.collection}' with {chunks} chunks")
+    else:
+        ingest_documents(args.collection)
@@ -0,0 +1,194 @@
+"""LLM provider router with hedged requests and failover for tail latency."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.logger import logger
+from app.metrics import LLM_CALLS, LLM_HEDGES, LLM_PROVIDER_LATENCY
+
+
+def create_chat_model(provider: str):
+    """Chat model for a provider name; client libraries are imported on first use."""
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(
+            model=settings.GROQ_MODEL,
+            temperature=0,
+            api_key=settings.GROQ_API_KEY or None,
+            base_url=settings.GROQ_BASE_URL or None,
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=settings.OPENAI_MODEL,
+            temperature=0,
+            api_key=settings.OPENAI_API_KEY or None,
+            base_url=settings.OPENAI_BASE_URL or None,
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama
+
+        return ChatOllama(model=settings.OLLAMA_MODEL, temperature=0, base_url=settings.OLLAMA_BASE_URL)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+class LatencyTracker:
+    """
+    Recent call durations per provider.
+
+    Calls cancelled after losing a race count with the time they had run,
+    a lower bound of their latency; leaving them out would only keep the
+    fast calls and shrink the hedge delay.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        """The q-th percentile (0-100) of recent durations, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class LLMRouter:
+    """
+    Sends each prompt to the first provider and hedges or fails over to the next.
+
+    If the current provider has not answered within the hedge delay (the
+    HEDGE_PERCENTILE of its recent latency, clamped to
+    [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY]), the next provider is raced
+    against it. If a provider fails, the next one is tried immediately.
+    The first successful answer wins and the other calls are cancelled.
+    Without an answer within LLM_TIMEOUT_SECONDS, all calls are cancelled
+    and TimeoutError is raised.
+    """
+
+    def __init__(self, providers: Dict[str, Any], tracker: Optional[LatencyTracker] = None):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.tracker = tracker or LatencyTracker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on a provider before hedging to the next one."""
+        observed = self.tracker.percentile(provider, settings.HEDGE_PERCENTILE)
+        delay = settings.HEDGE_DEFAULT_DELAY if observed is None else observed
+        return min(max(delay, settings.HEDGE_MIN_DELAY), settings.HEDGE_MAX_DELAY)
+
+    def invoke(self, messages: List[Any]) -> Any:
+        """Answer messages with the first provider to succeed."""
+        if len(self.providers) == 1:
+            provider, model = next(iter(self.providers.items()))
+            start = time.perf_counter()
+            try:
+                response = model.invoke(messages)
+            except Exception:
+                LLM_CALLS.inc(provider=provider, outcome="error")
+                raise
+            self._record(provider, time.perf_counter() - start)
+            LLM_CALLS.inc(provider=provider, outcome="won")
+            return response
+        future = asyncio.run_coroutine_threadsafe(self.ainvoke(messages), self._event_loop())
+        try:
+            return future.result(timeout=settings.LLM_TIMEOUT_SECONDS)[0]
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"No LLM provider answered within {settings.LLM_TIMEOUT_SECONDS}s") from None
+
+    async def ainvoke(self, messages: List[Any]) -> Tuple[Any, str]:
+        """Race providers in order with hedging and failover; returns (response, provider)."""
+        remaining = list(self.providers)
+        running: Dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> str:
+            provider = remaining.pop(0)
+            running[asyncio.ensure_future(self._call(provider, messages))] = provider
+            return provider
+
+        current = launch()
+        try:
+            while running:
+                delay = self.hedge_delay(current) if settings.HEDGE_ENABLED and remaining else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    LLM_HEDGES.inc()
+                    logger.info(f"LLM hedge: {current} slower than {delay:.2f}s, racing {remaining[0]}")
+                    current = launch()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        LLM_CALLS.inc(provider=provider, outcome="won")
+                        return task.result(), provider
+                    last_error = task.exception()
+                    logger.warning(f"LLM provider {provider} failed: {last_error}")
+                if not running and remaining:
+                    current = launch()
+        finally:
+            for task, provider in running.items():
+                if not task.done():
+                    task.cancel()
+                    LLM_CALLS.inc(provider=provider, outcome="cancelled")
+        raise last_error
+
+    async def _call(self, provider: str, messages: List[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await self.providers[provider].ainvoke(messages)
+        except asyncio.CancelledError:
+            self.tracker.observe(provider, time.perf_counter() - start)
+            raise
+        except Exception:
+            LLM_CALLS.inc(provider=provider, outcome="error")
+            raise
+        self._record(provider, time.perf_counter() - start)
+        return response
+
+    def _record(self, provider: str, seconds: float) -> None:
+        self.tracker.observe(provider, seconds)
+        LLM_PROVIDER_LATENCY.observe(seconds, provider=provider)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Long-lived loop for racing async provider calls, so their clients can reuse connections."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-router", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    """Router over LLM_PROVIDERS, created once per process."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            names = [name.strip() for name in settings.LLM_PROVIDERS.split(",") if name.strip()]
+            _router = LLMRouter({name: create_chat_model(name) for name in names})
+        return _router
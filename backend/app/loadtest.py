@@ -0,0 +1,269 @@
+"""HTTP load generator for /ask, /ingest and job status polling, for sizing workers and pools."""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+
+DEFAULT_QUESTIONS = (
+    "What is the main topic of the document?",
+    "Summarize the key findings.",
+    "What are the limitations mentioned?",
+    "Which sections discuss the methodology?",
+)
+
+RSS_PATTERN = re.compile(r"^process_resident_memory_bytes(?:\{[^}]*\})? (\S+)$", re.MULTILINE)
+
+
+@dataclass
+class LoadConfig:
+    """What to send and how hard."""
+    base_url: str = "http://localhost:8000"
+    duration: float = 30.0
+    concurrency: int = 8
+    rate: Optional[float] = None            # arrivals/s (open loop); None runs `concurrency` closed-loop workers
+    mix: Dict[str, float] = field(default_factory=lambda: {"ask": 0.9, "ingest": 0.1})
+    questions: tuple = DEFAULT_QUESTIONS
+    collection: str = "default"
+    document_words: int = 2000
+    poll_interval: float = 0.5
+    timeout: float = 120.0
+    seed: int = 0
+
+
+@dataclass
+class Sample:
+    """One HTTP request (or ingestion job, end to end) and how it went."""
+    endpoint: str
+    seconds: float
+    status: int  # 0 when no response was received
+
+
+@dataclass
+class LoadReport:
+    """Samples and server memory collected during a run."""
+    config: LoadConfig
+    elapsed: float
+    samples: List[Sample]
+    rss_bytes: List[float]
+    dropped: int = 0
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank q-th percentile (0-100) of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(report: LoadReport) -> dict:
+    """Throughput, latency percentiles and error rate per endpoint, plus server RSS."""
+    endpoints = {}
+    for endpoint in sorted({s.endpoint for s in report.samples}):
+        samples = [s for s in report.samples if s.endpoint == endpoint]
+        seconds = [s.seconds for s in samples]
+        errors = sum(1 for s in samples if not 200 <= s.status < 300)
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "throughput": len(samples) / report.elapsed if report.elapsed else 0.0,
+            "error_rate": errors / len(samples),
+            "statuses": dict(Counter(str(s.status) for s in samples)),
+            "p50": percentile(seconds, 50),
+            "p90": percentile(seconds, 90),
+            "p99": percentile(seconds, 99),
+            "max": max(seconds),
+        }
+    rss = report.rss_bytes
+    return {
+        "elapsed": report.elapsed,
+        "dropped": report.dropped,
+        "endpoints": endpoints,
+        "rss_mb": {
+            "start": rss[0] / 2**20, "peak": max(rss) / 2**20, "end": rss[-1] / 2**20
+        } if rss else None,
+    }
+
+
+def format_report(summary: dict) -> str:
+    lines = [
+        f"{'endpoint':12s} {'reqs':>6s} {'req/s':>7s} {'err%':>6s} "
+        f"{'p50':>7s} {'p90':>7s} {'p99':>7s} {'max':>7s}  statuses"
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        lines.append(
+            f"{endpoint:12s} {stats['requests']:6d} {stats['throughput']:7.2f} "
+            f"{100 * stats['error_rate']:6.1f} {stats['p50']:7.3f} {stats['p90']:7.3f} "
+            f"{stats['p99']:7.3f} {stats['max']:7.3f}  {stats['statuses']}"
+        )
+    if summary["dropped"]:
+        lines.append(f"dropped arrivals (client at --concurrency limit): {summary['dropped']}")
+    rss = summary["rss_mb"]
+    if rss:
+        lines.append(f"server RSS: start={rss['start']:.0f}MB peak={rss['peak']:.0f}MB end={rss['end']:.0f}MB")
+    else:
+        lines.append("server RSS: unavailable (no process_resident_memory_bytes on /metrics)")
+    return "\n".join(lines)
+
+
+async def _request(samples: List[Sample], endpoint: str, send) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await send()
+    except httpx.HTTPError:
+        samples.append(Sample(endpoint, time.perf_counter() - start, 0))
+        return None
+    samples.append(Sample(endpoint, time.perf_counter() - start, response.status_code))
+    return response
+
+
+async def ask(client: httpx.AsyncClient, config: LoadConfig, rng: random.Random, samples: List[Sample]) -> None:
+    question = rng.choice(config.questions)
+    await _request(samples, "ask", lambda: client.post(
+        "/ask",
+        json={"question": question, "collection": config.collection},
+        headers={"X-Client-Id": f"loadtest-{rng.randrange(16)}"}
+    ))
+
+
+async def ingest(client: httpx.AsyncClient, config: LoadConfig, rng: random.Random, samples: List[Sample]) -> None:
+    """Upload a unique document, then poll its job until it finishes."""
+    words = [rng.choice(("alpha", "beta", "gamma", "delta", "policy", "report")) for _ in range(config.document_words)]
+    body = f"Load test document {uuid.uuid4()}\n\n" + " ".join(words)
+    start = time.perf_counter()
+    response = await _request(samples, "ingest", lambda: client.post(
+        "/ingest",
+        files={"file": ("loadtest.txt", body.encode(), "text/plain")},
+        data={"collection": config.collection}
+    ))
+    if response is None or response.status_code != 200:
+        return
+
+    job_id = response.json()["job_id"]
+    status = "pending"
+    while status in ("pending", "processing"):
+        await asyncio.sleep(config.poll_interval)
+        polled = await _request(samples, "status", lambda: client.get(f"/ingest/{job_id}/status"))
+        if polled is None or polled.status_code != 200:
+            return
+        status = polled.json()["status"]
+    samples.append(Sample("ingest_job", time.perf_counter() - start, 200 if status == "completed" else 500))
+
+
+async def sample_rss(client: httpx.AsyncClient, rss: List[float], interval: float = 1.0) -> None:
+    """Record the server's resident memory from /metrics until cancelled."""
+    while True:
+        try:
+            match = RSS_PATTERN.search((await client.get("/metrics")).text)
+            if match:
+                rss.append(float(match.group(1)))
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run_load(config: LoadConfig, transport: Optional[httpx.AsyncBaseTransport] = None) -> LoadReport:
+    """Drive the server for config.duration seconds and collect samples."""
+    rng = random.Random(config.seed)
+    scenarios = {"ask": ask, "ingest": ingest}
+    names = [name for name in config.mix if config.mix[name] > 0]
+    weights = [config.mix[name] for name in names]
+    samples: List[Sample] = []
+    rss: List[float] = []
+    dropped = 0
+
+    limits = httpx.Limits(max_connections=config.concurrency + 1)
+    async with httpx.AsyncClient(
+        base_url=config.base_url, timeout=config.timeout, limits=limits, transport=transport
+    ) as client:
+        sampler = asyncio.create_task(sample_rss(client, rss))
+        start = time.perf_counter()
+        deadline = start + config.duration
+
+        def one_request():
+            scenario = scenarios[rng.choices(names, weights)[0]]
+            return scenario(client, config, rng, samples)
+
+        if config.rate is None:
+            async def worker():
+                while time.perf_counter() < deadline:
+                    await one_request()
+
+            await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+        else:
+            # Open loop: Poisson arrivals independent of response times
+            in_flight = set()
+            while True:
+                await asyncio.sleep(rng.expovariate(config.rate))
+                if time.perf_counter() >= deadline:
+                    break
+                if len(in_flight) >= config.concurrency:
+                    dropped += 1
+                    continue
+                task = asyncio.create_task(one_request())
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        try:
+            match = RSS_PATTERN.search((await client.get("/metrics")).text)
+            if match:
+                rss.append(float(match.group(1)))
+        except httpx.HTTPError:
+            pass
+
+    return LoadReport(config=config, elapsed=elapsed, samples=samples, rss_bytes=rss, dropped=dropped)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'ask=0.9,ingest=0.1' into scenario weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("ask", "ingest"):
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the API (pair with app.stub_llm to avoid provider quota)")
+    parser.add_argument("--url", default=LoadConfig.base_url)
+    parser.add_argument("--duration", type=float, default=LoadConfig.duration)
+    parser.add_argument("--concurrency", type=int, default=LoadConfig.concurrency,
+                        help="Closed-loop workers, or the in-flight cap with --rate")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/s")
+    parser.add_argument("--mix", type=parse_mix, default="ask=0.9,ingest=0.1")
+    parser.add_argument("--collection", default=LoadConfig.collection)
+    parser.add_argument("--document-words", type=int, default=LoadConfig.document_words)
+    parser.add_argument("--poll-interval", type=float, default=LoadConfig.poll_interval)
+    parser.add_argument("--seed", type=int, default=LoadConfig.seed)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    load = LoadConfig(
+        base_url=args.url,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        mix=args.mix if isinstance(args.mix, dict) else parse_mix(args.mix),
+        collection=args.collection,
+        document_words=args.document_words,
+        poll_interval=args.poll_interval,
+        seed=args.seed
+    )
+    summary = summarize(asyncio.run(run_load(load)))
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
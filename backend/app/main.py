@@ -1,30 +1,90 @@
 """FastAPI application for RAG-based document Q&A."""
 
+import asyncio
 import os
-import shutil
+from collections import Counter
+from dataclasses import asdict
+from typing import List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 
 from app.schemas import (
     QueryRequest,
     QueryResponse,
     IngestResponse,
+    BulkIngestResponse,
+    JobListResponse,
     JobStatusResponse,
+    CollectionInfo,
+    DocumentInfo,
+    DeleteDocumentResponse,
+    ReadinessResponse,
+    RebuildRequest,
+    SearchHit,
+    SearchRequest,
+    SearchResponse,
+    SourceInfo,
 )
 from app.models import (
+    TERMINAL_STATUSES,
+    Job,
     JobStatus,
     create_job,
+    get_children,
     get_job,
+    job_event,
+    list_jobs,
     update_job,
 )
-from app.rag import answer_question
-from app.ingest import ingest_documents, ingest_single_document
+from app.rag import answer_question, duplicate_source_info, format_source_info, index_registry, search_chunks
+from app.ingest import (
+    add_chunks_to_index,
+    compact_collection,
+    delete_document,
+    ingest_documents,
+    ingest_single_document,
+    prepare_chunks,
+    rebuild_collection,
+    replace_document,
+)
+from app.config import settings
 from app.logger import logger
 from app.constants import UPLOAD_DIR
+from app.metrics import JOB_QUEUE_DEPTH, JOBS_RESUMED, CONTENT_TYPE, PROCESS_RSS, registry, resident_memory_bytes
+from app.coalescing import SingleFlight, normalize_question
+from app.admission import AdmissionRejected
+from app import manifest, profiling, progress, sessions, sharding, wal, warmup
+from app.index_store import (
+    DEFAULT_COLLECTION,
+    CollectionNotFound,
+    InvalidCollectionName,
+    collection_path,
+    index_generation,
+    index_model,
+    list_collections,
+    validate_collection,
+)
+from app.uploads import (
+    InvalidArchive,
+    StoredUpload,
+    UploadTooLarge,
+    extract_archive,
+    is_archive,
+    is_supported,
+    save_upload,
+)
+
+
+async def evict_idle_collections():
+    """Periodically drop collections that have not been queried recently."""
+    while True:
+        await asyncio.sleep(60)
+        index_registry.evict_idle()
 
 
 @asynccontextmanager
@@ -32,10 +92,33 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Application startup")
     os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # Repair files a crash left behind before any index is loaded
+    damaged = await asyncio.to_thread(wal.recover_collections)
+    resume_task = asyncio.create_task(asyncio.to_thread(resume_interrupted_jobs, damaged))
+    eviction_task = asyncio.create_task(evict_idle_collections())
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        # Serve requests (loading lazily) while the model and index warm up
+        warmup_task = asyncio.create_task(asyncio.to_thread(warmup.warm_up))
+    else:
+        warmup.mark_ready()
     yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    eviction_task.cancel()
+    resume_task.cancel()
+    sharding.shutdown_workers()
     logger.info("Application shutdown")
 
 
+def require_collection(name: str) -> str:
+    """Validate a collection name, mapping errors to 400."""
+    try:
+        return validate_collection(name)
+    except InvalidCollectionName as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 app = FastAPI(
     title="Insight AI - Document Intelligence",
     description="RAG-powered document Q&A system",
@@ -52,13 +135,31 @@ app.add_middleware(
 )
 
 
-def process_ingestion_job(job_id: str, file_path: str):
-    """Background task to process document ingestion."""
+def process_ingestion_job(
+    job_id: str,
+    file_path: str,
+    profile: bool = False,
+    source_name: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    collection: str = DEFAULT_COLLECTION,
+    replace: bool = False
+):
+    """
+    Background task to process document ingestion (or replacement).
+
+    `profile` means the request already reserved the profiler for this job.
+    """
     try:
         update_job(job_id, status=JobStatus.PROCESSING)
         logger.info(f"Processing job {job_id}: {file_path}")
 
-        chunks_added = ingest_single_document(file_path)
+        label = source_name or os.path.basename(file_path)
+        with profiling.maybe_profile("ingest", label, profile, profile_id=job_id, reserved=True), progress.tracking(job_id), \
+                wal.journal(job_id):
+            if replace:
+                chunks_added = replace_document(file_path, source_name, content_hash, collection)
+            else:
+                chunks_added = ingest_single_document(file_path, source_name, content_hash, collection)
 
         update_job(
             job_id,
@@ -75,37 +176,323 @@ def process_ingestion_job(job_id: str, file_path: str):
             error=str(e)
         )
 
+    finally:
+        wal.finish(job_id)
+        JOB_QUEUE_DEPTH.dec()
+
+
+def process_bulk_job(
+    parent_id: str,
+    children: List[Tuple[str, StoredUpload]],
+    collection: str = DEFAULT_COLLECTION
+):
+    """Background task: parse every child document, then write all chunks at once."""
+    try:
+        update_job(parent_id, status=JobStatus.PROCESSING)
+        all_chunks = []
+        parsed = []
+        failed = 0
+
+        for child_id, stored in children:
+            update_job(child_id, status=JobStatus.PROCESSING)
+            try:
+                with progress.tracking(child_id), wal.journal(parent_id):
+                    chunks = prepare_chunks(
+                        stored.path, stored.filename, stored.content_hash, collection
+                    )
+            except Exception as e:
+                logger.exception(f"Job {child_id} failed to parse {stored.filename}")
+                update_job(child_id, status=JobStatus.FAILED, error=str(e))
+                failed += 1
+                continue
+
+            if chunks:
+                all_chunks.extend(chunks)
+                parsed.append((child_id, stored.content_hash))
+            else:
+                update_job(child_id, status=JobStatus.COMPLETED, chunks_added=0)
+
+        # Single embedding pass and index write for the whole batch
+        with progress.tracking(parent_id), wal.journal(parent_id):
+            written = set(add_chunks_to_index(all_chunks, collection)) if all_chunks else set()
+        per_document = Counter(
+            chunk.metadata.get("content_hash") for chunk in all_chunks if chunk.id in written
+        )
+        for child_id, content_hash in parsed:
+            update_job(
+                child_id,
+                status=JobStatus.COMPLETED,
+                chunks_added=per_document.get(content_hash, 0)
+            )
+
+        if children and failed == len(children):
+            update_job(parent_id, status=JobStatus.FAILED, error="All files failed to ingest")
+        else:
+            update_job(
+                parent_id,
+                status=JobStatus.COMPLETED,
+                chunks_added=len(written),
+                error=f"{failed} of {len(children)} files failed" if failed else None
+            )
+        logger.info(f"Bulk job {parent_id} completed: {len(written)} chunks added")
+
+    except Exception as e:
+        logger.exception(f"Bulk job {parent_id} failed")
+        for child in get_children(parent_id):
+            if child.status in (JobStatus.PENDING, JobStatus.PROCESSING):
+                update_job(child.job_id, status=JobStatus.FAILED, error=str(e))
+        update_job(parent_id, status=JobStatus.FAILED, error=str(e))
+
+    finally:
+        wal.finish(parent_id)
+        JOB_QUEUE_DEPTH.dec()
+
+
+def process_rebuild_job(job_id: str, collection: str, model: Optional[str] = None):
+    """Background task to rebuild a collection's index from cached text, optionally with a new model."""
+    try:
+        update_job(job_id, status=JobStatus.PROCESSING)
+        with progress.tracking(job_id), wal.journal(job_id):
+            chunks = rebuild_collection(collection, model)
+        update_job(job_id, status=JobStatus.COMPLETED, chunks_added=chunks)
+    except Exception as e:
+        logger.exception(f"Rebuild job {job_id} failed")
+        update_job(job_id, status=JobStatus.FAILED, error=str(e))
+    finally:
+        wal.finish(job_id)
+        JOB_QUEUE_DEPTH.dec()
+
+
+def start_rebuild(collection: str, model: Optional[str] = None) -> Job:
+    """Create and journal a rebuild job; the caller runs process_rebuild_job."""
+    job = create_job(f"rebuild {collection}" + (f" with {model}" if model else ""), collection=collection)
+    wal.begin(job.job_id, "rebuild", filename=job.filename, collection=collection, model=model)
+    JOB_QUEUE_DEPTH.inc()
+    return job
+
+
+def resume_interrupted_jobs(damaged: List[str]) -> None:
+    """
+    Restore the jobs a previous process accepted but did not finish, and run them again.
+
+    Each resumes from its journal: parsed pages and embedded batches are
+    reused, and an index write that completed is not repeated. Collections
+    whose index failed the startup integrity check are rebuilt from the
+    extracted-text cache.
+    """
+    for journal in wal.interrupted_jobs():
+        params = journal.params
+        kind, collection = params["kind"], params["collection"]
+        job = create_job(params["filename"], collection=collection, job_id=journal.job_id)
+        JOBS_RESUMED.inc(kind=kind)
+        logger.info(f"Resuming {kind} job {job.job_id}")
+        committed = journal.committed()
+
+        if kind == "rebuild":
+            JOB_QUEUE_DEPTH.inc()
+            process_rebuild_job(job.job_id, collection, params.get("model"))
+            continue
+
+        if kind == "bulk":
+            children = []
+            for child in params["children"]:
+                create_job(child["filename"], parent_id=job.job_id, collection=collection, job_id=child["job_id"])
+                if child.get("upload") is None:
+                    update_job(child["job_id"], status=JobStatus.COMPLETED, chunks_added=0)
+                elif committed is not None:
+                    chunks = len(committed.get(child["upload"]["content_hash"], []))
+                    update_job(child["job_id"], status=JobStatus.COMPLETED, chunks_added=chunks)
+                else:
+                    children.append((child["job_id"], StoredUpload(**child["upload"])))
+            if committed is not None:
+                chunks = sum(len(ids) for ids in committed.values())
+                update_job(job.job_id, status=JobStatus.COMPLETED, chunks_added=chunks)
+                journal.finish()
+                continue
+            JOB_QUEUE_DEPTH.inc()
+            process_bulk_job(job.job_id, children, collection)
+            continue
+
+        if committed is not None:
+            # The index write finished: report its chunks rather than rerun it
+            chunks = sum(len(ids) for ids in committed.values())
+            try:
+                if params["replace"]:
+                    # Only retiring the previous versions may remain
+                    keep_hash = params["content_hash"] or next(iter(committed), None)
+                    delete_document(params["source_name"], collection, keep_hash=keep_hash)
+                    compact_collection(collection)
+                update_job(job.job_id, status=JobStatus.COMPLETED, chunks_added=chunks)
+            except Exception as e:
+                logger.exception(f"Resumed job {job.job_id} failed")
+                update_job(job.job_id, status=JobStatus.FAILED, error=str(e))
+            journal.finish()
+            continue
+        JOB_QUEUE_DEPTH.inc()
+        process_ingestion_job(
+            job.job_id,
+            params["file_path"],
+            source_name=params["source_name"],
+            content_hash=params["content_hash"],
+            collection=collection,
+            replace=params["replace"]
+        )
+        if params["replace"]:
+            compact_collection(collection)
+
+    for collection in damaged:
+        logger.warning(f"Rebuilding '{collection}' after its index failed the integrity check")
+        job = start_rebuild(collection)
+        process_rebuild_job(job.job_id, collection)
+
+
+# In-flight /ask computations keyed by collection, index generation and question
+ask_flight = SingleFlight("ask", timeout=settings.LLM_TIMEOUT_SECONDS)
+
 
 @app.post("/ask", response_model=QueryResponse)
-def ask_question(req: QueryRequest):
-    """Ask a question about uploaded documents."""
+def ask_question(
+    req: QueryRequest,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    x_profile: Optional[str] = Header(None),
+    x_profile_token: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None)
+):
+    """
+    Ask a question about uploaded documents.
+
+    Send `X-Profile: 1` (with `X-Profile-Token` when configured) to profile
+    this request; the profile id is returned in the `X-Profile-Id` header.
+    Requests that shared an identical in-flight question's answer are
+    marked with `X-Coalesced: 1`.
+
+    LLM calls are admission controlled, queued fairly per `X-Client-Id`
+    (or client address); when no capacity is available in time the
+    request fails fast with 429/503 and a `Retry-After` header.
+
+    With a `session_id` the question continues that conversation: it is
+    rewritten into a standalone question for retrieval and answered with
+    the (compacted) history in the prompt.
+    """
+    require_collection(req.collection)
+    client = x_client_id or (request.client.host if request.client else None)
     try:
-        result = answer_question(req.question)
+        profile = profiling.should_profile("ask", x_profile, x_profile_token)
+        if req.session_id:
+            session = sessions.store.get_or_create(req.session_id)
+            ask = lambda: sessions.ask(session, req.question, req.collection, client=client)
+            # Fold older turns into the summary after the response is sent
+            background_tasks.add_task(sessions.compact, session, client)
+        else:
+            ask = lambda: answer_question(req.question, req.collection, client=client)
+
+        # Answers within a session depend on its history, so they are never shared
+        if settings.COALESCE_REQUESTS and not profile and not req.session_id:
+            # Identical questions on the same index generation share one answer
+            key = (req.collection, index_generation(req.collection), normalize_question(req.question))
+            result, shared = ask_flight.do(key, ask)
+            if shared:
+                response.headers["X-Coalesced"] = "1"
+        else:
+            with profiling.maybe_profile("ask", req.question[:80], profile) as handle:
+                result = ask()
+            if handle is not None:
+                response.headers["X-Profile-Id"] = handle.profile_id
+
         return QueryResponse(
             answer=result["answer"],
             confidence=result["confidence"],
-            sources=result["sources"]
+            sources=result["sources"],
+            session_id=req.session_id
         )
 
+    except CollectionNotFound:
+        raise HTTPException(status_code=404, detail=f"Collection '{req.collection}' not found")
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.exception("Error while answering question")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.delete("/sessions/{session_id}", status_code=204)
+def end_session(session_id: str):
+    """Forget a conversation and its history."""
+    if not sessions.store.drop(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return Response(status_code=204)
+
+
+@app.post("/search", response_model=SearchResponse)
+def search(req: SearchRequest):
+    """
+    Ranked chunks for a query, straight from the resident index.
+
+    No LLM call is made. Lower scores are closer matches; use `offset`
+    and `next_offset` to page through results.
+    """
+    require_collection(req.collection)
+    try:
+        results, has_more = search_chunks(
+            req.query,
+            collection=req.collection,
+            k=req.k,
+            offset=req.offset,
+            sources=req.sources,
+            section=req.section,
+            page=req.page,
+            max_score=req.max_score
+        )
+    except CollectionNotFound:
+        raise HTTPException(status_code=404, detail=f"Collection '{req.collection}' not found")
+    except Exception as e:
+        logger.exception("Error while searching")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    hits = []
+    for doc, score in results:
+        start_index = doc.metadata.get("start_index")
+        hits.append(SearchHit(
+            chunk_id=doc.id,
+            content=doc.page_content,
+            score=float(score),
+            total_chunks=doc.metadata.get("total_chunks"),
+            start_index=start_index,
+            end_index=start_index + len(doc.page_content) if start_index is not None else None,
+            duplicates=[SourceInfo(**info) for info in duplicate_source_info(doc)],
+            **format_source_info(doc)
+        ))
+    return SearchResponse(
+        query=req.query,
+        collection=req.collection,
+        offset=req.offset,
+        k=req.k,
+        hits=hits,
+        next_offset=req.offset + req.k if has_more else None
+    )
+
+
 @app.post("/upload")
-def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...)):
     """Upload a file for later ingestion."""
     try:
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await save_upload(file, UPLOAD_DIR)
 
         return {
             "message": "File uploaded successfully",
-            "filename": file.filename
+            "filename": stored.filename,
+            "content_hash": stored.content_hash,
+            "size": stored.size
         }
 
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.exception("Error while uploading file")
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,35 +501,74 @@ def upload_file(file: UploadFile = File(...)):
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_file(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    collection: str = Form(DEFAULT_COLLECTION),
+    x_profile: Optional[str] = Header(None),
+    x_profile_token: Optional[str] = Header(None)
 ):
     """
     Upload and ingest a document asynchronously.
 
     Returns a job_id that can be used to track ingestion status.
     """
+    require_collection(collection)
     try:
         # Validate file type
-        if not (file.filename.endswith('.pdf') or file.filename.endswith('.txt')):
+        if not is_supported(file.filename):
             raise HTTPException(
                 status_code=400,
                 detail="Only PDF and TXT files are supported"
             )
 
-        # Save uploaded file
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream uploaded file to disk under its content hash
+        stored = await save_upload(file, UPLOAD_DIR)
+
+        # Identical content was ingested before: nothing to do
+        if await run_in_threadpool(manifest.is_known, stored.content_hash, collection_path(collection)):
+            job = create_job(stored.filename, collection=collection)
+            update_job(job.job_id, status=JobStatus.COMPLETED, chunks_added=0)
+            return IngestResponse(
+                job_id=job.job_id,
+                message=f"{stored.filename} was already ingested; skipped",
+                content_hash=stored.content_hash,
+                duplicate=True
+            )
 
         # Create job and start background processing
-        job = create_job(file.filename)
-        background_tasks.add_task(process_ingestion_job, job.job_id, file_path)
+        job = create_job(stored.filename, collection=collection)
+        await run_in_threadpool(
+            wal.begin,
+            job.job_id,
+            "ingest",
+            filename=stored.filename,
+            file_path=stored.path,
+            source_name=stored.filename,
+            content_hash=stored.content_hash,
+            collection=collection,
+            replace=False
+        )
+        JOB_QUEUE_DEPTH.inc()
+        profile = profiling.should_profile("ingest", x_profile, x_profile_token) \
+            and profiling.reserve("ingest", stored.filename)
+        background_tasks.add_task(
+            process_ingestion_job,
+            job.job_id,
+            stored.path,
+            profile,
+            source_name=stored.filename,
+            content_hash=stored.content_hash,
+            collection=collection
+        )
 
         return IngestResponse(
             job_id=job.job_id,
-            message=f"Ingestion started for {file.filename}"
+            message=f"Ingestion started for {stored.filename}",
+            profile_id=job.job_id if profile else None,
+            content_hash=stored.content_hash
         )
 
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -150,6 +576,101 @@ async def ingest_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/ingest/bulk", response_model=BulkIngestResponse)
+async def ingest_bulk(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    collection: str = Form(DEFAULT_COLLECTION)
+):
+    """
+    Upload and ingest many documents, or zip/tar archives of them, at once.
+
+    Returns a parent job_id whose status lists one child job per document.
+    All new chunks are embedded and written to the index in a single batch.
+    """
+    require_collection(collection)
+    try:
+        stored_files: List[StoredUpload] = []
+        skipped: List[str] = []
+
+        for file in files:
+            if is_archive(file.filename):
+                archive = await save_upload(file, UPLOAD_DIR)
+                try:
+                    members, archive_skipped = await run_in_threadpool(
+                        extract_archive, archive.path, UPLOAD_DIR
+                    )
+                except InvalidArchive as e:
+                    raise HTTPException(status_code=400, detail=f"{file.filename} is not a readable archive: {e}")
+                finally:
+                    os.remove(archive.path)
+                stored_files.extend(members)
+                skipped.extend(archive_skipped)
+            elif is_supported(file.filename):
+                stored_files.append(await save_upload(file, UPLOAD_DIR))
+            else:
+                skipped.append(file.filename)
+
+        if not stored_files:
+            raise HTTPException(
+                status_code=400,
+                detail="No PDF or TXT files found in the upload"
+            )
+
+        parent = create_job(f"bulk upload ({len(stored_files)} files)", collection=collection)
+        children = []
+        journaled = []
+        seen = set()
+        for stored in stored_files:
+            child = create_job(stored.filename, parent_id=parent.job_id, collection=collection)
+            known = await run_in_threadpool(manifest.is_known, stored.content_hash, collection_path(collection))
+            if stored.content_hash in seen or known:
+                update_job(child.job_id, status=JobStatus.COMPLETED, chunks_added=0)
+                journaled.append({"job_id": child.job_id, "filename": stored.filename, "upload": None})
+                continue
+            seen.add(stored.content_hash)
+            children.append((child.job_id, stored))
+            journaled.append({"job_id": child.job_id, "filename": stored.filename, "upload": asdict(stored)})
+
+        await run_in_threadpool(
+            wal.begin, parent.job_id, "bulk", filename=parent.filename, collection=collection, children=journaled
+        )
+        JOB_QUEUE_DEPTH.inc()
+        background_tasks.add_task(process_bulk_job, parent.job_id, children, collection)
+
+        return BulkIngestResponse(
+            job_id=parent.job_id,
+            message=f"Bulk ingestion started for {len(stored_files)} files",
+            child_job_ids=parent.child_ids,
+            skipped=skipped
+        )
+
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error while starting bulk ingestion")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def job_to_response(job: Job, include_children: bool = True) -> JobStatusResponse:
+    """Build the status response for a job, optionally including its children."""
+    return JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status.value,
+        filename=job.filename,
+        collection=job.collection,
+        error=job.error,
+        chunks_added=job.chunks_added,
+        pages_parsed=job.pages_parsed,
+        chunks_embedded=job.chunks_embedded,
+        chunks_committed=job.chunks_committed,
+        parent_id=job.parent_id,
+        children=[job_to_response(child) for child in get_children(job.job_id)] if include_children else []
+    )
+
+
 @app.get("/ingest/{job_id}/status", response_model=JobStatusResponse)
 def get_job_status(job_id: str):
     """Get the status of an ingestion job."""
@@ -158,25 +679,302 @@ def get_job_status(job_id: str):
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return JobStatusResponse(
-        job_id=job.job_id,
-        status=job.status.value,
-        filename=job.filename,
-        error=job.error,
-        chunks_added=job.chunks_added
+    return job_to_response(job)
+
+
+async def progress_stream(subscription: progress.Subscription, snapshot: List[Job], job_id: Optional[str] = None):
+    """
+    Server-Sent Events for a subscription, starting with the current state.
+
+    A job stream ends once the job reaches a terminal status; a collection
+    stream runs until the client disconnects.
+    """
+    terminal = {status.value for status in TERMINAL_STATUSES}
+    try:
+        for job in snapshot:
+            yield progress.format_sse(job_event(job, "status"))
+        if job_id is not None:
+            job = get_job(job_id)
+            if job is None or job.status in TERMINAL_STATUSES:
+                return
+        while True:
+            event = await subscription.get(timeout=settings.PROGRESS_KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield progress.format_sse(event)
+            if event["job_id"] == job_id and event["status"] in terminal:
+                return
+    finally:
+        subscription.close()
+
+
+def event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/jobs", response_model=JobListResponse)
+def get_jobs(
+    status: Optional[JobStatus] = None,
+    filename: Optional[str] = None,
+    collection: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """List ingestion jobs newest first; pass next_cursor back as cursor for the next page."""
+    if collection is not None:
+        require_collection(collection)
+    try:
+        position = int(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    jobs, next_cursor = list_jobs(limit, position, status=status, filename=filename, collection=collection)
+    return JobListResponse(
+        jobs=[job_to_response(job, include_children=False) for job in jobs],
+        next_cursor=str(next_cursor) if next_cursor is not None else None
     )
 
 
+@app.get("/ingest/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream a job's status transitions and progress counters (and its children's) as SSE."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    subscription = progress.bus.subscribe(job_id=job_id)
+    return event_stream_response(progress_stream(subscription, [job] + get_children(job_id), job_id))
+
+
+@app.get("/collections/{name}/events")
+async def stream_collection_events(name: str):
+    """Stream progress of every ingestion job in a collection as SSE."""
+    collection = require_collection(name)
+    subscription = progress.bus.subscribe(collection=collection)
+    active = []
+    for status in (JobStatus.PENDING, JobStatus.PROCESSING):
+        jobs, _ = list_jobs(status=status, collection=collection)
+        active.extend(reversed(jobs))
+    return event_stream_response(progress_stream(subscription, active))
+
+
 @app.post("/ingest-all")
-def ingest_all_data():
+def ingest_all_data(collection: str = DEFAULT_COLLECTION):
     """Ingest all documents from the uploads directory (synchronous)."""
-    chunks_added = ingest_documents()
+    require_collection(collection)
+    chunks_added = ingest_documents(collection)
     return {
         "message": "Ingestion completed",
         "chunks_added": chunks_added
     }
 
 
+@app.get("/documents", response_model=List[DocumentInfo])
+def list_documents(collection: str = DEFAULT_COLLECTION):
+    """List the documents ingested into a collection."""
+    require_collection(collection)
+    documents = manifest.load_manifest(collection_path(collection))["documents"]
+    return [
+        DocumentInfo(
+            source=entry["source"],
+            content_hash=content_hash,
+            chunks=len(entry["chunk_ids"]),
+            ingested_at=entry.get("ingested_at")
+        )
+        for content_hash, entry in documents.items()
+    ]
+
+
+@app.delete("/documents/{source}", response_model=DeleteDocumentResponse)
+def delete_source(
+    source: str,
+    background_tasks: BackgroundTasks,
+    collection: str = DEFAULT_COLLECTION
+):
+    """
+    Delete a document from a collection.
+
+    Its chunks are tombstoned immediately and hidden from search; the
+    vectors are removed from the index by a background compaction.
+    """
+    require_collection(collection)
+    documents_removed, chunks_removed = delete_document(source, collection)
+    if documents_removed == 0:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    background_tasks.add_task(compact_collection, collection)
+    return DeleteDocumentResponse(
+        source=source,
+        collection=collection,
+        documents_removed=documents_removed,
+        chunks_removed=chunks_removed
+    )
+
+
+@app.put("/documents/{source}", response_model=IngestResponse)
+async def replace_source(
+    source: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    collection: str = Form(DEFAULT_COLLECTION)
+):
+    """
+    Replace a document in place with a new version.
+
+    The new version is ingested under the same source name, then the old
+    chunks are tombstoned and compacted away.
+    """
+    require_collection(collection)
+    if not is_supported(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF and TXT files are supported"
+        )
+    try:
+        stored = await save_upload(file, UPLOAD_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    job = create_job(source, collection=collection)
+    await run_in_threadpool(
+        wal.begin,
+        job.job_id,
+        "ingest",
+        filename=source,
+        file_path=stored.path,
+        source_name=source,
+        content_hash=stored.content_hash,
+        collection=collection,
+        replace=True
+    )
+    JOB_QUEUE_DEPTH.inc()
+    background_tasks.add_task(
+        process_ingestion_job,
+        job.job_id,
+        stored.path,
+        source_name=source,
+        content_hash=stored.content_hash,
+        collection=collection,
+        replace=True
+    )
+    background_tasks.add_task(compact_collection, collection)
+
+    return IngestResponse(
+        job_id=job.job_id,
+        message=f"Replacement started for {source}",
+        content_hash=stored.content_hash
+    )
+
+
+@app.get("/collections", response_model=List[CollectionInfo])
+def get_collections():
+    """List collections with a saved index and whether each is resident."""
+    resident = set(index_registry.resident())
+    return [
+        CollectionInfo(
+            name=name,
+            resident=name in resident,
+            documents=len(manifest.load_manifest(collection_path(name))["documents"]),
+            embedding_model=index_model(collection_path(name))
+        )
+        for name in list_collections()
+    ]
+
+
+@app.post("/collections/{name}/rebuild", response_model=IngestResponse)
+def rebuild(name: str, background_tasks: BackgroundTasks, request: Optional[RebuildRequest] = None):
+    """
+    Re-chunk and re-embed a collection from cached text with the current settings (async).
+
+    With a model in the body the collection migrates to it; the old index
+    keeps serving until the new one is swapped in.
+    """
+    collection = require_collection(name)
+    if collection not in list_collections():
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    model = request.model if request else None
+    job = start_rebuild(collection, model)
+    background_tasks.add_task(process_rebuild_job, job.job_id, collection, model)
+    return IngestResponse(job_id=job.job_id, message=f"Rebuild started for '{collection}'")
+
+
+@app.get("/ready", response_model=ReadinessResponse)
+def readiness():
+    """Report whether startup warm-up has finished (503 until it has)."""
+    state = warmup.state
+    body = ReadinessResponse(
+        ready=state.ready,
+        status=state.status,
+        steps=state.steps,
+        error=state.error
+    )
+    if not state.ready:
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
+
+
+@app.get("/metrics")
+def metrics():
+    """Expose pipeline metrics in the Prometheus text format."""
+    PROCESS_RSS.set(resident_memory_bytes())
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+def require_profiling(token: Optional[str]):
+    """Reject profiling admin calls when disabled or unauthorized."""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.is_authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@app.post("/admin/profiling/arm")
+def arm_profiling(
+    kind: str = "ask",
+    count: int = Query(1, ge=1, le=100),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """Profile the next `count` ask or ingest requests without client changes."""
+    require_profiling(x_profile_token)
+    if kind not in ("ask", "ingest"):
+        raise HTTPException(status_code=400, detail="kind must be 'ask' or 'ingest'")
+    armed = profiling.arm(kind, count)
+    return {"kind": kind, "armed": armed}
+
+
+@app.get("/admin/profiles")
+def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """List stored profile summaries."""
+    require_profiling(x_profile_token)
+    return profiling.list_profiles()
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Get the timing and allocation summary of a profile."""
+    require_profiling(x_profile_token)
+    summary = profiling.get_profile(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@app.get("/admin/profiles/{profile_id}/flamegraph")
+def get_profile_flamegraph(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Download the folded stacks of a profile (flamegraph.pl / speedscope input)."""
+    require_profiling(x_profile_token)
+    path = profiling.get_flamegraph_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+
 # Mount static files for UI
 ui_path = os.path.join(os.path.dirname(__file__), "..", "..", "ui")
 if os.path.exists(ui_path):
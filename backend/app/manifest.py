@@ -0,0 +1,230 @@
+"""Manifest of documents already ingested into a vector store, keyed by content hash."""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+
+MANIFEST_FILE = "manifest.json"
+
+_manifest_lock = threading.Lock()
+
+# Views of the manifest (tombstones, duplicate references) cached per
+# manifest path and file version (mtime, size)
+_view_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+
+
+def _manifest_path(index_path: Optional[str] = None) -> str:
+    return os.path.join(index_path or settings.VECTOR_DB_PATH, MANIFEST_FILE)
+
+
+def load_manifest(index_path: Optional[str] = None) -> Dict:
+    """Load the manifest of the vector store, or an empty one."""
+    path = _manifest_path(index_path)
+    if not os.path.exists(path):
+        return {"documents": {}, "tombstones": []}
+    with open(path) as f:
+        data = json.load(f)
+    data.setdefault("tombstones", [])
+    return data
+
+
+def save_manifest(manifest: Dict, index_path: Optional[str] = None) -> None:
+    """Atomically write the manifest next to the vector store files."""
+    path = _manifest_path(index_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_known(content_hash: str, index_path: Optional[str] = None) -> bool:
+    """Whether a document with this content hash was already ingested."""
+    return content_hash in load_manifest(index_path)["documents"]
+
+
+def record_document(
+    content_hash: str,
+    source: str,
+    chunk_ids: List[str],
+    index_path: Optional[str] = None,
+    duplicates: Optional[List[Dict]] = None
+) -> None:
+    """
+    Record an ingested document and the ids of its chunks.
+
+    Chunks that were near-duplicates of already stored ones are recorded
+    as duplicates: the stored chunk's id plus this document's location
+    (page, section, chunk_index) of the copy and its position among the
+    document's chunks.
+    """
+    with _manifest_lock:
+        manifest = load_manifest(index_path)
+        entry = {
+            "source": source,
+            "chunk_ids": chunk_ids,
+            "ingested_at": datetime.utcnow().isoformat(),
+        }
+        if duplicates:
+            entry["duplicates"] = duplicates
+        manifest["documents"][content_hash] = entry
+        save_manifest(manifest, index_path)
+
+
+def document_sequence(entry: Dict) -> List[str]:
+    """
+    A document's chunk ids in reading order.
+
+    Stored chunks fill the positions not taken by duplicates, which cite
+    the stored chunk they were collapsed into.
+    """
+    duplicates = {duplicate["position"]: duplicate["chunk_id"] for duplicate in entry.get("duplicates", ())}
+    if not duplicates:
+        return list(entry["chunk_ids"])
+    own = iter(entry["chunk_ids"])
+    return [
+        duplicates[position] if position in duplicates else next(own)
+        for position in range(len(entry["chunk_ids"]) + len(duplicates))
+    ]
+
+
+def referenced_chunk_ids(entries: Iterable[Dict]) -> set:
+    """Ids of the stored chunks that documents own or cite as duplicates."""
+    chunk_ids = set()
+    for entry in entries:
+        chunk_ids.update(entry["chunk_ids"])
+        chunk_ids.update(duplicate["chunk_id"] for duplicate in entry.get("duplicates", ()))
+    return chunk_ids
+
+
+def find_documents(source: str, index_path: Optional[str] = None) -> Dict[str, Dict]:
+    """Documents (by content hash) ingested under a source name."""
+    documents = load_manifest(index_path)["documents"]
+    return {
+        content_hash: entry for content_hash, entry in documents.items()
+        if entry.get("source") == source
+    }
+
+
+def tombstone_source(
+    source: str,
+    index_path: Optional[str] = None,
+    keep_hash: Optional[str] = None
+) -> Tuple[int, List[str]]:
+    """
+    Forget every document ingested under a source name.
+
+    Their chunk ids are tombstoned so searches skip them until compaction
+    removes the vectors, except chunks that remaining documents still cite
+    as duplicates. The document with keep_hash, if any, is kept.
+
+    Returns:
+        Number of documents removed and the tombstoned chunk ids
+    """
+    with _manifest_lock:
+        manifest = load_manifest(index_path)
+        removed = [
+            content_hash for content_hash, entry in manifest["documents"].items()
+            if entry.get("source") == source and content_hash != keep_hash
+        ]
+        entries = [manifest["documents"].pop(content_hash) for content_hash in removed]
+        live = referenced_chunk_ids(manifest["documents"].values())
+        chunk_ids = sorted(referenced_chunk_ids(entries) - live)
+        if removed:
+            manifest["tombstones"] = sorted(set(manifest["tombstones"]) | set(chunk_ids))
+            save_manifest(manifest, index_path)
+        return len(removed), chunk_ids
+
+
+def tombstone_chunks(chunk_ids: List[str], index_path: Optional[str] = None) -> List[str]:
+    """
+    Tombstone chunks no document references, e.g. written by an interrupted job.
+
+    Returns:
+        The chunk ids newly tombstoned
+    """
+    with _manifest_lock:
+        manifest = load_manifest(index_path)
+        live = referenced_chunk_ids(manifest["documents"].values())
+        orphans = sorted(set(chunk_ids) - live - set(manifest["tombstones"]))
+        if orphans:
+            manifest["tombstones"] = sorted(set(manifest["tombstones"]) | set(orphans))
+            save_manifest(manifest, index_path)
+        return orphans
+
+
+def clear_tombstones(chunk_ids: List[str], index_path: Optional[str] = None) -> None:
+    """Drop tombstones whose vectors have been compacted away."""
+    with _manifest_lock:
+        manifest = load_manifest(index_path)
+        manifest["tombstones"] = sorted(set(manifest["tombstones"]) - set(chunk_ids))
+        save_manifest(manifest, index_path)
+
+
+def _cached_view(index_path: Optional[str], name: str, build: Callable[[Dict], Any], empty: Any) -> Any:
+    """A value derived from the manifest, recomputed only when the file changes."""
+    path = _manifest_path(index_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return empty
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _view_cache.get((path, name))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    value = build(load_manifest(index_path))
+    _view_cache[(path, name)] = (version, value)
+    return value
+
+
+def load_tombstones(index_path: Optional[str] = None) -> FrozenSet[str]:
+    """Tombstoned chunk ids, cached until the manifest changes."""
+    return _cached_view(
+        index_path, "tombstones", lambda manifest: frozenset(manifest["tombstones"]), frozenset()
+    )
+
+
+def _references(manifest: Dict) -> Tuple[Dict[str, List[Dict]], FrozenSet[str]]:
+    references: Dict[str, List[Dict]] = {}
+    for content_hash, entry in manifest["documents"].items():
+        for duplicate in entry.get("duplicates", ()):
+            location = {key: value for key, value in duplicate.items() if key not in ("chunk_id", "position")}
+            references.setdefault(duplicate["chunk_id"], []).append(
+                {"source": entry["source"], "content_hash": content_hash, **location}
+            )
+    return references, frozenset(manifest["documents"])
+
+
+def _adjacency(manifest: Dict) -> Tuple[Dict[str, List[str]], Dict[Tuple[str, str], int]]:
+    sequences = {
+        content_hash: document_sequence(entry) for content_hash, entry in manifest["documents"].items()
+    }
+    positions = {
+        (content_hash, chunk_id): position
+        for content_hash, sequence in sequences.items()
+        for position, chunk_id in enumerate(sequence)
+    }
+    return sequences, positions
+
+
+def load_adjacency(index_path: Optional[str] = None) -> Tuple[Dict[str, List[str]], Dict[Tuple[str, str], int]]:
+    """
+    Chunk adjacency: each document's chunk ids in reading order, and the
+    position of a chunk id within a document (by content hash); cached
+    until the manifest changes.
+    """
+    return _cached_view(index_path, "adjacency", _adjacency, ({}, {}))
+
+
+def load_references(index_path: Optional[str] = None) -> Tuple[Dict[str, List[Dict]], FrozenSet[str]]:
+    """
+    Sources collapsed into each stored chunk as near-duplicates, keyed by
+    chunk id, and the content hashes of live documents; cached until the
+    manifest changes.
+    """
+    return _cached_view(index_path, "references", _references, ({}, frozenset()))
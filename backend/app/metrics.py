@@ -0,0 +1,296 @@
+"""Lightweight Prometheus-style metrics for the query and ingestion pipelines."""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a Prometheus label set such as {stage="llm"}."""
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class holding the name, help text and label names of a metric."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {total}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, help, labelnames))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes() -> float:
+    """Resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of the ask and ingest pipelines.",
+    ("pipeline", "stage")
+)
+CACHE_HITS = registry.counter(
+    "rag_cache_hits_total",
+    "Lookups served from an in-memory cache.",
+    ("cache",)
+)
+CACHE_MISSES = registry.counter(
+    "rag_cache_misses_total",
+    "Lookups that had to fall through to the slow path.",
+    ("cache",)
+)
+REFUSALS = registry.counter(
+    "rag_refusals_total",
+    "Questions answered with the refusal response without calling the LLM."
+)
+CHUNKS_INGESTED = registry.counter(
+    "rag_chunks_ingested_total",
+    "Chunks written to the vector store."
+)
+CHUNKS_DELETED = registry.counter(
+    "rag_chunks_deleted_total",
+    "Chunks tombstoned by document deletes and replaces."
+)
+CHUNKS_DEDUPLICATED = registry.counter(
+    "rag_chunks_deduplicated_total",
+    "Chunks not stored because a near-duplicate was already indexed."
+)
+JOB_QUEUE_DEPTH = registry.gauge(
+    "rag_ingestion_queue_depth",
+    "Ingestion jobs that are pending or processing."
+)
+JOBS_STORED = registry.gauge(
+    "rag_jobs_stored",
+    "Ingestion jobs held in the job store."
+)
+JOBS_EVICTED = registry.counter(
+    "rag_jobs_evicted_total",
+    "Finished jobs evicted from the job store, by reason (ttl, capacity).",
+    ("reason",)
+)
+COALESCED_REQUESTS = registry.counter(
+    "rag_coalesced_requests_total",
+    "Requests served by waiting on an identical in-flight computation.",
+    ("flight",)
+)
+LLM_IN_FLIGHT = registry.gauge(
+    "rag_llm_in_flight",
+    "LLM calls currently holding an admission slot."
+)
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "rag_admission_queue_depth",
+    "Requests waiting for an LLM slot."
+)
+ADMISSION_REJECTED = registry.counter(
+    "rag_admission_rejected_total",
+    "Requests shed by admission control or provider rate limits.",
+    ("reason",)
+)
+LLM_PROVIDER_LATENCY = registry.histogram(
+    "rag_llm_provider_duration_seconds",
+    "Duration of successful calls to each LLM provider.",
+    ("provider",)
+)
+LLM_CALLS = registry.counter(
+    "rag_llm_calls_total",
+    "LLM provider calls by outcome (won, error, cancelled).",
+    ("provider", "outcome")
+)
+LLM_HEDGES = registry.counter(
+    "rag_llm_hedges_total",
+    "Hedged requests sent to a second provider because the first was slow."
+)
+JOBS_RESUMED = registry.counter(
+    "rag_jobs_resumed_total",
+    "Jobs interrupted by a restart and resumed from their write-ahead log, by kind.",
+    ("kind",)
+)
+INDEX_RECOVERIES = registry.counter(
+    "rag_index_recoveries_total",
+    "Startup repairs of collection files, by action (swap, staged_save, damaged, orphans).",
+    ("action",)
+)
+SESSIONS_ACTIVE = registry.gauge(
+    "rag_sessions_active",
+    "Conversation sessions held in memory."
+)
+SESSIONS_EVICTED = registry.counter(
+    "rag_sessions_evicted_total",
+    "Conversation sessions evicted, by reason (idle, capacity).",
+    ("reason",)
+)
+SESSION_COMPACTIONS = registry.counter(
+    "rag_session_compactions_total",
+    "Times older conversation turns were folded into a session summary, by method (llm, extractive).",
+    ("method",)
+)
+PROGRESS_SUBSCRIBERS = registry.gauge(
+    "rag_progress_subscribers",
+    "Clients streaming ingestion progress events."
+)
+PROCESS_RSS = registry.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory of the server process, sampled on scrape."
+)
+RESIDENT_COLLECTIONS = registry.gauge(
+    "rag_resident_collections",
+    "Collection indexes currently loaded in memory."
+)
+
+
+@contextmanager
+def timed(pipeline: str, stage: str) -> Iterator[None]:
+    """Record the wall-clock duration of a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, pipeline=pipeline, stage=stage)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
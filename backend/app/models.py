@@ -1,11 +1,20 @@
 """Job models for async ingestion tracking."""
 
+from bisect import bisect_left, insort
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
 import uuid
 
+from app.config import settings
+from app.index_store import DEFAULT_COLLECTION
+from app.metrics import JOBS_EVICTED, JOBS_STORED
+from app import progress
+
 
 class JobStatus(str, Enum):
     """Status of an ingestion job."""
@@ -15,34 +24,265 @@ class JobStatus(str, Enum):
     FAILED = "failed"
 
 
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+# Incremental counters a job reports while it runs
+PROGRESS_COUNTERS = ("pages_parsed", "chunks_embedded", "chunks_committed")
+
+
 @dataclass
 class Job:
     """Represents an ingestion job."""
     job_id: str
     status: JobStatus
     filename: str
+    collection: str = DEFAULT_COLLECTION
     error: Optional[str] = None
     chunks_added: int = 0
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_committed: int = 0
+    parent_id: Optional[str] = None
+    child_ids: List[str] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
 
 
+class JobStore:
+    """
+    Bounded in-memory job store with secondary indexes.
+
+    Every job gets an increasing sequence number; the status, filename,
+    collection and combined status-and-collection indexes keep sorted
+    sequence lists, so a page of jobs is found by bisecting to the cursor
+    and costs O(log n + page size) regardless of history. Finished top-level jobs are evicted (with their
+    children) once older than `ttl` seconds, or oldest-finished first when
+    the store holds more than `max_jobs`; active jobs are never evicted.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_jobs = max_jobs or settings.MAX_JOBS
+        self.ttl = settings.JOB_TTL_SECONDS if ttl is None else ttl
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs: Dict[str, Job] = {}
+            self._seqs: Dict[str, int] = {}
+            self._by_seq: Dict[int, str] = {}
+            self._all: List[int] = []
+            self._indexes: Dict[str, Dict[Any, List[int]]] = {
+                "status": {}, "filename": {}, "collection": {}, "status_collection": {}
+            }
+            # Finished top-level jobs in the order they finished, with the time they did
+            self._finished: "OrderedDict[str, float]" = OrderedDict()
+            self._next_seq = 0
+            JOBS_STORED.set(0)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._jobs
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def add(self, job: Job) -> None:
+        with self._lock:
+            self._next_seq += 1
+            seq = self._next_seq
+            self._jobs[job.job_id] = job
+            self._seqs[job.job_id] = seq
+            self._by_seq[seq] = job.job_id
+            self._all.append(seq)
+            for name, key in self._keys(job).items():
+                self._indexes[name].setdefault(key, []).append(seq)
+            self.evict()
+            JOBS_STORED.set(len(self._jobs))
+
+    def set_status(self, job: Job, status: JobStatus) -> None:
+        """Change a job's status, moving it between status indexes."""
+        with self._lock:
+            seq = self._seqs.get(job.job_id)
+            before = self._keys(job)
+            job.status = status
+            if seq is not None:
+                for name, key in self._keys(job).items():
+                    if key != before[name]:
+                        self._unindex(name, before[name], seq)
+                        insort(self._indexes[name].setdefault(key, []), seq)
+            if job.parent_id is None and seq is not None:
+                if status in TERMINAL_STATUSES:
+                    self._finished[job.job_id] = time.monotonic()
+                    self._finished.move_to_end(job.job_id)
+                    self.evict()
+                else:
+                    self._finished.pop(job.job_id, None)
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[int] = None,
+        status: Optional[JobStatus] = None,
+        filename: Optional[str] = None,
+        collection: Optional[str] = None
+    ) -> Tuple[List[Job], Optional[int]]:
+        """
+        Jobs newest first, starting after `cursor`, matching every given filter.
+
+        Returns:
+            The page and the cursor for the next page (None on the last page)
+        """
+        filters = {
+            name: value for name, value in
+            (("status", status), ("filename", filename), ("collection", collection))
+            if value is not None
+        }
+        lookups = dict(filters)
+        if status is not None and collection is not None:
+            lookups["status_collection"] = (status, collection)
+        with self._lock:
+            self.evict()
+            # Walk the most selective index and check the other filters per job
+            candidates = min(
+                (self._indexes[name].get(value, []) for name, value in lookups.items()),
+                key=len,
+                default=self._all
+            )
+            end = len(candidates) if cursor is None else bisect_left(candidates, cursor)
+            # One match past the page tells whether a next page exists
+            jobs: List[Job] = []
+            position = end
+            while position > 0 and len(jobs) <= limit:
+                position -= 1
+                job = self._jobs[self._by_seq[candidates[position]]]
+                keys = self._keys(job)
+                if all(keys[name] == value for name, value in filters.items()):
+                    jobs.append(job)
+            if len(jobs) <= limit:
+                return jobs, None
+            return jobs[:limit], self._seqs[jobs[limit - 1].job_id]
+
+    def evict(self) -> int:
+        """Drop expired finished jobs, then the oldest finished ones beyond max_jobs."""
+        evicted = 0
+        with self._lock:
+            expire_before = time.monotonic() - self.ttl
+            while self._finished:
+                job_id, finished_at = next(iter(self._finished.items()))
+                if finished_at < expire_before:
+                    evicted += self._remove_tree(job_id, "ttl")
+                elif len(self._jobs) > self.max_jobs:
+                    evicted += self._remove_tree(job_id, "capacity")
+                else:
+                    break
+            JOBS_STORED.set(len(self._jobs))
+        return evicted
+
+    def _remove_tree(self, job_id: str, reason: str) -> int:
+        self._finished.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if job is None:
+            return 0
+        for child_id in job.child_ids:
+            self._remove(child_id)
+        self._remove(job_id)
+        JOBS_EVICTED.inc(1 + len(job.child_ids), reason=reason)
+        return 1 + len(job.child_ids)
+
+    def _remove(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        seq = self._seqs.pop(job_id)
+        del self._by_seq[seq]
+        self._delete(self._all, seq)
+        for name, key in self._keys(job).items():
+            self._unindex(name, key, seq)
+
+    def _unindex(self, name: str, key: Any, seq: int) -> None:
+        seqs = self._indexes[name].get(key)
+        if seqs is not None:
+            self._delete(seqs, seq)
+            if not seqs:
+                del self._indexes[name][key]
+
+    @staticmethod
+    def _delete(seqs: List[int], seq: int) -> None:
+        position = bisect_left(seqs, seq)
+        if position < len(seqs) and seqs[position] == seq:
+            del seqs[position]
+
+    @staticmethod
+    def _keys(job: Job) -> Dict[str, Any]:
+        return {
+            "status": job.status,
+            "filename": job.filename,
+            "collection": job.collection,
+            "status_collection": (job.status, job.collection)
+        }
+
+
 # In-memory job store
-_job_store: Dict[str, Job] = {}
+_job_store = JobStore()
+# Guards counter increments, which may come from several ingestion threads
+_progress_lock = threading.Lock()
+
+
+def job_event(job: Job, event_type: str) -> Dict[str, Any]:
+    """Snapshot of a job pushed to progress subscribers."""
+    return {
+        "type": event_type,
+        "job_id": job.job_id,
+        "parent_id": job.parent_id,
+        "collection": job.collection,
+        "filename": job.filename,
+        "status": job.status.value,
+        "error": job.error,
+        "pages_parsed": job.pages_parsed,
+        "chunks_embedded": job.chunks_embedded,
+        "chunks_committed": job.chunks_committed,
+        "chunks_added": job.chunks_added,
+    }
 
 
-def create_job(filename: str) -> Job:
-    """Create a new job with PENDING status."""
-    job_id = str(uuid.uuid4())
+def create_job(
+    filename: str,
+    parent_id: Optional[str] = None,
+    collection: str = DEFAULT_COLLECTION,
+    job_id: Optional[str] = None
+) -> Job:
+    """
+    Create a new job with PENDING status, optionally as a child of another job.
+
+    A job_id is only given when restoring a job interrupted by a restart.
+    """
+    job_id = job_id or str(uuid.uuid4())
     job = Job(
         job_id=job_id,
         status=JobStatus.PENDING,
-        filename=filename
+        filename=filename,
+        collection=collection,
+        parent_id=parent_id
     )
-    _job_store[job_id] = job
+    parent = _job_store.get(parent_id) if parent_id is not None else None
+    if parent is not None:
+        parent.child_ids.append(job_id)
+    _job_store.add(job)
+    progress.bus.publish(job_event(job, "status"))
     return job
 
 
+def get_children(job_id: str) -> List[Job]:
+    """Get the child jobs of a bulk ingestion job."""
+    job = _job_store.get(job_id)
+    if job is None:
+        return []
+    return [child for child in map(_job_store.get, job.child_ids) if child is not None]
+
+
 def get_job(job_id: str) -> Optional[Job]:
     """Get a job by ID."""
     return _job_store.get(job_id)
@@ -54,22 +294,63 @@ def update_job(
     error: Optional[str] = None,
     chunks_added: Optional[int] = None
 ) -> Optional[Job]:
-    """Update a job's status and/or error message."""
+    """Update a job's status and/or error message, notifying progress subscribers."""
     job = _job_store.get(job_id)
     if job is None:
         return None
 
-    if status is not None:
-        job.status = status
+    changed = status is not None and status != job.status
     if error is not None:
         job.error = error
     if chunks_added is not None:
         job.chunks_added = chunks_added
-
     job.updated_at = datetime.utcnow()
+    if status is not None:
+        # Last, so the job is complete before it can be evicted
+        _job_store.set_status(job, status)
+
+    progress.bus.publish(job_event(job, "status" if changed else "progress"))
     return job
 
 
-def list_jobs() -> list[Job]:
-    """List all jobs."""
-    return list(_job_store.values())
+def record_progress(job_id: Optional[str] = None, **counts: int) -> None:
+    """
+    Advance a job's progress counters and push the new state.
+
+    Defaults to the job being tracked in the current context, so ingestion
+    code can report progress without knowing which job it runs for; it is
+    a no-op outside a job. Counts also roll up into the parent job.
+    """
+    job_id = job_id or progress.current_job()
+    job = _job_store.get(job_id) if job_id else None
+    if job is None:
+        return
+
+    parent = _job_store.get(job.parent_id) if job.parent_id else None
+    with _progress_lock:
+        for target in filter(None, (job, parent)):
+            for name, count in counts.items():
+                if name not in PROGRESS_COUNTERS:
+                    raise ValueError(f"Unknown progress counter: {name}")
+                setattr(target, name, getattr(target, name) + count)
+            target.updated_at = datetime.utcnow()
+    for target in filter(None, (job, parent)):
+        progress.bus.publish(job_event(target, "progress"))
+
+
+def list_jobs(
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    status: Optional[JobStatus] = None,
+    filename: Optional[str] = None,
+    collection: Optional[str] = None
+) -> Tuple[List[Job], Optional[int]]:
+    """
+    List jobs newest first, optionally filtered, one page at a time.
+
+    Returns:
+        The page and the cursor for the next page (None on the last page)
+    """
+    return _job_store.page(
+        limit or len(_job_store) or 1, cursor, status=status, filename=filename, collection=collection
+    )
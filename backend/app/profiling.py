@@ -0,0 +1,246 @@
+"""On-demand sampling profiler and allocation tracking for single requests."""
+
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.logger import logger
+
+
+# Only one request is profiled at a time: tracemalloc is process-global
+_profile_lock = threading.Lock()
+
+# Requests armed through the admin endpoint, by kind ("ask" or "ingest")
+_armed: Dict[str, int] = {"ask": 0, "ingest": 0}
+_armed_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    """Label a frame as 'function (file:line)' for folded stacks."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread and aggregates folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Render samples in the folded format read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class ProfileHandle:
+    """Identifier of a profile being recorded, available to the caller."""
+
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Check the profiling token when one is configured."""
+    if not settings.PROFILING_ENABLED:
+        return False
+    if not settings.PROFILING_TOKEN:
+        return True
+    return token is not None and hmac.compare_digest(token.encode(), settings.PROFILING_TOKEN.encode())
+
+
+def arm(kind: str, count: int = 1) -> int:
+    """Profile the next `count` requests of the given kind."""
+    with _armed_lock:
+        _armed[kind] = _armed.get(kind, 0) + count
+        return _armed[kind]
+
+
+def consume_armed(kind: str) -> bool:
+    """Take one armed profiling slot for this kind, if any."""
+    with _armed_lock:
+        if _armed.get(kind, 0) > 0:
+            _armed[kind] -= 1
+            return True
+    return False
+
+
+def reserve(kind: str, label: str) -> bool:
+    """
+    Claim the profiler now for a profile recorded later on another thread.
+
+    Lets a request promise a profile id before its background task runs;
+    the task then profiles with reserved=True, which releases the claim.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning(f"Profiler busy, skipping profile for {kind} {label}")
+        return False
+    return True
+
+
+@contextmanager
+def profile_request(
+    kind: str,
+    label: str,
+    profile_id: Optional[str] = None,
+    reserved: bool = False
+) -> Iterator[Optional[ProfileHandle]]:
+    """
+    Profile the enclosed block on the current thread.
+
+    Writes <id>.folded (flamegraph stacks) and <id>.json (timing and
+    allocation stats) to PROFILE_DIR. Yields None without profiling when
+    another profile is already running, unless the profiler was already
+    claimed with reserve().
+    """
+    if not reserved and not _profile_lock.acquire(blocking=False):
+        logger.warning(f"Profiler busy, skipping profile for {kind} {label}")
+        yield None
+        return
+
+    handle = ProfileHandle(profile_id or str(uuid.uuid4()))
+    started_tracing = not tracemalloc.is_tracing()
+    try:
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        sampler = SamplingProfiler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield handle
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            _write_profile(handle.profile_id, kind, label, duration, sampler, snapshot, current, peak)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _profile_lock.release()
+
+
+def _write_profile(profile_id, kind, label, duration, sampler, snapshot, current, peak) -> None:
+    """Persist the folded stacks and a JSON summary of the profile."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    top_allocations = [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:25]
+    ]
+    summary = {
+        "profile_id": profile_id,
+        "kind": kind,
+        "label": label,
+        "created_at": time.time(),
+        "duration_seconds": duration,
+        "samples": sampler.samples,
+        "sample_interval_seconds": sampler.interval,
+        "traced_memory_bytes": current,
+        "peak_memory_bytes": peak,
+        "top_allocations": top_allocations,
+    }
+
+    base = os.path.join(settings.PROFILE_DIR, profile_id)
+    with open(f"{base}.folded", "w") as f:
+        f.write(sampler.folded())
+    with open(f"{base}.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(f"Profile {profile_id} written for {kind} {label} ({sampler.samples} samples)")
+
+
+def list_profiles() -> List[dict]:
+    """List stored profile summaries, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    summaries = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        if name.endswith(".json"):
+            summary = get_profile(name[:-len(".json")])
+            if summary is not None:
+                summaries.append(summary)
+    return sorted(summaries, key=lambda s: s["created_at"], reverse=True)
+
+
+def _profile_path(profile_id: str, extension: str) -> Optional[str]:
+    """Path of a stored profile file, rejecting ids that escape PROFILE_DIR."""
+    if os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}{extension}")
+    return path if os.path.exists(path) else None
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    """Load a stored profile summary."""
+    path = _profile_path(profile_id, ".json")
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_flamegraph_path(profile_id: str) -> Optional[str]:
+    """Path to the folded-stack file of a stored profile."""
+    return _profile_path(profile_id, ".folded")
+
+
+def should_profile(kind: str, header: Optional[str], token: Optional[str]) -> bool:
+    """Decide whether a request is profiled, by header or admin arming."""
+    if not settings.PROFILING_ENABLED:
+        return False
+    if header and header.lower() in ("1", "true", "yes"):
+        return is_authorized(token)
+    return consume_armed(kind)
+
+
+@contextmanager
+def maybe_profile(
+    kind: str,
+    label: str,
+    enabled: bool,
+    profile_id: Optional[str] = None,
+    reserved: bool = False
+) -> Iterator[Optional[ProfileHandle]]:
+    """Profile the enclosed block only when enabled; otherwise a no-op."""
+    if not enabled:
+        yield None
+        return
+    with profile_request(kind, label, profile_id, reserved) as handle:
+        yield handle
@@ -0,0 +1,120 @@
+"""Push-based ingestion progress: job events fanned out to streaming subscribers."""
+
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.metrics import PROGRESS_SUBSCRIBERS
+
+
+# Job whose counters the ingestion code running in this context advances
+_current_job: ContextVar[Optional[str]] = ContextVar("current_job", default=None)
+
+
+@contextmanager
+def tracking(job_id: str) -> Iterator[None]:
+    """Attribute progress reported inside the block to a job."""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def current_job() -> Optional[str]:
+    """The job progress is currently attributed to, if any."""
+    return _current_job.get()
+
+
+class Subscription:
+    """
+    Events for one streaming client.
+
+    Events are delivered on the subscriber's event loop. If the client
+    falls behind, the oldest queued events are dropped; every event
+    carries the job's full state, so the latest one is always accurate.
+    """
+
+    def __init__(
+        self,
+        bus: "ProgressBus",
+        loop: asyncio.AbstractEventLoop,
+        job_id: Optional[str],
+        collection: Optional[str],
+        max_queued: int
+    ):
+        self.bus = bus
+        self.loop = loop
+        self.job_id = job_id
+        self.collection = collection
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queued)
+        self.dropped = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.job_id is not None:
+            return self.job_id in (event["job_id"], event.get("parent_id"))
+        return event["collection"] == self.collection
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None if none arrived within timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class ProgressBus:
+    """Fans job events out to subscribers of the job, its parent or its collection."""
+
+    def __init__(self, max_queued: int = 256):
+        self.max_queued = max_queued
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: Optional[str] = None, collection: Optional[str] = None) -> Subscription:
+        """Subscribe the running event loop to one job (and its children) or a whole collection."""
+        if (job_id is None) == (collection is None):
+            raise ValueError("Subscribe to exactly one of job_id or collection")
+        subscription = Subscription(self, asyncio.get_running_loop(), job_id, collection, self.max_queued)
+        with self._lock:
+            self._subscribers.append(subscription)
+            PROGRESS_SUBSCRIBERS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            PROGRESS_SUBSCRIBERS.set(len(self._subscribers))
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to matching subscribers; safe to call from any thread."""
+        with self._lock:
+            targets = [s for s in self._subscribers if s.matches(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an event as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+# Shared bus for all ingestion jobs in this process
+bus = ProgressBus()
@@ -0,0 +1,315 @@
+"""Reduced-precision (float16 / int8) vector storage with full-precision rescoring."""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.logger import logger
+from app import wal
+
+
+PRECISIONS = ("float32", "float16", "int8")
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+# Full-precision copy of the vectors, memory-mapped and read only for rescoring
+VECTORS_FILE = "vectors.f32.npy"
+# Version of the float32 index each of the above was built from, by file name
+SIDECAR_META_FILE = "quantized.json"
+
+_QUANTIZER_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def quantized_file(precision: str) -> str:
+    return f"index.{precision}.faiss"
+
+
+def _sidecar_files() -> List[str]:
+    return [VECTORS_FILE, SIDECAR_META_FILE] + [quantized_file(precision) for precision in _QUANTIZER_TYPES]
+
+
+def index_version(index_to_docstore_id: Dict[int, str]) -> str:
+    """
+    Version of a float32 index: a digest of its chunk ids by position.
+
+    Chunk ids are never reused, so any delete, add or compaction changes
+    it, even when the number of vectors stays the same.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for _, chunk_id in sorted(index_to_docstore_id.items()):
+        hasher.update(chunk_id.encode())
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def _read_sidecar_meta(path: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(path, SIDECAR_META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _replace_file(path: str, write) -> None:
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def build_quantized(vectors: np.ndarray, precision: str):
+    """Build a scalar-quantized L2 index holding the given float32 vectors."""
+    if precision not in _QUANTIZER_TYPES:
+        raise ValueError(f"Unsupported vector precision: {precision}")
+    index = faiss.IndexScalarQuantizer(vectors.shape[1], _QUANTIZER_TYPES[precision], faiss.METRIC_L2)
+    if len(vectors):
+        # int8 learns per-dimension ranges; float16 training is a no-op
+        index.train(vectors)
+        index.add(vectors)
+    return index
+
+
+def write_quantized(index, path: str, precision: str, version: str) -> None:
+    """
+    Write the quantized index and the full-precision vector copy next to a FAISS index.
+
+    `version` (see index_version) is recorded for both files last, so
+    files a crash left half-updated are never taken as current.
+    """
+    vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), dtype=np.float32)
+    quantized = build_quantized(vectors, precision)
+    os.makedirs(path, exist_ok=True)
+
+    def write_vectors(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.save(f, vectors)
+
+    _replace_file(os.path.join(path, VECTORS_FILE), write_vectors)
+    _replace_file(
+        os.path.join(path, quantized_file(precision)),
+        lambda tmp_path: faiss.write_index(quantized, tmp_path)
+    )
+
+    meta = _read_sidecar_meta(path)
+    meta.update({VECTORS_FILE: version, quantized_file(precision): version})
+
+    def write_meta(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+
+    _replace_file(os.path.join(path, SIDECAR_META_FILE), write_meta)
+
+
+def save_index(vectorstore: FAISS, path: str, precision: Optional[str] = None) -> None:
+    """
+    Save a FAISS vector store, plus its reduced-precision copy if configured.
+
+    The float32 index stays on disk as the source of truth for writes;
+    stale reduced-precision files are removed when running at float32.
+    """
+    precision = precision or settings.VECTOR_PRECISION
+    if precision == "float32":
+        for name in _sidecar_files():
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+    else:
+        write_quantized(vectorstore.index, path, precision, index_version(vectorstore.index_to_docstore_id))
+    wal.save_faiss(vectorstore, path)
+
+
+class QuantizedFAISS(FAISS):
+    """
+    FAISS vector store searching a scalar-quantized index.
+
+    Fetches RESCORE_FACTOR x k candidates from the compact index, then
+    reranks them by exact L2 distance against the memory-mapped float32
+    vectors, so only the candidates' pages are read from disk.
+    """
+
+    def __init__(self, *args, vectors: np.ndarray, rescore_factor: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vectors = vectors
+        self.rescore_factor = max(1, rescore_factor)
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter=None,
+        fetch_k: int = 20,
+        **kwargs
+    ) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        candidates = k * self.rescore_factor
+        if filter is not None:
+            candidates = max(candidates, fetch_k)
+        _, indices = self.index.search(query[None, :], candidates)
+
+        positions = np.array(
+            [i for i in indices[0] if i != -1 and i in self.index_to_docstore_id],
+            dtype=np.int64
+        )
+        if not positions.size:
+            return []
+        distances = ((self.vectors[positions] - query) ** 2).sum(axis=1)
+
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        score_threshold = kwargs.get("score_threshold")
+        docs = []
+        for order in np.argsort(distances, kind="stable"):
+            score = float(distances[order])
+            if score_threshold is not None and score > score_threshold:
+                break
+            doc = self.docstore.search(self.index_to_docstore_id[int(positions[order])])
+            if not isinstance(doc, Document):
+                continue
+            if filter_func is None or filter_func(doc.metadata):
+                docs.append((doc, score))
+            if len(docs) == k:
+                break
+        return docs
+
+
+def _load_docstore(path: str) -> Tuple:
+    with open(os.path.join(path, DOCSTORE_FILE), "rb") as f:
+        return pickle.load(f)
+
+
+def load_index(path: str, embedding_function: Embeddings, precision: Optional[str] = None) -> FAISS:
+    """
+    Load a saved index at the configured precision.
+
+    Reduced-precision files missing or built from another version of the
+    float32 index are rebuilt from it, so existing collections convert on
+    first load.
+    """
+    precision = precision or settings.VECTOR_PRECISION
+    if precision == "float32":
+        return FAISS.load_local(path, embedding_function, allow_dangerous_deserialization=True)
+
+    quantized_path = os.path.join(path, quantized_file(precision))
+    vectors_path = os.path.join(path, VECTORS_FILE)
+    docstore, index_to_docstore_id = _load_docstore(path)
+    version = index_version(index_to_docstore_id)
+
+    def load_quantized():
+        if not (os.path.exists(quantized_path) and os.path.exists(vectors_path)):
+            return None
+        meta = _read_sidecar_meta(path)
+        if not meta.get(VECTORS_FILE) == meta.get(quantized_file(precision)) == version:
+            return None
+        index = faiss.read_index(quantized_path)
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if not index.ntotal == len(vectors) == len(index_to_docstore_id):
+            return None
+        return QuantizedFAISS(
+            embedding_function, index, docstore, index_to_docstore_id,
+            vectors=vectors, rescore_factor=settings.RESCORE_FACTOR
+        )
+
+    store = load_quantized()
+    if store is None:
+        logger.info(f"Building {precision} index for {path}")
+        write_quantized(faiss.read_index(os.path.join(path, INDEX_FILE)), path, precision, version)
+        store = load_quantized()
+    if store is None:
+        logger.warning(f"Reduced-precision index for {path} is inconsistent; using float32")
+        return FAISS.load_local(path, embedding_function, allow_dangerous_deserialization=True)
+    return store
+
+
+def resident_bytes(index) -> int:
+    """Approximate memory held by the vectors of a FAISS index."""
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return index.code_size * index.ntotal
+    return index.d * 4 * index.ntotal
+
+
+def recall_report(path: str, precision: str, k: int = 10, queries: int = 200, seed: int = 0) -> Dict:
+    """
+    Compare reduced-precision search with exact float32 search.
+
+    Queries are a sample of the stored vectors; each query's own vector is
+    excluded from its results. Reports recall@k of the quantized index
+    alone and after full-precision rescoring, and resident vector memory.
+    """
+    full = faiss.read_index(os.path.join(path, INDEX_FILE))
+    vectors = full.reconstruct_n(0, full.ntotal)
+    quantized = build_quantized(vectors, precision)
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(full.ntotal, size=min(queries, full.ntotal), replace=False)
+    query_vectors = vectors[sample]
+
+    def neighbors(distances_of, fetch):
+        _, found = distances_of(query_vectors, fetch + 1)
+        return [[i for i in row if i != q and i != -1] for q, row in zip(sample, found)]
+
+    exact = neighbors(full.search, k)
+    approx = neighbors(quantized.search, k)
+    rescored = []
+    for query, candidates in zip(query_vectors, neighbors(quantized.search, k * settings.RESCORE_FACTOR)):
+        candidates = np.array(candidates, dtype=np.int64)
+        distances = ((vectors[candidates] - query) ** 2).sum(axis=1)
+        rescored.append(candidates[np.argsort(distances, kind="stable")].tolist())
+
+    def recall(results):
+        # A result counts as a hit when it is as close as the k-th true neighbor,
+        # so ties between duplicate vectors are not reported as misses
+        hits = total = 0
+        for query, truth, found in zip(query_vectors, exact, results):
+            truth, found = truth[:k], np.array(found[:k], dtype=np.int64)
+            if not truth:
+                continue
+            cutoff = ((vectors[truth[-1]] - query) ** 2).sum()
+            distances = ((vectors[found] - query) ** 2).sum(axis=1)
+            hits += int((distances <= cutoff * (1 + 1e-5) + 1e-9).sum())
+            total += len(truth)
+        return hits / total if total else 1.0
+
+    return {
+        "precision": precision,
+        "vectors": int(full.ntotal),
+        "queries": len(sample),
+        "k": k,
+        "recall": recall(approx),
+        "recall_rescored": recall(rescored),
+        "float32_bytes": resident_bytes(full),
+        "resident_bytes": resident_bytes(quantized),
+    }
+
+
+if __name__ == "__main__":
+    from app.index_store import collection_path
+    from app.sharding import read_layout, shard_path
+
+    parser = argparse.ArgumentParser(description="Recall of reduced-precision search vs float32")
+    parser.add_argument("collection", nargs="?", default="default")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    root = collection_path(args.collection)
+    layout = read_layout(root)
+    paths = [shard_path(root, shard) for shard in range(layout["shards"])] if layout else [root]
+    for path in paths:
+        if not os.path.exists(os.path.join(path, INDEX_FILE)):
+            continue
+        for precision in _QUANTIZER_TYPES:
+            report = recall_report(path, precision, k=args.k, queries=args.queries)
+            print(
+                f"{path} {precision}: recall@{report['k']}={report['recall']:.3f} "
+                f"rescored={report['recall_rescored']:.3f} "
+                f"memory={report['resident_bytes']}/{report['float32_bytes']} bytes"
+            )
@@ -1,15 +1,19 @@
 """RAG module for question answering with retrieval guardrails."""
 
-import os
 import json
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from app.config import settings
+from app.admission import ProviderRateLimited, is_rate_limit, llm_admission, provider_retry_after
+from app.embeddings import get_embeddings
+from app import manifest, sharding
+from app.index_store import DEFAULT_COLLECTION, IndexRegistry, collection_path, index_model
+from app.metrics import CACHE_HITS, CACHE_MISSES, REFUSALS, timed
 
 
 SYSTEM_PROMPT = """You are a question-answering assistant that provides precise, evidence-based answers.
@@ -43,17 +47,68 @@ REFUSAL_RESPONSE = {
 }
 
 
-def load_vectorstore():
-    """Load the FAISS vector store."""
-    embeddings = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2"
-    )
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper that records query embedding latency and caches recent query vectors."""
 
-    return FAISS.load_local(
-        settings.VECTOR_DB_PATH,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
+    def __init__(self, embeddings: Embeddings, cache_size: Optional[int] = None):
+        self.embeddings = embeddings
+        self.cache_size = settings.QUERY_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is not None:
+                self._cache.move_to_end(text)
+        if vector is not None:
+            CACHE_HITS.inc(cache="query_embedding")
+            return vector
+
+        CACHE_MISSES.inc(cache="query_embedding")
+        with timed("ask", "embed_query"):
+            vector = self.embeddings.embed_query(text)
+        if self.cache_size:
+            with self._cache_lock:
+                self._cache[text] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return vector
+
+
+_embeddings_lock = threading.Lock()
+_query_embeddings: Dict[str, Embeddings] = {}
+
+
+def get_query_embeddings(model: Optional[str] = None) -> Embeddings:
+    """Shared embeddings model for queries, created once per process and model."""
+    model = model or settings.EMBEDDING_MODEL
+    with _embeddings_lock:
+        if model not in _query_embeddings:
+            _query_embeddings[model] = TimedEmbeddings(get_embeddings(model=model))
+        return _query_embeddings[model]
+
+
+def _load_index(path: str):
+    """Load a collection's FAISS index (or its shards) with the model it was embedded with."""
+    embeddings = get_query_embeddings(index_model(path))
+    if sharding.read_layout(path) is not None:
+        return sharding.ShardedVectorStore.open(path, embeddings)
+    from app import quantization
+
+    return quantization.load_index(path, embeddings)
+
+
+# Resident indexes, reloaded only when the files on disk change
+index_registry = IndexRegistry(loader=_load_index)
+
+
+def load_vectorstore(collection: str = DEFAULT_COLLECTION):
+    """Load a collection's FAISS vector store, reusing the resident copy when unchanged."""
+    return index_registry.get(collection)
 
 
 def format_source_info(doc) -> Dict[str, Any]:
@@ -67,33 +122,252 @@ def format_source_info(doc) -> Dict[str, Any]:
     }
 
 
-def answer_question(question: str) -> dict:
+def duplicate_source_info(doc) -> List[Dict[str, Any]]:
+    """Source information of the near-duplicates collapsed into a chunk."""
+    return [
+        {
+            "source": duplicate.get("source", "unknown"),
+            "page": duplicate.get("page"),
+            "section": duplicate.get("section"),
+            "chunk_index": duplicate.get("chunk_index")
+        }
+        for duplicate in doc.metadata.get("duplicates", ())
+    ]
+
+
+def search_live(
+    vectorstore,
+    question: str,
+    k: int,
+    collection: str = DEFAULT_COLLECTION,
+    embedding: Optional[List[float]] = None
+) -> list:
     """
-    Answer a question using RAG with retrieval guardrails.
+    Similarity search that skips tombstoned (deleted) chunks.
 
-    - Returns refusal WITHOUT calling LLM if no relevant chunks found
-    - Removes fallback logic that defeats similarity threshold
-    - Returns structured source objects with page/section info
+    Before compaction has removed the deleted vectors, the search widens
+    until k live results are found or the index is exhausted, so the
+    fetch grows with the tombstones near the query rather than with
+    every tombstone in the collection. Pass the query's embedding to
+    search without embedding it again.
     """
-    vectorstore = load_vectorstore()
+    if embedding is None:
+        embedding = vectorstore.embedding_function.embed_query(question)
+    index_path = collection_path(collection)
+    tombstones = manifest.load_tombstones(index_path)
+    if not tombstones:
+        results = vectorstore.similarity_search_with_score_by_vector(embedding, k=k)
+        return with_duplicate_sources(results, index_path)
 
-    # Retrieve with similarity scores
-    results = vectorstore.similarity_search_with_score(
-        question,
-        k=settings.TOP_K
-    )
+    fetch = k + min(k, len(tombstones))
+    while True:
+        results = vectorstore.similarity_search_with_score_by_vector(embedding, k=fetch)
+        live = [(doc, score) for doc, score in results if doc.id not in tombstones]
+        # A short page means the index has no more vectors to give
+        if len(live) >= k or len(results) < fetch:
+            break
+        fetch *= 4
+    return with_duplicate_sources(live[:k], index_path)
 
-    # Filter by similarity threshold (lower score = more similar in FAISS)
-    filtered_docs = [
-        doc for doc, score in results
-        if score < settings.SIMILARITY_THRESHOLD
-    ]
 
-    # NO FALLBACK: If nothing passes threshold, refuse without LLM call
-    if not filtered_docs:
-        return REFUSAL_RESPONSE
+def with_duplicate_sources(results: list, index_path: str) -> list:
+    """
+    Attach the sources that near-duplicate chunks were collapsed from.
+
+    A chunk cited by other documents gets their locations under the
+    `duplicates` metadata key. If the document that stored the chunk has
+    since been deleted, the first citing document becomes its source.
+    The resident documents are copied, never modified.
+    """
+    references, live = manifest.load_references(index_path)
+    if not references:
+        return results
+
+    annotated = []
+    for doc, score in results:
+        cited = references.get(doc.id)
+        if cited:
+            metadata = dict(doc.metadata)
+            if metadata.get("content_hash") not in live:
+                primary, cited = cited[0], cited[1:]
+                for key in ("page", "section", "chunk_index"):
+                    metadata.pop(key, None)
+                metadata.update({key: value for key, value in primary.items() if value is not None})
+            metadata["duplicates"] = cited
+            doc = Document(page_content=doc.page_content, metadata=metadata, id=doc.id)
+        annotated.append((doc, score))
+    return annotated
+
+
+def search_chunks(
+    query: str,
+    collection: str = DEFAULT_COLLECTION,
+    k: int = 10,
+    offset: int = 0,
+    sources: Optional[List[str]] = None,
+    section: Optional[str] = None,
+    page: Optional[int] = None,
+    max_score: Optional[float] = None
+) -> Tuple[List[Tuple[Any, float]], bool]:
+    """
+    Ranked chunks for a query from the resident index, without calling the LLM.
+
+    Filters are applied to chunk metadata; when they are set the search
+    widens until enough matches are found or the index is exhausted.
+
+    Returns:
+        The (document, score) pairs of the requested page and whether
+        more results follow it
+    """
+    with timed("search", "load_index"):
+        vectorstore = load_vectorstore(collection)
+
+    def matches(doc, score) -> bool:
+        metadata = doc.metadata
+        return (
+            (max_score is None or score <= max_score)
+            and (not sources or any(
+                cited.get("source") in sources for cited in [metadata, *metadata.get("duplicates", ())]
+            ))
+            and (section is None or metadata.get("section") == section)
+            and (page is None or metadata.get("page") == page)
+        )
+
+    # Fetch one extra result to know whether another page exists
+    wanted = offset + k + 1
+    fetch = wanted
+    # Embedded once, outside the retrieve stage (it is timed as its own stage)
+    embedding = vectorstore.embedding_function.embed_query(query)
+    with timed("search", "retrieve"):
+        while True:
+            results = search_live(vectorstore, query, fetch, collection, embedding)
+            hits = [(doc, score) for doc, score in results if matches(doc, score)]
+            # A short page means the index has no more vectors to give
+            exhausted = len(results) < fetch
+            # Scores only grow down the list, so a score cutoff ends the search early
+            past_cutoff = max_score is not None and results and results[-1][1] > max_score
+            if len(hits) >= wanted or exhausted or past_cutoff:
+                break
+            fetch *= 4
+
+    return hits[offset:offset + k], len(hits) > offset + k
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+# Marks where a passage continues with a chunk collapsed from another document
+PASSAGE_GAP = "\n[...]\n"
+
+
+def _join_passage(chunks: List[Document]) -> str:
+    """
+    Concatenate consecutive chunks, dropping the overlap the splitter repeated.
 
-    # Build context from filtered documents
+    Overlap is only trimmed when both chunks come from the same document and
+    page and their start offsets show the second continues the first; a
+    neighbor that was collapsed into a near-duplicate stored by another
+    document is joined after a gap marker instead.
+    """
+    text = chunks[0].page_content
+    for previous, chunk in zip(chunks, chunks[1:]):
+        content = chunk.page_content
+        before, after = previous.metadata, chunk.metadata
+        same_document = (
+            before.get("source") == after.get("source")
+            and before.get("content_hash") == after.get("content_hash")
+        )
+        if not same_document:
+            text += PASSAGE_GAP + content
+            continue
+        start, end = before.get("start_index"), after.get("start_index")
+        contiguous = (
+            before.get("page") == after.get("page")
+            and start is not None and end is not None
+            and start < end <= start + len(previous.page_content)
+        )
+        if contiguous:
+            overlap = start + len(previous.page_content) - end
+            if 0 < overlap < len(content):
+                text += content[overlap:]
+                continue
+        text += "\n" + content
+    return text
+
+
+def expand_neighbors(vectorstore, docs: List[Document], collection: str = DEFAULT_COLLECTION) -> List[Document]:
+    """
+    Widen the best hits into passages of their neighboring chunks.
+
+    Neighbors come from the chunk adjacency in the manifest and are fetched
+    by id, without another search. The NEIGHBOR_EXPAND_HITS best hits grow
+    one chunk per side per round, up to NEIGHBOR_WINDOW chunks, while the
+    whole context stays within CONTEXT_TOKEN_BUDGET. A side stops growing
+    at the document's edge, a deleted chunk or a chunk already in the
+    context. Expanded hits keep their own metadata.
+    """
+    window = settings.NEIGHBOR_WINDOW
+    if window <= 0 or not docs:
+        return docs
+    index_path = collection_path(collection)
+    sequences, positions = manifest.load_adjacency(index_path)
+    tombstones = manifest.load_tombstones(index_path)
+
+    anchors = []
+    for rank, doc in enumerate(docs[:settings.NEIGHBOR_EXPAND_HITS]):
+        content_hash = doc.metadata.get("content_hash")
+        position = positions.get((content_hash, doc.id))
+        if position is not None:
+            anchors.append((rank, sequences[content_hash], position))
+    if not anchors:
+        return docs
+
+    wanted = {
+        sequence[position + offset]
+        for _, sequence, position in anchors
+        for offset in range(-window, window + 1)
+        if offset and 0 <= position + offset < len(sequence)
+    }
+    fetched = {doc.id: doc for doc in vectorstore.get_by_ids(sorted(wanted - tombstones))}
+
+    budget = settings.CONTEXT_TOKEN_BUDGET - sum(estimate_tokens(doc.page_content) for doc in docs)
+    used = {doc.id for doc in docs}
+    passages = {rank: [docs[rank]] for rank, _, _ in anchors}
+    blocked = set()
+    for distance in range(1, window + 1):
+        for rank, sequence, position in anchors:
+            for side in (1, -1):
+                if (rank, side) in blocked:
+                    continue
+                index = position + side * distance
+                neighbor = fetched.get(sequence[index]) if 0 <= index < len(sequence) else None
+                cost = estimate_tokens(neighbor.page_content) if neighbor is not None else 0
+                if neighbor is None or neighbor.id in used or cost > budget:
+                    blocked.add((rank, side))
+                    continue
+                budget -= cost
+                used.add(neighbor.id)
+                if side > 0:
+                    passages[rank].append(neighbor)
+                else:
+                    passages[rank].insert(0, neighbor)
+
+    expanded = list(docs)
+    for rank, passage in passages.items():
+        if len(passage) > 1:
+            hit = docs[rank]
+            expanded[rank] = Document(
+                page_content=_join_passage(passage),
+                metadata={**hit.metadata, "expanded_chunks": len(passage)},
+                id=hit.id
+            )
+    return expanded
+
+
+def build_context(filtered_docs) -> tuple:
+    """Build the prompt context and the deduplicated source list."""
     context_parts = []
     for doc in filtered_docs:
         source_info = format_source_info(doc)
@@ -110,37 +384,121 @@ def answer_question(question: str) -> dict:
 
     context = "\n\n---\n\n".join(context_parts)
 
-    # Extract unique sources with metadata
+    # Extract unique sources with metadata, including where collapsed duplicates came from
     sources: List[Dict[str, Any]] = []
     seen_sources = set()
     for doc in filtered_docs:
-        source_info = format_source_info(doc)
-        # Create a unique key for deduplication
-        key = (
-            source_info['source'],
-            source_info.get('page'),
-            source_info.get('section'),
-            source_info.get('chunk_index')
-        )
-        if key not in seen_sources:
-            seen_sources.add(key)
-            sources.append(source_info)
+        cited = [format_source_info(doc)]
+        cited.extend(duplicate_source_info(doc))
+        for source_info in cited:
+            # Create a unique key for deduplication
+            key = (
+                source_info['source'],
+                source_info.get('page'),
+                source_info.get('section'),
+                source_info.get('chunk_index')
+            )
+            if key not in seen_sources:
+                seen_sources.add(key)
+                sources.append(source_info)
+
+    return context, sources
+
+
+def get_llm():
+    """LLM used for answers: a router over LLM_PROVIDERS with hedging and failover."""
+    from app.llm_router import get_router
+
+    return get_router()
+
+
+def invoke_llm(messages: list, client: Optional[str] = None, stage: str = "llm"):
+    """
+    Call the LLM once a slot is available under admission control.
+
+    Raises:
+        AdmissionRejected: If no LLM capacity is available in time or the
+            provider is rate limiting
+    """
+    llm = get_llm()
+    with llm_admission.slot(client):
+        with timed("ask", stage):
+            try:
+                return llm.invoke(messages)
+            except Exception as e:
+                if is_rate_limit(e):
+                    raise ProviderRateLimited(
+                        "LLM provider rate limit reached", retry_after=provider_retry_after(e)
+                    ) from e
+                raise
 
-    # Call LLM
-    llm = ChatGroq(
-        model="llama-3.1-8b-instant",
-        temperature=0,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
 
+def answer_question(
+    question: str,
+    collection: str = DEFAULT_COLLECTION,
+    client: Optional[str] = None,
+    history: Optional[str] = None,
+    search_query: Optional[str] = None
+) -> dict:
+    """
+    Answer a question using RAG with retrieval guardrails.
+
+    - Searches only the given collection's index
+    - Returns refusal WITHOUT calling LLM if no relevant chunks found
+    - Removes fallback logic that defeats similarity threshold
+    - Returns structured source objects with page/section info
+    - Waits for an LLM slot under admission control (fair per client)
+
+    Args:
+        history: Earlier conversation, only used to interpret the question
+        search_query: Standalone form of the question to retrieve with
+
+    Raises:
+        AdmissionRejected: If no LLM capacity is available in time or the
+            provider is rate limiting
+    """
+    with timed("ask", "load_index"):
+        vectorstore = load_vectorstore(collection)
+
+    # Embed outside the retrieve stage, which times the vector search only
+    query = search_query or question
+    embedding = vectorstore.embedding_function.embed_query(query)
+    with timed("ask", "retrieve"):
+        results = search_live(vectorstore, query, settings.TOP_K, collection, embedding)
+
+    # Filter by similarity threshold (lower score = more similar in FAISS)
+    filtered_docs = [
+        doc for doc, score in results
+        if score < settings.SIMILARITY_THRESHOLD
+    ]
+
+    # NO FALLBACK: If nothing passes threshold, refuse without LLM call
+    if not filtered_docs:
+        REFUSALS.inc()
+        return REFUSAL_RESPONSE
+
+    with timed("ask", "expand_neighbors"):
+        filtered_docs = expand_neighbors(vectorstore, filtered_docs, collection)
+
+    with timed("ask", "assemble_context"):
+        context, sources = build_context(filtered_docs)
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    conversation = ""
+    if history:
+        conversation = (
+            "Conversation so far (use it only to understand the question; "
+            f"answer from the context):\n{history}\n\n"
+        )
     messages = [
         SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(
-            content=f"Context:\n{context}\n\nQuestion:\n{question}"
+            content=f"{conversation}Context:\n{context}\n\nQuestion:\n{question}"
         )
     ]
 
-    response = llm.invoke(messages)
+    response = invoke_llm(messages, client)
 
     try:
         parsed = json.loads(response.content)
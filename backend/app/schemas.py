@@ -1,12 +1,17 @@
 """Pydantic schemas for API request/response models."""
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from app.index_store import DEFAULT_COLLECTION
 
 
 class QueryRequest(BaseModel):
     """Request model for /ask endpoint."""
     question: str
+    collection: str = DEFAULT_COLLECTION
+    # Continue a conversation; the server keeps its history
+    session_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
 
 
 class SourceInfo(BaseModel):
@@ -22,12 +27,62 @@ class QueryResponse(BaseModel):
     answer: str
     confidence: int
     sources: List[SourceInfo]
+    session_id: Optional[str] = None
+
+
+class SearchRequest(BaseModel):
+    """Request model for /search endpoint."""
+    query: str
+    collection: str = DEFAULT_COLLECTION
+    k: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0, le=1000)
+    sources: Optional[List[str]] = None
+    section: Optional[str] = None
+    page: Optional[int] = None
+    max_score: Optional[float] = None
+
+
+class SearchHit(BaseModel):
+    """A ranked chunk with its score and location in the source document."""
+    chunk_id: Optional[str] = None
+    content: str
+    score: float
+    source: str
+    page: Optional[int] = None
+    section: Optional[str] = None
+    chunk_index: Optional[int] = None
+    total_chunks: Optional[int] = None
+    start_index: Optional[int] = None
+    end_index: Optional[int] = None
+    # Other places the same (near-duplicate) text appears
+    duplicates: List[SourceInfo] = []
+
+
+class SearchResponse(BaseModel):
+    """Response model for /search endpoint."""
+    query: str
+    collection: str
+    offset: int
+    k: int
+    hits: List[SearchHit]
+    next_offset: Optional[int] = None
 
 
 class IngestResponse(BaseModel):
     """Response model for /ingest endpoint."""
     job_id: str
     message: str
+    profile_id: Optional[str] = None
+    content_hash: Optional[str] = None
+    duplicate: bool = False
+
+
+class BulkIngestResponse(BaseModel):
+    """Response model for /ingest/bulk endpoint."""
+    job_id: str
+    message: str
+    child_job_ids: List[str]
+    skipped: List[str] = []
 
 
 class JobStatusResponse(BaseModel):
@@ -35,5 +90,54 @@ class JobStatusResponse(BaseModel):
     job_id: str
     status: str
     filename: str
+    collection: str = DEFAULT_COLLECTION
     error: Optional[str] = None
     chunks_added: int = 0
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_committed: int = 0
+    parent_id: Optional[str] = None
+    children: List["JobStatusResponse"] = []
+
+
+class JobListResponse(BaseModel):
+    """Response model for /jobs endpoint; children are listed as separate jobs."""
+    jobs: List[JobStatusResponse]
+    next_cursor: Optional[str] = None
+
+
+class CollectionInfo(BaseModel):
+    """A collection and whether its index is loaded in memory."""
+    name: str
+    resident: bool
+    documents: int
+    embedding_model: str
+
+
+class RebuildRequest(BaseModel):
+    """Optional body for /collections/{name}/rebuild; a model migrates the collection to it."""
+    model: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9][\w.-]*(/[A-Za-z0-9][\w.-]*)?$")
+
+
+class DocumentInfo(BaseModel):
+    """A document ingested into a collection."""
+    source: str
+    content_hash: str
+    chunks: int
+    ingested_at: Optional[str] = None
+
+
+class DeleteDocumentResponse(BaseModel):
+    """Response model for DELETE /documents/{source}."""
+    source: str
+    collection: str
+    documents_removed: int
+    chunks_removed: int
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for GET /ready."""
+    ready: bool
+    status: str
+    steps: Dict[str, float] = {}
+    error: Optional[str] = None
@@ -0,0 +1,246 @@
+"""Server-side conversation sessions for /ask, with bounded and compacted history."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app import rag
+from app.admission import AdmissionRejected
+from app.config import settings
+from app.logger import logger
+from app.metrics import SESSION_COMPACTIONS, SESSIONS_ACTIVE, SESSIONS_EVICTED
+
+
+REWRITE_PROMPT = """You rewrite follow-up questions for a document search engine.
+
+Rewrite the user's follow-up question as a standalone question that can be understood without the conversation. Resolve pronouns and references using the conversation, keep names, numbers and terms exactly, and do not answer it.
+
+Reply with the standalone question only."""
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation about a set of documents.
+
+Merge the new turns into the current summary. Keep the topics, names, figures and conclusions the user may refer back to; drop greetings and repetition.
+
+Reply with the updated summary only, in at most {words} words."""
+
+
+@dataclass
+class Turn:
+    """One question and the answer given to it."""
+    question: str
+    answer: str
+
+    def text(self) -> str:
+        return f"User: {self.question}\nAssistant: {self.answer}"
+
+
+@dataclass
+class Session:
+    """A conversation: a running summary of older turns plus the recent turns verbatim."""
+    session_id: str
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+    # Turns of one session are answered (and compacted) one at a time
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class SessionStore:
+    """
+    Sessions by id, least recently used first.
+
+    Sessions idle for longer than `ttl` seconds are dropped, and the least
+    recently used ones when more than `max_sessions` are held.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_sessions = max_sessions or settings.MAX_SESSIONS
+        self.ttl = settings.SESSION_TTL_SECONDS if ttl is None else ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: str) -> Session:
+        """The session with this id, started if unknown, marked as just used."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id=session_id)
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict_locked()
+            return session
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+            SESSIONS_ACTIVE.set(len(self._sessions))
+            return removed
+
+    def evict(self) -> int:
+        """Drop idle sessions, and the least recently used beyond capacity."""
+        with self._lock:
+            return self._evict_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            SESSIONS_ACTIVE.set(0)
+
+    def _evict_locked(self) -> int:
+        evicted = 0
+        if self.ttl:
+            cutoff = time.monotonic() - self.ttl
+            while self._sessions:
+                session = next(iter(self._sessions.values()))
+                if session.last_used >= cutoff:
+                    break
+                self._sessions.popitem(last=False)
+                SESSIONS_EVICTED.inc(reason="idle")
+                evicted += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            SESSIONS_EVICTED.inc(reason="capacity")
+            evicted += 1
+        SESSIONS_ACTIVE.set(len(self._sessions))
+        return evicted
+
+
+store = SessionStore()
+
+
+def truncate_tokens(text: str, tokens: int, keep_end: bool = False) -> str:
+    """Cut text to about `tokens` tokens, keeping its start (or its end)."""
+    limit = max(0, tokens) * 4
+    if len(text) <= limit:
+        return text
+    return "..." + text[len(text) - limit:] if keep_end else text[:limit] + "..."
+
+
+def format_history(session: Session) -> str:
+    """
+    The conversation as it goes into a prompt, within SESSION_HISTORY_TOKENS.
+
+    The summary comes first, then as many of the newest turns as fit; the
+    newest turn is shortened rather than left out.
+    """
+    budget = settings.SESSION_HISTORY_TOKENS
+    lines = []
+    if session.summary:
+        summary = truncate_tokens(session.summary, min(settings.SESSION_SUMMARY_TOKENS, budget))
+        lines.append(f"Summary of the earlier conversation: {summary}")
+        budget -= rag.estimate_tokens(lines[0])
+
+    recent = []
+    for turn in reversed(session.turns):
+        text = turn.text()
+        cost = rag.estimate_tokens(text)
+        if cost > budget:
+            if not recent and budget > 0:
+                recent.append(truncate_tokens(text, budget))
+            break
+        budget -= cost
+        recent.append(text)
+    return "\n\n".join(lines + recent[::-1])
+
+
+def _messages(system: str, human: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [SystemMessage(content=system), HumanMessage(content=human)]
+
+
+def standalone_question(session: Session, question: str, client: Optional[str] = None) -> str:
+    """
+    The question rewritten to stand on its own, for retrieval.
+
+    The first question of a session is used as is, and so is the question
+    when the rewrite fails.
+
+    Raises:
+        AdmissionRejected: If no LLM capacity is available in time
+    """
+    if not settings.SESSION_REWRITE_QUERIES or not (session.turns or session.summary):
+        return question
+    messages = _messages(
+        REWRITE_PROMPT,
+        f"Conversation:\n{format_history(session)}\n\nFollow-up question:\n{question}"
+    )
+    try:
+        rewritten = str(rag.invoke_llm(messages, client, stage="rewrite").content).strip()
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not rewrite follow-up question in session {session.session_id}: {e}")
+        return question
+    return rewritten[:settings.MAX_QUESTION_CHARS] or question
+
+
+def ask(session: Session, question: str, collection: str, client: Optional[str] = None) -> dict:
+    """Answer the next question of a session, retrieving with its standalone form."""
+    with session.lock:
+        history = format_history(session)
+        search_query = standalone_question(session, question, client)
+        result = rag.answer_question(
+            question,
+            collection,
+            client=client,
+            history=history or None,
+            search_query=search_query
+        )
+        session.turns.append(Turn(question=question, answer=result["answer"]))
+    return result
+
+
+def _history_tokens(session: Session) -> int:
+    return rag.estimate_tokens(session.summary) + sum(rag.estimate_tokens(turn.text()) for turn in session.turns)
+
+
+def summarize(summary: str, turns: List[Turn], client: Optional[str] = None) -> str:
+    """
+    Fold turns into a running summary of at most SESSION_SUMMARY_TOKENS.
+
+    Falls back to appending the folded questions when the LLM is
+    unavailable, so compaction never fails a conversation.
+    """
+    transcript = truncate_tokens("\n\n".join(turn.text() for turn in turns), settings.SESSION_HISTORY_TOKENS)
+    messages = _messages(
+        SUMMARY_PROMPT.format(words=settings.SESSION_SUMMARY_TOKENS * 3 // 4),
+        f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    try:
+        text = str(rag.invoke_llm(messages, client, stage="summarize").content).strip()
+        SESSION_COMPACTIONS.inc(method="llm")
+    except Exception as e:
+        logger.warning(f"Summarizing conversation failed, keeping questions only: {e}")
+        asked = " ".join(f"Asked: {turn.question}" for turn in turns)
+        text = f"{summary} {asked}".strip()
+        SESSION_COMPACTIONS.inc(method="extractive")
+    return truncate_tokens(text, settings.SESSION_SUMMARY_TOKENS, keep_end=True)
+
+
+def compact(session: Session, client: Optional[str] = None) -> None:
+    """
+    Fold older turns into the summary once the history exceeds its budget.
+
+    The SESSION_RECENT_TURNS newest turns stay verbatim. Runs after the
+    response is sent; the next turn of the session waits for it.
+    """
+    with session.lock:
+        if _history_tokens(session) <= settings.SESSION_HISTORY_TOKENS:
+            return
+        keep = max(1, settings.SESSION_RECENT_TURNS)
+        folded = session.turns[:-keep]
+        if not folded:
+            return
+        session.summary = summarize(session.summary, folded, client)
+        session.turns = session.turns[len(folded):]
+        logger.info(f"Compacted {len(folded)} turns of session {session.session_id}")
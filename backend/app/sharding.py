@@ -0,0 +1,266 @@
+"""Sharded FAISS indexes with scatter-gather search across shard workers."""
+
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.logger import logger
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+
+SHARDS_FILE = "shards.json"
+INDEX_FILE = "index.faiss"
+
+
+class _VectorOnlyEmbeddings(Embeddings):
+    """Placeholder for loading shards that are only ever searched by vector."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise RuntimeError("Shard workers search by vector and never embed text")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise RuntimeError("Shard workers search by vector and never embed text")
+
+
+def read_layout(index_path: str) -> Optional[Dict]:
+    """Shard layout of a collection, or None for a single-index collection."""
+    path = os.path.join(index_path, SHARDS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_layout(index_path: str, shards: int, partitioning: str) -> Dict:
+    """Record the shard layout of a new collection."""
+    layout = {"shards": shards, "partitioning": partitioning}
+    os.makedirs(index_path, exist_ok=True)
+    with open(os.path.join(index_path, SHARDS_FILE), "w") as f:
+        json.dump(layout, f)
+    return layout
+
+
+def shard_path(index_path: str, shard: int) -> str:
+    """Directory of one shard's FAISS index."""
+    return os.path.join(index_path, f"shard-{shard}")
+
+
+def shard_for(chunk_id: str, source: str, layout: Dict) -> int:
+    """
+    Route a chunk to a shard.
+
+    "source" partitioning keeps all chunks of a document on one shard;
+    "hash" spreads chunks evenly by id.
+    """
+    key = source if layout["partitioning"] == "source" else chunk_id
+    digest = hashlib.md5(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % layout["shards"]
+
+
+def shard_versions(index_path: str, layout: Dict) -> Tuple:
+    """File versions of every shard, used to detect changes."""
+    versions = []
+    for shard in range(layout["shards"]):
+        index_file = os.path.join(shard_path(index_path, shard), INDEX_FILE)
+        try:
+            stat = os.stat(index_file)
+            versions.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append(None)
+    return tuple(versions)
+
+
+def load_shard(path: str) -> Optional["FAISS"]:
+    """Load one shard for vector search, or None if it has no vectors yet."""
+    from app.quantization import load_index
+
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        return None
+    return load_index(path, _VectorOnlyEmbeddings())
+
+
+def _search_store(store: Optional["FAISS"], vector: List[float], k: int) -> List[Tuple["Document", float]]:
+    if store is None:
+        return []
+    return store.similarity_search_with_score_by_vector(vector, k=k)
+
+
+# State of a shard worker process: the path it serves and its loaded index
+_worker_state: Dict = {}
+
+
+def _worker_init(path: str) -> None:
+    _worker_state["path"] = path
+    _worker_state["version"] = None
+    _worker_state["store"] = None
+
+
+def _worker_refresh() -> None:
+    """Reload the worker's shard when the files on disk changed."""
+    index_file = os.path.join(_worker_state["path"], INDEX_FILE)
+    try:
+        stat = os.stat(index_file)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    if version != _worker_state["version"]:
+        _worker_state["store"] = load_shard(_worker_state["path"])
+        _worker_state["version"] = version
+
+
+def _worker_search(vector: List[float], k: int) -> List[Tuple["Document", float]]:
+    _worker_refresh()
+    return _search_store(_worker_state["store"], vector, k)
+
+
+def _worker_get_by_ids(ids: List[str]) -> List["Document"]:
+    _worker_refresh()
+    store = _worker_state["store"]
+    return store.get_by_ids(ids) if store is not None else []
+
+
+def _worker_ntotal() -> int:
+    _worker_refresh()
+    store = _worker_state["store"]
+    return store.index.ntotal if store is not None else 0
+
+
+class LocalShard:
+    """In-process shard; also the stand-in for a remote shard node."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.store = load_shard(path)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple["Document", float]]:
+        return _search_store(self.store, vector, k)
+
+    def get_by_ids(self, ids: List[str]) -> List["Document"]:
+        return self.store.get_by_ids(ids) if self.store is not None else []
+
+    @property
+    def ntotal(self) -> int:
+        return self.store.index.ntotal if self.store is not None else 0
+
+
+class ProcessShard:
+    """Shard served by a dedicated worker process that holds its index in memory."""
+
+    def __init__(self, path: str, executor: Executor):
+        self.path = path
+        self.executor = executor
+
+    def search(self, vector: List[float], k: int) -> List[Tuple["Document", float]]:
+        return self.executor.submit(_worker_search, vector, k).result()
+
+    def get_by_ids(self, ids: List[str]) -> List["Document"]:
+        return self.executor.submit(_worker_get_by_ids, ids).result()
+
+    @property
+    def ntotal(self) -> int:
+        return self.executor.submit(_worker_ntotal).result()
+
+
+# One long-lived worker process per shard directory
+_process_workers: Dict[str, ProcessPoolExecutor] = {}
+_process_workers_lock = threading.Lock()
+
+
+def _process_worker(path: str) -> ProcessPoolExecutor:
+    with _process_workers_lock:
+        executor = _process_workers.get(path)
+        if executor is None:
+            logger.info(f"Starting shard worker for {path}")
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(path,)
+            )
+            _process_workers[path] = executor
+        return executor
+
+
+# Threads fanning queries out to shards, shared by every sharded store so
+# that reloading or evicting a collection does not leave a pool behind
+_scatter_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _scatter() -> ThreadPoolExecutor:
+    global _scatter_pool
+    with _process_workers_lock:
+        if _scatter_pool is None:
+            _scatter_pool = ThreadPoolExecutor(thread_name_prefix="shard")
+        return _scatter_pool
+
+
+def shutdown_workers() -> None:
+    """Stop all shard worker processes and the scatter threads."""
+    global _scatter_pool
+    with _process_workers_lock:
+        for executor in _process_workers.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _process_workers.clear()
+        if _scatter_pool is not None:
+            _scatter_pool.shutdown(wait=False, cancel_futures=True)
+            _scatter_pool = None
+
+
+class ShardedVectorStore:
+    """
+    Read-only facade over the shards of one collection.
+
+    Embeds the query once, scatters the vector to every shard in
+    parallel and merges the per-shard top-k by distance. Exposes the
+    parts of the FAISS vector store interface used by the query path.
+    """
+
+    def __init__(self, shards: List, embedding_function: Embeddings):
+        self.shards = shards
+        self.embedding_function = embedding_function
+
+    @classmethod
+    def open(cls, index_path: str, embedding_function: Embeddings, backend: Optional[str] = None):
+        """Open a sharded collection with local or process-backed shards."""
+        layout = read_layout(index_path)
+        backend = backend or settings.SHARD_BACKEND
+        shards = []
+        for shard in range(layout["shards"]):
+            path = shard_path(index_path, shard)
+            if backend == "process":
+                shards.append(ProcessShard(path, _process_worker(path)))
+            else:
+                shards.append(LocalShard(path))
+        return cls(shards, embedding_function)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs):
+        """Scatter a vector query to all shards and gather the global top-k."""
+        futures = [_scatter().submit(shard.search, embedding, k) for shard in self.shards]
+        results = [pair for future in futures for pair in future.result()]
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        """Embed the query once and search every shard."""
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k=k)
+
+    def get_by_ids(self, ids: List[str]) -> List["Document"]:
+        """Fetch chunks by id from whichever shards hold them."""
+        futures = [_scatter().submit(shard.get_by_ids, ids) for shard in self.shards]
+        return [doc for future in futures for doc in future.result()]
+
+    @property
+    def ntotal(self) -> int:
+        """Total vectors across shards."""
+        return sum(shard.ntotal for shard in self.shards)
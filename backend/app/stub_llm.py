@@ -0,0 +1,97 @@
+"""Stub OpenAI/Groq-compatible chat completions server for load tests without provider quota."""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class StubConfig:
+    """Simulated provider behaviour."""
+    latency: float = 0.3          # seconds before the first token
+    jitter: float = 0.1           # +/- uniform noise on latency
+    tokens_per_second: float = 400.0
+    completion_tokens: int = 80
+    error_rate: float = 0.0       # fraction of calls answered with 429
+
+
+def completion_seconds(config: StubConfig, rng: random.Random) -> float:
+    """Simulated duration of one completion: time to first token plus generation."""
+    latency = max(0.0, config.latency + rng.uniform(-config.jitter, config.jitter))
+    generation = config.completion_tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+    return latency + generation
+
+
+def answer_content(completion_tokens: int) -> str:
+    """An answer in the JSON shape the RAG prompt asks for, about completion_tokens words long."""
+    filler = " ".join(["stub"] * max(0, completion_tokens - 8))
+    return json.dumps({"answer": f"Stub answer from the load-test server. {filler}".strip(), "confidence": 7})
+
+
+def create_app(config: StubConfig, seed: int = 0) -> FastAPI:
+    """Chat completions app serving both the OpenAI and Groq URL layouts."""
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(seed)
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(completion_seconds(config, rng))
+        if rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+                headers={"retry-after": "1"}
+            )
+
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer_content(config.completion_tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": config.completion_tokens,
+                "total_tokens": prompt_tokens + config.completion_tokens,
+            },
+        }
+
+    # Groq clients post under /openai/v1, OpenAI clients under /v1
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub chat completions server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=StubConfig.latency, help="Seconds to first token")
+    parser.add_argument("--jitter", type=float, default=StubConfig.jitter)
+    parser.add_argument("--tokens-per-second", type=float, default=StubConfig.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=StubConfig.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate)
+    args = parser.parse_args()
+
+    stub = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate
+    )
+    uvicorn.run(create_app(stub), host=args.host, port=args.port, log_level="warning")
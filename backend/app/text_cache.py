@@ -0,0 +1,84 @@
+"""Persisted per-page extracted text, keyed by file hash, so re-chunking skips parsing."""
+
+import gzip
+import json
+import os
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.logger import logger
+
+
+# Bump when the stored layout or the extraction (loader, metadata enhancement) changes
+CACHE_VERSION = 1
+
+# Per-document metadata re-attached on load rather than stored
+UNCACHED_METADATA = ("source", "content_hash")
+
+
+def cache_path(content_hash: str) -> str:
+    """Cache file for a document's extracted pages."""
+    return os.path.join(settings.TEXT_CACHE_PATH, content_hash[:2], f"{content_hash}.json.gz")
+
+
+def store_pages(content_hash: str, documents: List[Document]) -> None:
+    """
+    Persist a document's extracted pages (text plus page number and section).
+
+    Written atomically as gzipped JSON; a cache write failure never fails
+    ingestion.
+    """
+    if not settings.TEXT_CACHE_ENABLED:
+        return
+    path = cache_path(content_hash)
+    try:
+        write_pages(path, documents)
+    except OSError as e:
+        logger.warning(f"Could not cache extracted text for {content_hash}: {e}")
+
+
+def load_pages(content_hash: str, source_name: str) -> Optional[List[Document]]:
+    """Cached pages of a document as it would be loaded, or None if not cached."""
+    if not settings.TEXT_CACHE_ENABLED:
+        return None
+    return read_pages(cache_path(content_hash), content_hash, source_name)
+
+
+def write_pages(path: str, documents: List[Document]) -> None:
+    """Atomically write pages to path as gzipped JSON."""
+    pages = [
+        {
+            "text": doc.page_content,
+            "metadata": {k: v for k, v in doc.metadata.items() if k not in UNCACHED_METADATA},
+        }
+        for doc in documents
+    ]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "pages": pages}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_pages(path: str, content_hash: str, source_name: str) -> Optional[List[Document]]:
+    """Pages written by write_pages, or None if missing, unreadable or of another version."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable text cache {path}: {e}")
+        return None
+    if data.get("version") != CACHE_VERSION:
+        return None
+
+    return [
+        Document(
+            page_content=page["text"],
+            metadata={**page["metadata"], "source": source_name, "content_hash": content_hash}
+        )
+        for page in data["pages"]
+    ]
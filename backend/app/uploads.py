@@ -0,0 +1,230 @@
+"""Streaming upload handling with size limits and content-addressed storage."""
+
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+import threading
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+# Maps content hash -> original filename for files stored under hashed names
+SOURCES_FILE = ".sources.json"
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+_sources_lock = threading.Lock()
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class InvalidArchive(Exception):
+    """Raised when an archive is corrupt or not a zip or tar file."""
+
+
+@dataclass
+class StoredUpload:
+    """An uploaded file written to disk under its content hash."""
+    path: str
+    filename: str
+    content_hash: str
+    size: int
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash a file on disk in large blocks."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def load_source_names(upload_dir: str) -> Dict[str, str]:
+    """Load the content hash -> original filename map of an upload directory."""
+    path = os.path.join(upload_dir, SOURCES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _record_source_name(upload_dir: str, content_hash: str, filename: str) -> None:
+    """Record the name content was first uploaded as; later names for the same bytes are ignored."""
+    with _sources_lock:
+        names = load_source_names(upload_dir)
+        if content_hash in names:
+            return
+        names[content_hash] = filename
+        path = os.path.join(upload_dir, SOURCES_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(names, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+
+def source_name_for(file_path: str) -> str:
+    """Original filename of a stored upload, falling back to its basename."""
+    filename = os.path.basename(file_path)
+    content_hash, _ = os.path.splitext(filename)
+    names = load_source_names(os.path.dirname(file_path) or ".")
+    return names.get(content_hash, filename)
+
+
+async def save_upload(
+    file: UploadFile,
+    upload_dir: str,
+    max_bytes: Optional[int] = None
+) -> StoredUpload:
+    """
+    Stream an upload to disk in large chunks, hashing while writing.
+
+    The file is written to a temporary file and then moved to
+    <sha256><ext> in upload_dir, so identical content is stored once.
+
+    Raises:
+        UploadTooLarge: If the upload exceeds max_bytes
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    os.makedirs(upload_dir, exist_ok=True)
+    filename = os.path.basename(file.filename or "upload")
+    extension = os.path.splitext(filename)[1].lower()
+
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(
+                        f"File exceeds the maximum upload size of {max_bytes} bytes"
+                    )
+                hasher.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+
+        final_path = _move_to_content_address(tmp_path, hasher.hexdigest(), extension, upload_dir)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    content_hash = hasher.hexdigest()
+    await run_in_threadpool(_record_source_name, upload_dir, content_hash, filename)
+    return StoredUpload(
+        path=final_path,
+        filename=filename,
+        content_hash=content_hash,
+        size=size
+    )
+
+
+def _move_to_content_address(tmp_path: str, content_hash: str, extension: str, upload_dir: str) -> str:
+    """Move a fully written temp file to <sha256><ext>, keeping any existing copy."""
+    final_path = os.path.join(upload_dir, f"{content_hash}{extension}")
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    return final_path
+
+
+def store_stream(fileobj: BinaryIO, filename: str, upload_dir: str, max_bytes: int) -> StoredUpload:
+    """Synchronous counterpart of save_upload for file objects such as archive members."""
+    filename = os.path.basename(filename)
+    extension = os.path.splitext(filename)[1].lower()
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: fileobj.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(
+                        f"{filename} exceeds the maximum upload size of {max_bytes} bytes"
+                    )
+                hasher.update(chunk)
+                out.write(chunk)
+        final_path = _move_to_content_address(tmp_path, hasher.hexdigest(), extension, upload_dir)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    content_hash = hasher.hexdigest()
+    _record_source_name(upload_dir, content_hash, filename)
+    return StoredUpload(path=final_path, filename=filename, content_hash=content_hash, size=size)
+
+
+def is_archive(filename: str) -> bool:
+    """Whether a filename looks like a supported archive."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def is_supported(filename: str) -> bool:
+    """Whether a filename is a document type we can ingest."""
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def _archive_members(archive_path: str):
+    """Yield (name, open-file callable) for regular files in a zip or tar archive."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, lambda info=info: archive.open(info)
+    else:
+        with tarfile.open(archive_path) as archive:
+            for member in archive:
+                # Skip directories, links and devices
+                if member.isfile():
+                    yield member.name, lambda member=member: archive.extractfile(member)
+
+
+def extract_archive(archive_path: str, upload_dir: str) -> Tuple[List[StoredUpload], List[str]]:
+    """
+    Store the supported documents of an archive as content-addressed uploads.
+
+    Members are streamed straight to their hashed names; paths inside the
+    archive are never used on disk. Each member is limited to
+    MAX_UPLOAD_BYTES and the archive to MAX_ARCHIVE_MEMBERS documents.
+
+    Raises:
+        InvalidArchive: If the archive is corrupt or not a zip or tar file
+        UploadTooLarge: If a member or the member count is over its limit
+
+    Returns:
+        Stored documents and the names of skipped members
+    """
+    stored: List[StoredUpload] = []
+    skipped: List[str] = []
+    try:
+        for name, open_member in _archive_members(archive_path):
+            if not is_supported(name) or os.path.basename(name).startswith("."):
+                skipped.append(name)
+                continue
+            if len(stored) >= settings.MAX_ARCHIVE_MEMBERS:
+                raise UploadTooLarge(
+                    f"Archive has more than {settings.MAX_ARCHIVE_MEMBERS} documents"
+                )
+            with open_member() as member:
+                stored.append(store_stream(member, name, upload_dir, settings.MAX_UPLOAD_BYTES))
+    except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise InvalidArchive(str(e)) from e
+    return stored, skipped
@@ -0,0 +1,402 @@
+"""Write-ahead log for ingestion jobs and crash recovery of collection files."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.logger import logger
+from app.metrics import INDEX_RECOVERIES
+from app import manifest, sharding, text_cache
+from app.index_store import COLLECTION_NAME_PATTERN, DEFAULT_COLLECTION, INDEX_FILE, collection_path, write_lock
+
+
+JOURNAL_FILE = "journal.jsonl"
+
+# Written last when an index is saved; sizes and CRC32s of the FAISS files
+CHECKSUM_FILE = "checksums.json"
+FAISS_FILES = (INDEX_FILE, "index.pkl")
+STAGING_DIR = ".staging"
+DAMAGED_SUFFIX = ".damaged"
+
+_current: ContextVar[Optional["JobJournal"]] = ContextVar("current_journal", default=None)
+
+
+def _fsync(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def text_digest(text: str) -> str:
+    """Key of a chunk text in the journal's embedded batches."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class JobJournal:
+    """
+    Append-only log of one ingestion job, one JSON record per line.
+
+    The first record holds what is needed to run the job again; later
+    records are checkpoints a resumed run reuses: documents parsed, chunk
+    batches embedded (vectors in .npy files beside the log) and the index
+    write. Every record is fsynced, and a torn last line is ignored.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.path = os.path.join(settings.WAL_PATH, job_id)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def begin(cls, job_id: str, kind: str, **params) -> "JobJournal":
+        """Start the journal of an accepted job with its parameters."""
+        journal = cls(job_id)
+        os.makedirs(journal.path, exist_ok=True)
+        journal.append("begin", kind=kind, created=time.time(), **params)
+        return journal
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, JOURNAL_FILE))
+
+    def records(self) -> List[Dict]:
+        records = []
+        try:
+            with open(os.path.join(self.path, JOURNAL_FILE)) as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Torn write at the moment of the crash
+                        break
+        except FileNotFoundError:
+            pass
+        return records
+
+    @property
+    def params(self) -> Dict:
+        """Parameters the job was accepted with ({} if the begin record never reached disk)."""
+        records = self.records()
+        return records[0] if records and records[0]["op"] == "begin" else {}
+
+    def append(self, op: str, **fields) -> None:
+        line = json.dumps({"op": op, **fields}) + "\n"
+        with self._lock:
+            with open(os.path.join(self.path, JOURNAL_FILE), "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def repair(self) -> None:
+        """Cut a torn last line so records appended on resume stay readable."""
+        path = os.path.join(self.path, JOURNAL_FILE)
+        with open(path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def finish(self) -> None:
+        """Drop the journal once its job has completed or failed."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _pages_path(self, content_hash: str) -> str:
+        return os.path.join(self.path, f"pages-{content_hash}.json.gz")
+
+    def record_pages(self, content_hash: str, documents: List[Document]) -> None:
+        """Checkpoint a parsed document; pages are kept here unless the text cache holds them."""
+        if not (settings.TEXT_CACHE_ENABLED and os.path.exists(text_cache.cache_path(content_hash))):
+            text_cache.write_pages(self._pages_path(content_hash), documents)
+        self.append("parsed", content_hash=content_hash, pages=len(documents))
+
+    def load_pages(self, content_hash: str, source_name: str) -> Optional[List[Document]]:
+        """Pages of a document parsed before the restart, if kept in the journal."""
+        return text_cache.read_pages(self._pages_path(content_hash), content_hash, source_name)
+
+    def record_batch(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        """Checkpoint a batch of embedded chunk texts."""
+        name = f"batch-{uuid.uuid4().hex[:12]}.npy"
+        path = os.path.join(self.path, name)
+        with open(path, "wb") as f:
+            np.save(f, np.asarray(vectors, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        self.append("embedded", file=name, model=model, digests=[text_digest(text) for text in texts])
+
+    def embedded_vectors(self, model: str) -> Dict[str, List[float]]:
+        """Vectors of chunk texts embedded with model before the restart, by text digest."""
+        vectors = {}
+        for record in self.records():
+            if record["op"] != "embedded" or record["model"] != model:
+                continue
+            try:
+                batch = np.load(os.path.join(self.path, record["file"]))
+            except (OSError, ValueError):
+                continue
+            vectors.update(zip(record["digests"], batch.tolist()))
+        return vectors
+
+    def record_commit(self, collection: str, documents: Dict[str, List[str]]) -> None:
+        """Log an index write (chunk ids per document) before it starts."""
+        self.append("commit", collection=collection, documents=documents)
+
+    def record_committed(self) -> None:
+        self.append("committed")
+
+    def _last_commit(self) -> Tuple[Optional[Dict], bool]:
+        commit, done = None, False
+        for record in self.records():
+            if record["op"] == "commit":
+                commit, done = record, False
+            elif record["op"] == "committed":
+                done = True
+        return commit, done
+
+    def committed(self) -> Optional[Dict[str, List[str]]]:
+        """Chunk ids per document of the job's completed index write, if any."""
+        commit, done = self._last_commit()
+        return commit["documents"] if commit is not None and done else None
+
+    def discard_partial_write(self) -> None:
+        """
+        Settle an index write the crash interrupted.
+
+        Documents the manifest recorded are kept; chunks of the others may
+        already be in the index, so they are tombstoned and the documents
+        are ingested again by the resumed job.
+        """
+        commit, done = self._last_commit()
+        if commit is None or done:
+            return
+        collection = commit["collection"]
+        index_path = collection_path(collection)
+        with write_lock(collection):
+            known = manifest.load_manifest(index_path)["documents"]
+            unrecorded = {h: ids for h, ids in commit["documents"].items() if h not in known}
+            orphans = manifest.tombstone_chunks(
+                [chunk_id for chunk_ids in unrecorded.values() for chunk_id in chunk_ids], index_path
+            )
+        if orphans:
+            INDEX_RECOVERIES.inc(action="orphans")
+            logger.warning(f"Tombstoned {len(orphans)} chunks of interrupted job {self.job_id} in '{collection}'")
+        if not unrecorded:
+            self.record_committed()
+
+
+def begin(job_id: str, kind: str, **params) -> Optional[JobJournal]:
+    """Journal an accepted job, or nothing when WAL_ENABLED is off."""
+    if not settings.WAL_ENABLED:
+        return None
+    return JobJournal.begin(job_id, kind, **params)
+
+
+def finish(job_id: str) -> None:
+    JobJournal(job_id).finish()
+
+
+@contextmanager
+def journal(job_id: str) -> Iterator[Optional[JobJournal]]:
+    """Checkpoint work done inside the block to the job's journal, if it has one."""
+    current = JobJournal(job_id)
+    token = _current.set(current if current.exists() else None)
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def current() -> Optional[JobJournal]:
+    """Journal of the job running in this context, if any."""
+    return _current.get()
+
+
+def interrupted_jobs() -> List[JobJournal]:
+    """
+    Journals of jobs a previous process accepted but did not finish, oldest first.
+
+    Their interrupted index writes are settled, so each can run again.
+    """
+    if not os.path.isdir(settings.WAL_PATH):
+        return []
+    journals = []
+    for job_id in os.listdir(settings.WAL_PATH):
+        journal = JobJournal(job_id)
+        if not journal.params:
+            journal.finish()
+            continue
+        journal.repair()
+        journal.discard_partial_write()
+        journals.append(journal)
+    return sorted(journals, key=lambda journal: journal.params["created"])
+
+
+def _checksum(path: str) -> Dict[str, int]:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(block, crc)
+    return {"size": os.path.getsize(path), "crc32": crc}
+
+
+def save_faiss(vectorstore, path: str) -> None:
+    """
+    Save a FAISS store so that a crash leaves either the old or the new files.
+
+    The files and their checksums are written and fsynced in a staging
+    directory first; the checksum file is the commit point. The files are
+    then moved into place, and recover_collections finishes a move the
+    crash interrupted.
+    """
+    staging = os.path.join(path, STAGING_DIR)
+    shutil.rmtree(staging, ignore_errors=True)
+    vectorstore.save_local(staging)
+    checksums = {}
+    for name in FAISS_FILES:
+        _fsync(os.path.join(staging, name))
+        checksums[name] = _checksum(os.path.join(staging, name))
+    tmp_path = os.path.join(staging, f"{CHECKSUM_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(checksums, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(staging, CHECKSUM_FILE))
+    _install_staged(path)
+
+
+def _install_staged(path: str) -> None:
+    staging = os.path.join(path, STAGING_DIR)
+    # The checksum file moves last: while it is staged, the install is unfinished
+    for name in FAISS_FILES + (CHECKSUM_FILE,):
+        staged = os.path.join(staging, name)
+        if os.path.exists(staged):
+            os.replace(staged, os.path.join(path, name))
+    _fsync(path)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def verify_index(path: str, full: bool = False) -> bool:
+    """
+    Whether the FAISS files at path are intact.
+
+    Files are compared with the sizes recorded when they were saved, and
+    with full, their CRC32s. Indexes saved before checksums existed are
+    only checked for having both files.
+    """
+    present = [os.path.exists(os.path.join(path, name)) for name in FAISS_FILES]
+    if not any(present):
+        return True
+    if not all(present):
+        return False
+    try:
+        with open(os.path.join(path, CHECKSUM_FILE)) as f:
+            checksums = json.load(f)
+    except FileNotFoundError:
+        return True
+    except ValueError:
+        return False
+    for name in FAISS_FILES:
+        file_path = os.path.join(path, name)
+        expected = checksums.get(name, {})
+        if os.path.getsize(file_path) != expected.get("size"):
+            return False
+        if full and _checksum(file_path)["crc32"] != expected.get("crc32"):
+            return False
+    return True
+
+
+def _collection_dirs() -> Dict[str, str]:
+    """Directory of every collection with anything on disk, including a half-finished swap."""
+    dirs = {}
+    if any(os.path.exists(f"{settings.VECTOR_DB_PATH}{suffix}") for suffix in ("", ".old", ".rebuild")):
+        dirs[DEFAULT_COLLECTION] = settings.VECTOR_DB_PATH
+    if os.path.isdir(settings.COLLECTIONS_PATH):
+        for entry in os.listdir(settings.COLLECTIONS_PATH):
+            name = entry.rsplit(".", 1)[0] if entry.endswith((".old", ".rebuild")) else entry
+            if COLLECTION_NAME_PATTERN.match(name) and name != DEFAULT_COLLECTION:
+                dirs[name] = collection_path(name)
+    return dirs
+
+
+def _finish_swap(path: str) -> None:
+    """Complete a rebuild swap the crash interrupted, and drop an unfinished rebuild."""
+    old_path, build_path = f"{path}.old", f"{path}.rebuild"
+    if not os.path.exists(path) and os.path.exists(old_path):
+        # The build was complete when the swap began
+        if os.path.exists(build_path):
+            os.rename(build_path, path)
+        else:
+            os.rename(old_path, path)
+        INDEX_RECOVERIES.inc(action="swap")
+        logger.warning(f"Finished interrupted index swap of {path}")
+    shutil.rmtree(old_path, ignore_errors=True)
+    shutil.rmtree(build_path, ignore_errors=True)
+
+
+def _recover_faiss_dir(path: str, full: bool) -> bool:
+    """Settle a staged save and verify one FAISS directory; False if it is damaged."""
+    staging = os.path.join(path, STAGING_DIR)
+    if os.path.isdir(staging):
+        if os.path.exists(os.path.join(staging, CHECKSUM_FILE)):
+            _install_staged(path)
+            logger.warning(f"Completed interrupted index save in {path}")
+        else:
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.warning(f"Discarded incomplete index save in {path}")
+        INDEX_RECOVERIES.inc(action="staged_save")
+
+    if settings.INTEGRITY_CHECK == "off" or verify_index(path, full):
+        return True
+    for name in FAISS_FILES + (CHECKSUM_FILE,):
+        if os.path.exists(os.path.join(path, name)):
+            os.replace(os.path.join(path, name), os.path.join(path, name + DAMAGED_SUFFIX))
+    INDEX_RECOVERIES.inc(action="damaged")
+    logger.error(f"Index files in {path} are damaged; moved aside as *{DAMAGED_SUFFIX}")
+    return False
+
+
+def recover_collections() -> List[str]:
+    """
+    Repair collection files a crash left inconsistent; run before serving.
+
+    Interrupted rebuild swaps and staged index saves are finished (or
+    rolled back), temporary files removed, and index files checked as
+    INTEGRITY_CHECK says: `fast` compares sizes, `full` also checksums.
+    Damaged index files are moved aside.
+
+    Returns:
+        Collections whose index was damaged and must be rebuilt
+    """
+    full = settings.INTEGRITY_CHECK == "full"
+    damaged = []
+    for name, path in sorted(_collection_dirs().items()):
+        _finish_swap(path)
+        if not os.path.isdir(path):
+            continue
+        for root, _, files in os.walk(path):
+            for file in files:
+                if ".tmp" in file:
+                    os.remove(os.path.join(root, file))
+
+        layout = sharding.read_layout(path)
+        faiss_dirs = [path] if layout is None else [
+            sharding.shard_path(path, shard) for shard in range(layout["shards"])
+        ]
+        # Check every shard, so each damaged one is moved aside
+        results = [_recover_faiss_dir(faiss_dir, full) for faiss_dir in faiss_dirs if os.path.isdir(faiss_dir)]
+        if not all(results):
+            damaged.append(name)
+    return damaged
@@ -0,0 +1,127 @@
+"""Background warm-up of heavy dependencies, the embedding model and the default index."""
+
+import argparse
+import importlib
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from app.logger import logger
+
+
+# Modules deferred at import time and loaded during warm-up instead
+DEFERRED_MODULES = (
+    "faiss",
+    "langchain_community.vectorstores.faiss",
+    "langchain_community.document_loaders",
+    "langchain_text_splitters",
+    "langchain_groq",
+)
+
+
+@dataclass
+class WarmupState:
+    """Progress of the warm-up phase, reported by /ready."""
+    status: str = "pending"  # pending | running | ready | failed
+    error: Optional[str] = None
+    steps: Dict[str, float] = field(default_factory=dict)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+
+state = WarmupState()
+_state_lock = threading.Lock()
+
+
+def _import_deferred() -> None:
+    for module in DEFERRED_MODULES:
+        importlib.import_module(module)
+
+
+def _load_embeddings() -> None:
+    from app.rag import get_query_embeddings
+
+    # The first inference initializes kernels and thread pools
+    get_query_embeddings().embed_query("warm-up")
+
+
+def _load_default_index() -> None:
+    from app.index_store import DEFAULT_COLLECTION, index_exists
+    from app.rag import load_vectorstore
+
+    if index_exists(DEFAULT_COLLECTION):
+        load_vectorstore(DEFAULT_COLLECTION)
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "imports": _import_deferred,
+    "embeddings": _load_embeddings,
+    "index": _load_default_index,
+}
+
+
+def mark_ready() -> None:
+    """Report ready without warming up (WARMUP_ENABLED=false)."""
+    with _state_lock:
+        state.status = "ready"
+
+
+def warm_up() -> WarmupState:
+    """Run every warm-up step in order, recording how long each took."""
+    with _state_lock:
+        if state.status in ("running", "ready"):
+            return state
+        state.status = "running"
+        state.error = None
+        state.started_at = time.time()
+
+    try:
+        for name, step in WARMUP_STEPS.items():
+            start = time.perf_counter()
+            step()
+            state.steps[name] = time.perf_counter() - start
+            logger.info(f"Warm-up step '{name}' took {state.steps[name]:.2f}s")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        state.status = "failed"
+        state.error = str(e)
+    else:
+        state.status = "ready"
+    state.finished_at = time.time()
+    return state
+
+
+def measure_import(runs: int = 5) -> Dict[str, float]:
+    """Time `import app.main` in fresh interpreters."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"median": statistics.median(timings), "min": min(timings), "max": max(timings)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup benchmark: import time and warm-up steps")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = measure_import(args.runs)
+    print(
+        f"import app.main: median={imports['median']:.3f}s "
+        f"min={imports['min']:.3f}s max={imports['max']:.3f}s ({args.runs} runs)"
+    )
+    result = warm_up()
+    for name, seconds in result.steps.items():
+        print(f"warm-up {name:10s} {seconds:.3f}s")
+    print(f"status: {result.status}" + (f" ({result.error})" if result.error else ""))
@@ -10,6 +10,22 @@ from fastapi.testclient import TestClient
 
 from app.main import app
 from app.config import settings
+from app.rag import index_registry
+from app.sessions import store as session_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dirs(temp_dir, monkeypatch):
+    """Point uploads and vector stores at a temporary directory."""
+    uploads_path = os.path.join(temp_dir, "data", "uploads")
+    monkeypatch.setattr("app.main.UPLOAD_DIR", uploads_path)
+    monkeypatch.setattr(settings, "DOCS_PATH", uploads_path)
+    monkeypatch.setattr(settings, "VECTOR_DB_PATH", os.path.join(temp_dir, "data", "vectorstore"))
+    monkeypatch.setattr(settings, "COLLECTIONS_PATH", os.path.join(temp_dir, "data", "collections"))
+    monkeypatch.setattr(settings, "TEXT_CACHE_PATH", os.path.join(temp_dir, "data", "text_cache"))
+    monkeypatch.setattr(settings, "WAL_PATH", os.path.join(temp_dir, "data", "wal"))
+    index_registry.clear()
+    session_store.clear()
 
 
 @pytest.fixture
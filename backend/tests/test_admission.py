@@ -0,0 +1,128 @@
+"""Tests for LLM admission control and load shedding."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.admission import (
+    AdmissionController,
+    ProviderRateLimited,
+    QueueFull,
+    QueueTimeout,
+    is_rate_limit,
+)
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class TestAdmissionController:
+    """Tests for the concurrency limit, queue bounds and deadlines."""
+
+    def test_limits_concurrency_and_times_out(self):
+        """Callers beyond max_concurrent should wait and give up at the deadline."""
+        controller = AdmissionController(max_concurrent=2, max_queue=4, queue_timeout=0.05)
+        controller.acquire("a")
+        controller.acquire("b")
+
+        with pytest.raises(QueueTimeout) as excinfo:
+            controller.acquire("c")
+
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.retry_after >= 1
+        assert controller.stats() == {"active": 2, "queued": 0, "clients_waiting": 0}
+
+    def test_full_queue_rejected_immediately(self):
+        """A full queue should reject with 429 without waiting."""
+        controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+        controller.acquire("a")
+
+        start = time.monotonic()
+        with pytest.raises(QueueFull) as excinfo:
+            controller.acquire("b")
+
+        assert excinfo.value.status_code == 429
+        assert time.monotonic() - start < 1
+
+    def test_per_client_queue_share(self):
+        """One client should not be able to fill the whole queue."""
+        controller = AdmissionController(max_concurrent=1, max_queue=10, max_queued_per_client=1, queue_timeout=5)
+        controller.acquire("busy")
+        waiter = threading.Thread(target=controller.acquire, args=("busy",))
+        waiter.start()
+        wait_for(lambda: controller.stats()["queued"] == 1)
+
+        with pytest.raises(QueueFull):
+            controller.acquire("busy")
+
+        controller.release()
+        waiter.join()
+
+    def test_clients_served_round_robin(self):
+        """Queued clients should take turns instead of first-come-first-served."""
+        controller = AdmissionController(max_concurrent=1, max_queue=10, max_queued_per_client=10, queue_timeout=5)
+        controller.acquire("holder")
+        order = []
+        threads = []
+
+        def request(client, name):
+            with controller.slot(client):
+                order.append(name)
+
+        for client, name in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")):
+            thread = threading.Thread(target=request, args=(client, name))
+            thread.start()
+            threads.append(thread)
+            queued = len(threads)
+            wait_for(lambda: controller.stats()["queued"] == queued)
+
+        controller.release()
+        for thread in threads:
+            thread.join()
+
+        assert order == ["a1", "b1", "a2", "a3"]
+
+
+class TestLoadShedding:
+    """Tests for surfacing overload as fast 429/503 responses."""
+
+    def test_rejection_returns_retry_after(self, test_client):
+        """/ask should map admission rejections to their status with Retry-After."""
+        with patch("app.main.answer_question", side_effect=QueueFull("LLM queue is full", retry_after=7)):
+            response = test_client.post("/ask", json={"question": "Busy?"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+
+    @patch("app.rag.load_vectorstore")
+    @patch("app.rag.get_llm")
+    def test_provider_rate_limit_is_not_a_500(self, mock_llm, mock_vectorstore):
+        """A provider 429 should become ProviderRateLimited with the provider's Retry-After."""
+        from app.rag import answer_question
+
+        doc = MagicMock(page_content="Context", metadata={"source": "a.txt"})
+        mock_vectorstore.return_value.similarity_search_with_score_by_vector.return_value = [(doc, 0.1)]
+        error = Exception("rate limited")
+        error.status_code = 429
+        error.response = MagicMock(status_code=429, headers={"retry-after": "3"})
+        mock_llm.return_value.invoke.side_effect = error
+
+        with pytest.raises(ProviderRateLimited) as excinfo:
+            answer_question("Q?")
+
+        assert excinfo.value.retry_after == 3
+
+    def test_rate_limit_detection(self):
+        """Only 429-style errors should count as rate limits."""
+        class RateLimitError(Exception):
+            pass
+
+        assert is_rate_limit(RateLimitError())
+        assert not is_rate_limit(ValueError("bad request"))
@@ -0,0 +1,134 @@
+"""Tests for single-flight coalescing of identical questions."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from app.coalescing import SingleFlight, normalize_question
+from app.metrics import COALESCED_REQUESTS
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_concurrently(flight, keys, fn):
+    """Call flight.do for each key from its own thread."""
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        futures = [pool.submit(flight.do, key, fn) for key in keys]
+        return [future.result() for future in futures]
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight primitive."""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Callers arriving while a key is in flight should share its result."""
+        flight = SingleFlight("shared")
+        waiting = COALESCED_REQUESTS.value(flight="shared")
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "answer"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "q", compute) for _ in range(5)]
+            # Let every caller reach the flight before the leader finishes
+            wait_for(lambda: COALESCED_REQUESTS.value(flight="shared") == waiting + 4)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ["answer"] * 5
+        assert sum(shared for _, shared in results) == 4
+
+    def test_error_propagates_and_key_forgotten(self):
+        """A failed computation should raise, and the next call should retry."""
+        flight = SingleFlight("test")
+
+        with pytest.raises(RuntimeError):
+            flight.do("q", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+        assert flight.do("q", lambda: "ok") == ("ok", False)
+        assert flight.in_flight() == 0
+
+    def test_waiter_computes_itself_when_leader_stalls(self):
+        """A follower should stop waiting after the timeout and compute on its own."""
+        flight = SingleFlight("stalled", timeout=0.05)
+        waiting = COALESCED_REQUESTS.value(flight="stalled")
+        release = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(flight.do, "q", lambda: release.wait(5) and "leader")
+            wait_for(lambda: flight.in_flight() == 1)
+            assert flight.do("q", lambda: "follower") == ("follower", False)
+            assert COALESCED_REQUESTS.value(flight="stalled") == waiting + 1
+            release.set()
+            assert leader.result() == ("leader", False)
+
+    def test_different_keys_do_not_wait_on_each_other(self):
+        """Distinct keys should compute independently."""
+        flight = SingleFlight("test")
+        results = run_concurrently(flight, ["a", "b"], lambda: threading.get_ident())
+        assert [shared for _, shared in results] == [False, False]
+
+
+class TestNormalizeQuestion:
+    """Tests for the coalescing key."""
+
+    def test_case_and_whitespace_ignored(self):
+        """Questions differing only in case or spacing should share a key."""
+        assert normalize_question("  What is  RAG?") == normalize_question("what is rag?")
+
+
+class TestAskCoalescing:
+    """Tests for coalescing on /ask."""
+
+    def test_identical_requests_call_answer_once(self, test_client):
+        """Concurrent identical /ask requests should share one answer_question call."""
+        waiting = COALESCED_REQUESTS.value(flight="ask")
+        release = threading.Event()
+        calls = []
+
+        def slow_answer(question, collection, client=None):
+            calls.append(question)
+            release.wait(5)
+            return {"answer": "Shared", "confidence": 8, "sources": []}
+
+        with patch("app.main.answer_question", side_effect=slow_answer), \
+                patch("app.main.index_generation", return_value=("v1",)):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [
+                    pool.submit(test_client.post, "/ask", json={"question": question})
+                    for question in ("What is RAG?", "what is rag?", "What  is RAG?", "What is RAG?")
+                ]
+                wait_for(lambda: COALESCED_REQUESTS.value(flight="ask") == waiting + 3)
+                release.set()
+                responses = [future.result() for future in futures]
+
+        assert len(calls) == 1
+        assert all(r.json()["answer"] == "Shared" for r in responses)
+        assert sum(r.headers.get("X-Coalesced") == "1" for r in responses) == 3
+
+    def test_new_index_generation_is_not_shared(self, test_client):
+        """Requests on different index generations should not be coalesced."""
+        from app.main import ask_flight
+
+        with patch("app.main.index_generation", side_effect=[("v1",), ("v2",)]), \
+                patch.object(ask_flight, "do", wraps=ask_flight.do) as do:
+            with patch("app.main.answer_question", return_value={"answer": "A", "confidence": 5, "sources": []}):
+                test_client.post("/ask", json={"question": "Q"})
+                test_client.post("/ask", json={"question": "Q"})
+
+        keys = [call.args[0] for call in do.call_args_list]
+        assert keys[0] != keys[1]
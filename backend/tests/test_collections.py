@@ -0,0 +1,129 @@
+"""Tests for named collections and the resident index registry."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.index_store import (
+    DEFAULT_COLLECTION,
+    IndexRegistry,
+    InvalidCollectionName,
+    collection_path,
+    validate_collection,
+)
+from app.config import settings
+
+
+def touch_index(name):
+    """Create an empty index file so the registry sees the collection."""
+    path = collection_path(name)
+    os.makedirs(path, exist_ok=True)
+    open(os.path.join(path, "index.faiss"), "w").close()
+
+
+class TestCollectionNames:
+    """Tests for collection name validation and paths."""
+
+    def test_default_collection_uses_vector_db_path(self):
+        """The default collection should keep the original index location."""
+        assert collection_path(DEFAULT_COLLECTION) == settings.VECTOR_DB_PATH
+
+    def test_named_collection_has_own_directory(self):
+        """Named collections should live under COLLECTIONS_PATH."""
+        assert collection_path("team-a") == os.path.join(settings.COLLECTIONS_PATH, "team-a")
+
+    @pytest.mark.parametrize("name", ["", "../etc", "a/b", ".hidden", "x" * 65])
+    def test_invalid_names_rejected(self, name):
+        """Names that are not safe directory names should be rejected."""
+        with pytest.raises(InvalidCollectionName):
+            validate_collection(name)
+
+
+class TestIndexRegistry:
+    """Tests for lazy loading and eviction."""
+
+    def test_loads_lazily_and_reuses(self):
+        """A collection should be loaded once and then served from memory."""
+        loads = []
+        registry = IndexRegistry(loader=lambda path: loads.append(path) or object())
+        touch_index("team-a")
+
+        first = registry.get("team-a")
+        second = registry.get("team-a")
+
+        assert first is second
+        assert len(loads) == 1
+
+    def test_lru_eviction(self):
+        """Loading past max_resident should evict the least recently used."""
+        registry = IndexRegistry(loader=lambda path: object(), max_resident=2, idle_seconds=0)
+        for name in ("a", "b", "c"):
+            touch_index(name)
+
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+
+        assert registry.resident() == ["a", "c"]
+
+    def test_idle_eviction(self):
+        """Collections idle past idle_seconds should be evicted."""
+        registry = IndexRegistry(loader=lambda path: object(), idle_seconds=0.01)
+        touch_index("a")
+        registry.get("a")
+
+        with patch("app.index_store.time.monotonic", return_value=10**9):
+            evicted = registry.evict_idle()
+
+        assert evicted == ["a"]
+        assert registry.resident() == []
+
+
+class TestCollectionIsolation:
+    """Tests for per-collection ingestion and search."""
+
+    @patch("app.rag.get_query_embeddings")
+    @patch("app.ingest.get_embeddings")
+    def test_search_only_touches_own_collection(self, mock_ingest_emb, mock_query_emb, sample_txt_file, temp_dir):
+        """A query should only see chunks ingested into its collection."""
+        from app.ingest import ingest_single_document
+        from app.rag import load_vectorstore
+
+        embeddings = DeterministicFakeEmbedding(size=32)
+        mock_ingest_emb.return_value = embeddings
+        mock_query_emb.return_value = embeddings
+
+        other_file = os.path.join(temp_dir, "other.txt")
+        with open(other_file, "w") as f:
+            f.write("Team B keeps its notes here.")
+
+        ingest_single_document(sample_txt_file, collection="team-a")
+        ingest_single_document(other_file, collection="team-b")
+
+        results = load_vectorstore("team-a").similarity_search_with_score("notes", k=10)
+        assert {doc.metadata["source"] for doc, _ in results} == {"sample.txt"}
+
+    def test_ask_unknown_collection_returns_404(self, test_client):
+        """Asking a collection without an index should return 404."""
+        response = test_client.post("/ask", json={"question": "Hi?", "collection": "missing"})
+        assert response.status_code == 404
+
+    def test_ask_invalid_collection_returns_400(self, test_client):
+        """Invalid collection names should be rejected with 400."""
+        response = test_client.post("/ask", json={"question": "Hi?", "collection": "../x"})
+        assert response.status_code == 400
+
+    def test_ingest_records_collection_on_job(self, test_client):
+        """Jobs should carry the collection they ingest into."""
+        with patch("app.main.process_ingestion_job"):
+            response = test_client.post(
+                "/ingest",
+                files={"file": ("a.txt", b"content", "text/plain")},
+                data={"collection": "team-a"}
+            )
+
+        status = test_client.get(f"/ingest/{response.json()['job_id']}/status").json()
+        assert status["collection"] == "team-a"
@@ -0,0 +1,148 @@
+"""Tests for near-duplicate chunk suppression at ingestion."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import dedup, manifest
+from app.ingest import compact_collection, delete_document, ingest_single_document, rebuild_collection
+from app.index_store import collection_path
+from app.rag import load_vectorstore, search_live
+
+
+POLICY = (
+    "Employees may work remotely up to three days per week with manager approval. "
+    "Remote work requires a secure connection and a quiet workspace. "
+    "Equipment such as laptops and monitors is provided by the company on request."
+)
+TRAVEL = (
+    "Travel expenses are reimbursed within thirty days of submitting receipts. "
+    "Economy class is required for flights shorter than six hours. "
+    "Hotel bookings must use the preferred vendor list where available."
+)
+
+
+@pytest.fixture
+def fake_embeddings():
+    """Use deterministic embeddings for both ingestion and queries."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        yield embeddings
+
+
+def write_text(temp_dir, name, text):
+    path = os.path.join(temp_dir, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+class TestMinHash:
+    """Tests for signatures and the LSH index."""
+
+    def test_similarity_tracks_shared_shingles(self):
+        """Near-identical texts should score high and unrelated texts low."""
+        revised = POLICY.replace("three days", "three working days")
+        assert dedup.similarity(dedup.signature(POLICY), dedup.signature(POLICY.upper())) == 1.0
+        assert dedup.similarity(dedup.signature(POLICY), dedup.signature(revised)) > 0.6
+        assert dedup.similarity(dedup.signature(POLICY), dedup.signature(TRAVEL)) < 0.1
+
+    def test_query_skips_excluded_chunks(self):
+        """Queries should return the match unless it is excluded (e.g. tombstoned)."""
+        lsh = dedup.MinHashLSH()
+        lsh.add("policy", dedup.signature(POLICY))
+        lsh.add("travel", dedup.signature(TRAVEL))
+
+        assert lsh.query(dedup.signature(POLICY + " Thanks.")) == "policy"
+        assert lsh.query(dedup.signature(POLICY), exclude=frozenset({"policy"})) is None
+        assert len(lsh.without(["policy"])) == 1
+
+    def test_index_round_trips(self, temp_dir):
+        """A saved index should load with the same ids and matches."""
+        lsh = dedup.MinHashLSH()
+        lsh.add("policy", dedup.signature(POLICY))
+        dedup.save_index(lsh, temp_dir)
+
+        loaded = dedup.MinHashLSH.load(os.path.join(temp_dir, dedup.DEDUP_FILE))
+        assert loaded.ids == ["policy"]
+        assert loaded.query(dedup.signature(POLICY)) == "policy"
+
+
+class TestIngestionDedup:
+    """Tests for collapsing duplicates into stored chunks."""
+
+    def test_copy_is_stored_once_with_both_sources(self, fake_embeddings, temp_dir, test_client):
+        """A second copy should add no vectors and be cited alongside the original."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        added = ingest_single_document(write_text(temp_dir, "policy-copy.txt", POLICY + "\n"))
+
+        entry = next(e for e in manifest.load_manifest()["documents"].values() if e["source"] == "policy-copy.txt")
+        assert added == 0
+        assert load_vectorstore().index.ntotal == 1
+        assert entry["chunk_ids"] == [] and len(entry["duplicates"]) == 1
+
+        hit = test_client.post("/search", json={"query": "remote work"}).json()["hits"][0]
+        assert hit["source"] == "policy.txt"
+        assert [d["source"] for d in hit["duplicates"]] == ["policy-copy.txt"]
+        filtered = test_client.post("/search", json={"query": "remote", "sources": ["policy-copy.txt"]})
+        assert len(filtered.json()["hits"]) == 1
+
+    def test_deleting_original_keeps_copy_searchable(self, fake_embeddings, temp_dir):
+        """The stored chunk should outlive its document while a copy cites it."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        ingest_single_document(write_text(temp_dir, "policy-copy.txt", POLICY + "\n"))
+
+        assert delete_document("policy.txt") == (1, 0)
+        assert [doc.metadata["source"] for doc, _ in search_live(load_vectorstore(), "remote", 5)] == ["policy-copy.txt"]
+
+        assert delete_document("policy-copy.txt") == (1, 1)
+        assert search_live(load_vectorstore(), "remote", 5) == []
+
+    def test_unrelated_documents_are_kept(self, fake_embeddings, temp_dir):
+        """Different texts should each be stored."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        ingest_single_document(write_text(temp_dir, "travel.txt", TRAVEL))
+        assert load_vectorstore().index.ntotal == 2
+
+    def test_cached_index_not_modified_by_ingestion(self, fake_embeddings, temp_dir):
+        """An index handed to a reader should stay unchanged while another job commits."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        seen = dedup.load_index(collection_path())
+
+        ingest_single_document(write_text(temp_dir, "travel.txt", TRAVEL))
+
+        assert len(seen) == 1
+        assert len(dedup.load_index(collection_path())) == 2
+
+    def test_dedup_can_be_disabled(self, fake_embeddings, temp_dir, monkeypatch):
+        """With DEDUP_ENABLED off every copy should be stored."""
+        monkeypatch.setattr("app.config.settings.DEDUP_ENABLED", False)
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        ingest_single_document(write_text(temp_dir, "policy-copy.txt", POLICY + "\n"))
+        assert load_vectorstore().index.ntotal == 2
+
+
+class TestMaintenance:
+    """Tests for duplicates across compaction and rebuilds."""
+
+    def test_compaction_prunes_signatures(self, fake_embeddings, temp_dir):
+        """Compacted chunks should leave the near-duplicate index so nothing cites them again."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        ingest_single_document(write_text(temp_dir, "travel.txt", TRAVEL))
+        delete_document("policy.txt")
+        compact_collection()
+
+        assert len(dedup.load_index(collection_path())) == 1
+        assert ingest_single_document(write_text(temp_dir, "policy-again.txt", POLICY + "\n")) == 1
+
+    def test_rebuild_keeps_duplicates(self, fake_embeddings, temp_dir):
+        """A rebuilt index should collapse the same copies and keep citing them."""
+        ingest_single_document(write_text(temp_dir, "policy.txt", POLICY))
+        ingest_single_document(write_text(temp_dir, "policy-copy.txt", POLICY + "\n"))
+
+        assert rebuild_collection() == 1
+        doc, _ = search_live(load_vectorstore(), "remote", 1)[0]
+        assert [d["source"] for d in doc.metadata["duplicates"]] == ["policy-copy.txt"]
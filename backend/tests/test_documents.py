@@ -0,0 +1,110 @@
+"""Tests for document delete/replace with tombstones and compaction."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import manifest
+from app.ingest import compact_collection, delete_document, ingest_single_document
+from app.rag import load_vectorstore, search_live
+
+
+@pytest.fixture
+def fake_embeddings():
+    """Use deterministic embeddings for both ingestion and queries."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        yield embeddings
+
+
+@pytest.fixture
+def two_documents(fake_embeddings, temp_dir):
+    """Ingest two small documents into the default collection."""
+    paths = {}
+    for name, text in (("keep.txt", "Tea is grown in Assam."), ("drop.txt", "Coffee is grown in Coorg.")):
+        paths[name] = os.path.join(temp_dir, name)
+        with open(paths[name], "w") as f:
+            f.write(text)
+        ingest_single_document(paths[name])
+    return paths
+
+
+def sources_found(question="grown", k=10):
+    """Sources of the live search results for a question."""
+    results = search_live(load_vectorstore(), question, k)
+    return {doc.metadata["source"] for doc, _ in results}
+
+
+class TestTombstones:
+    """Tests for tombstoning and compaction."""
+
+    def test_deleted_document_hidden_before_compaction(self, two_documents):
+        """Tombstoned chunks should be filtered out at search time."""
+        documents, chunks = delete_document("drop.txt")
+
+        assert (documents, chunks) == (1, 1)
+        assert load_vectorstore().index.ntotal == 2
+        assert sources_found() == {"keep.txt"}
+
+    def test_compaction_removes_vectors(self, two_documents):
+        """Compaction should drop tombstoned vectors and clear tombstones."""
+        delete_document("drop.txt")
+
+        assert compact_collection() == 1
+        assert load_vectorstore().index.ntotal == 1
+        assert manifest.load_tombstones() == frozenset()
+        assert sources_found() == {"keep.txt"}
+
+    def test_search_fetch_bounded_by_nearby_tombstones(self, two_documents):
+        """A search should not fetch one vector per tombstone in the collection."""
+        delete_document("drop.txt")
+        store = load_vectorstore()
+        tombstones = manifest.load_tombstones() | {f"gone-{n}" for n in range(1000)}
+
+        with patch("app.rag.manifest.load_tombstones", return_value=tombstones), \
+                patch.object(store, "similarity_search_with_score_by_vector",
+                             wraps=store.similarity_search_with_score_by_vector) as search:
+            results = search_live(store, "grown", 1)
+
+        assert [doc.metadata["source"] for doc, _ in results] == ["keep.txt"]
+        assert max(call.kwargs["k"] for call in search.call_args_list) <= 8
+
+    def test_delete_unknown_source(self, two_documents):
+        """Deleting an unknown source should change nothing."""
+        assert delete_document("missing.txt") == (0, 0)
+
+
+class TestDocumentEndpoints:
+    """Tests for the /documents endpoints."""
+
+    def test_delete_endpoint(self, test_client, two_documents):
+        """DELETE should tombstone the source and compact in the background."""
+        response = test_client.delete("/documents/drop.txt")
+
+        assert response.status_code == 200
+        assert response.json()["chunks_removed"] == 1
+        assert load_vectorstore().index.ntotal == 1
+        listed = test_client.get("/documents").json()
+        assert [doc["source"] for doc in listed] == ["keep.txt"]
+
+    def test_delete_endpoint_not_found(self, test_client):
+        """DELETE of an unknown source should return 404."""
+        response = test_client.delete("/documents/missing.txt")
+        assert response.status_code == 404
+
+    def test_replace_endpoint(self, test_client, two_documents):
+        """PUT should swap the document for its new version."""
+        response = test_client.put(
+            "/documents/drop.txt",
+            files={"file": ("drop-v2.txt", b"Coffee now also grows in Wayanad.", "text/plain")}
+        )
+
+        assert response.status_code == 200
+        listed = test_client.get("/documents").json()
+        versions = [doc for doc in listed if doc["source"] == "drop.txt"]
+        assert len(versions) == 1
+        assert versions[0]["content_hash"] == response.json()["content_hash"]
+        assert load_vectorstore().index.ntotal == 2
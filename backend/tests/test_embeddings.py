@@ -0,0 +1,64 @@
+"""Tests for the embedding backends."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import embeddings
+from app.config import settings
+
+
+class TestMeanPool:
+    """Tests for pooling ONNX token embeddings into sentence embeddings."""
+
+    def test_padding_is_ignored(self):
+        """Padded positions should not change a sentence's embedding."""
+        hidden = np.array([[[1.0, 0.0], [3.0, 4.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+
+        pooled = embeddings.mean_pool(hidden, mask)
+
+        np.testing.assert_allclose(pooled, [[2.0 / np.sqrt(8), 2.0 / np.sqrt(8)]])
+
+    def test_output_is_unit_length(self):
+        """Pooled embeddings should be L2-normalized like the reference model."""
+        hidden = np.random.default_rng(0).normal(size=(4, 6, 8)).astype(np.float32)
+        mask = np.ones((4, 6), dtype=np.int64)
+
+        norms = np.linalg.norm(embeddings.mean_pool(hidden, mask), axis=1)
+
+        np.testing.assert_allclose(norms, 1.0, rtol=1e-5)
+
+
+class TestBackendSelection:
+    """Tests for choosing and caching the embedding backend."""
+
+    def test_model_created_once_per_backend(self, monkeypatch):
+        """get_embeddings should reuse the loaded model."""
+        monkeypatch.setattr(embeddings, "_embeddings", {})
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx-int8")
+        with patch("app.embeddings.create_embeddings", return_value=object()) as create:
+            first = embeddings.get_embeddings()
+            second = embeddings.get_embeddings()
+
+        assert first is second
+        create.assert_called_once_with("onnx-int8", settings.EMBEDDING_MODEL)
+
+    def test_unknown_backend_rejected(self):
+        """An unknown EMBEDDING_BACKEND should fail loudly."""
+        with pytest.raises(ValueError):
+            embeddings.create_embeddings("tensorflow")
+
+
+class TestParity:
+    """Tests for the parity check between backends."""
+
+    def test_identical_backends_have_cosine_one(self):
+        """A backend compared with itself should have cosine similarity 1."""
+        model = DeterministicFakeEmbedding(size=16)
+        parity = embeddings.cosine_parity(model, model, ["a", "b", "c"])
+
+        assert parity["mean"] == pytest.approx(1.0)
+        assert parity["min"] == pytest.approx(1.0)
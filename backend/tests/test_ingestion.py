@@ -1,12 +1,19 @@
 """Tests for document ingestion and job tracking."""
 
+import io
 import os
+import zipfile
 import pytest
 from unittest.mock import patch, MagicMock
 
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.ingest import _write_to_index
+from app.uploads import extract_archive
 from app.models import (
     JobStatus,
     Job,
+    JobStore,
     create_job,
     get_job,
     update_job,
@@ -129,3 +136,204 @@ class TestJobStatusEndpoint:
         """Should return 404 for non-existent job."""
         response = test_client.get("/ingest/non-existent-id/status")
         assert response.status_code == 404
+
+
+class TestBoundedJobStore:
+    """Tests for job eviction and indexed paging."""
+
+    @staticmethod
+    def make_job(store, filename, status=JobStatus.PENDING, collection="default"):
+        job = Job(job_id=filename, status=JobStatus.PENDING, filename=filename, collection=collection)
+        store.add(job)
+        store.set_status(job, status)
+        return job
+
+    def test_finished_jobs_evicted_beyond_capacity(self):
+        """Only the oldest finished jobs should be dropped when the store is full."""
+        store = JobStore(max_jobs=2, ttl=3600)
+        active = self.make_job(store, "active", JobStatus.PROCESSING)
+        self.make_job(store, "old", JobStatus.COMPLETED)
+        self.make_job(store, "new", JobStatus.FAILED)
+
+        assert store.get("old") is None
+        assert store.get("active") is active
+        assert store.get("new") is not None
+
+    def test_expired_jobs_evicted_with_children(self):
+        """Finished jobs past their TTL should be dropped together with their children."""
+        store = JobStore(max_jobs=100, ttl=0)
+        parent = self.make_job(store, "bulk")
+        child = self.make_job(store, "child.txt", JobStatus.COMPLETED)
+        child.parent_id = parent.job_id
+        parent.child_ids.append(child.job_id)
+
+        store.set_status(parent, JobStatus.COMPLETED)
+
+        assert len(store) == 0
+        assert store.page(10) == ([], None)
+
+    def test_paging_with_filters(self):
+        """Pages should come newest first and follow the cursor through filtered jobs."""
+        store = JobStore(max_jobs=100, ttl=3600)
+        for n in range(5):
+            self.make_job(store, f"a{n}.txt", JobStatus.COMPLETED if n % 2 else JobStatus.PENDING)
+        self.make_job(store, "b.txt", JobStatus.COMPLETED, collection="hr")
+
+        first, cursor = store.page(1, status=JobStatus.COMPLETED, collection="default")
+        second, cursor = store.page(1, cursor, status=JobStatus.COMPLETED, collection="default")
+
+        assert [job.filename for job in first + second] == ["a3.txt", "a1.txt"]
+        assert cursor is None
+        assert [job.filename for job in store.page(10, filename="b.txt")[0]] == ["b.txt"]
+
+    def test_last_page_ending_at_limit_has_no_cursor(self):
+        """A page ending on the last matching job should not offer an empty next page."""
+        store = JobStore(max_jobs=100, ttl=3600)
+        self.make_job(store, "b0.txt", JobStatus.COMPLETED, collection="hr")
+        self.make_job(store, "a0.txt", JobStatus.COMPLETED)
+        for n in range(1, 3):
+            self.make_job(store, f"a{n}.txt", JobStatus.PENDING)
+
+        first, cursor = store.page(1, status=JobStatus.COMPLETED, collection="default")
+        assert [job.filename for job in first] == ["a0.txt"]
+        assert cursor is None
+
+        self.make_job(store, "a3.txt", JobStatus.COMPLETED)
+        first, cursor = store.page(1, status=JobStatus.COMPLETED, collection="default")
+        second, last = store.page(1, cursor, status=JobStatus.COMPLETED, collection="default")
+        assert [job.filename for job in first + second] == ["a3.txt", "a0.txt"]
+        assert last is None
+
+    def test_status_index_follows_transitions(self):
+        """A job should only be listed under its current status."""
+        store = JobStore(max_jobs=100, ttl=3600)
+        job = self.make_job(store, "a.txt", JobStatus.PROCESSING)
+        store.set_status(job, JobStatus.COMPLETED)
+
+        assert store.page(10, status=JobStatus.PROCESSING)[0] == []
+        assert store.page(10, status=JobStatus.COMPLETED)[0] == [job]
+        assert store.page(10, status=JobStatus.PROCESSING, collection="default")[0] == []
+        assert store.page(10, status=JobStatus.COMPLETED, collection="default")[0] == [job]
+
+
+class TestJobListEndpoint:
+    """Tests for the /jobs endpoint."""
+
+    def setup_method(self):
+        """Clear job store before each test."""
+        _job_store.clear()
+
+    def test_paginates_with_cursor(self, test_client):
+        """Following next_cursor should list every matching job once."""
+        for n in range(5):
+            job = create_job(f"doc{n}.txt")
+            update_job(job.job_id, status=JobStatus.COMPLETED)
+        create_job("pending.txt")
+
+        seen, cursor = [], None
+        while True:
+            params = {"status": "completed", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = test_client.get("/jobs", params=params).json()
+            seen.extend(job["filename"] for job in data["jobs"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [f"doc{n}.txt" for n in reversed(range(5))]
+
+    def test_invalid_filters_rejected(self, test_client):
+        """Bad cursors, statuses and collection names should be client errors."""
+        assert test_client.get("/jobs", params={"cursor": "abc"}).status_code == 400
+        assert test_client.get("/jobs", params={"status": "done"}).status_code == 422
+        assert test_client.get("/jobs", params={"collection": "bad name"}).status_code == 400
+
+
+class TestBulkIngestionEndpoint:
+    """Tests for the /ingest/bulk endpoint."""
+
+    def setup_method(self):
+        """Clear job store before each test."""
+        _job_store.clear()
+
+    @staticmethod
+    def make_zip(members):
+        """Build an in-memory zip archive from (name, text) pairs."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, text in members:
+                archive.writestr(name, text)
+        return buffer.getvalue()
+
+    @patch("app.ingest.get_embeddings")
+    def test_bulk_files_and_archive_single_write(self, mock_embeddings, test_client):
+        """Files and archive members should become children of one batched write."""
+        mock_embeddings.return_value = DeterministicFakeEmbedding(size=32)
+        archive = self.make_zip([
+            ("docs/one.txt", "Cricket is played with a bat and ball."),
+            ("docs/ignored.docx", "not supported"),
+        ])
+
+        with patch("app.ingest._write_to_index", wraps=_write_to_index) as mock_write:
+            response = test_client.post(
+                "/ingest/bulk",
+                files=[
+                    ("files", ("two.txt", b"Biryani is a rice dish.", "text/plain")),
+                    ("files", ("three.txt", b"Football is played with a ball.", "text/plain")),
+                    ("files", ("bundle.zip", archive, "application/zip")),
+                ]
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["child_job_ids"]) == 3
+        assert data["skipped"] == ["docs/ignored.docx"]
+        mock_write.assert_called_once()
+
+        status = test_client.get(f"/ingest/{data['job_id']}/status").json()
+        assert status["status"] == "completed"
+        assert status["chunks_added"] == 3
+        assert {child["filename"] for child in status["children"]} == {"one.txt", "two.txt", "three.txt"}
+        assert all(child["status"] == "completed" for child in status["children"])
+        assert all(child["parent_id"] == data["job_id"] for child in status["children"])
+
+    def test_bulk_rejects_upload_without_documents(self, test_client):
+        """Should return 400 when nothing in the upload can be ingested."""
+        response = test_client.post(
+            "/ingest/bulk",
+            files=[("files", ("notes.docx", b"content", "application/octet-stream"))]
+        )
+
+        assert response.status_code == 400
+
+    def test_bulk_rejects_malformed_archive(self, test_client):
+        """A corrupt archive should be a 400 naming it, not a server error."""
+        response = test_client.post(
+            "/ingest/bulk",
+            files=[
+                ("files", ("broken.zip", b"PK\x03\x04 not really a zip", "application/zip")),
+                ("files", ("one.txt", b"Some text.", "text/plain"))
+            ]
+        )
+
+        assert response.status_code == 400
+        assert "broken.zip" in response.json()["detail"]
+        assert test_client.post(
+            "/ingest/bulk", files=[("files", ("broken.tar.gz", b"\x1f\x8b garbage", "application/gzip"))]
+        ).status_code == 400
+
+    def test_archive_member_paths_not_used_on_disk(self, temp_dir):
+        """Archive members should be stored under their hash, not their path."""
+        archive_path = os.path.join(temp_dir, "evil.zip")
+        with open(archive_path, "wb") as f:
+            f.write(self.make_zip([("../../escape.txt", "payload")]))
+        upload_dir = os.path.join(temp_dir, "uploads")
+        os.makedirs(upload_dir)
+
+        stored, skipped = extract_archive(archive_path, upload_dir)
+
+        assert len(stored) == 1
+        assert os.path.dirname(stored[0].path) == upload_dir
+        assert stored[0].filename == "escape.txt"
+        assert not os.path.exists(os.path.join(temp_dir, "escape.txt"))
@@ -0,0 +1,175 @@
+"""Tests for hedged and failover LLM requests across providers."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.llm_router import LatencyTracker, LLMRouter
+from app.metrics import LLM_CALLS, LLM_HEDGES
+
+
+class FakeModel:
+    """Async chat model answering after a fixed delay, or failing."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+@pytest.fixture
+def hedge_settings():
+    """Short, fixed hedge delays so tests run fast."""
+    with patch("app.llm_router.settings") as mock_settings:
+        mock_settings.HEDGE_ENABLED = True
+        mock_settings.HEDGE_PERCENTILE = 95
+        mock_settings.HEDGE_DEFAULT_DELAY = 0.05
+        mock_settings.HEDGE_MIN_DELAY = 0.01
+        mock_settings.HEDGE_MAX_DELAY = 1.0
+        mock_settings.HEDGE_MIN_SAMPLES = 5
+        mock_settings.LLM_TIMEOUT_SECONDS = 5
+        yield mock_settings
+
+
+class TestHedging:
+    """Tests for racing a second provider when the first is slow."""
+
+    def test_fast_primary_wins_without_hedge(self, hedge_settings):
+        """A primary answering within the hedge delay should be the only call."""
+        primary, secondary = FakeModel("primary"), FakeModel("secondary")
+        router = LLMRouter({"primary": primary, "secondary": secondary})
+        hedges = LLM_HEDGES.value()
+
+        assert router.invoke([]) == "primary"
+        assert secondary.calls == 0
+        assert LLM_HEDGES.value() == hedges
+
+    def test_slow_primary_is_hedged_and_cancelled(self, hedge_settings):
+        """A slow primary should be raced, and cancelled once the hedge wins."""
+        primary, secondary = FakeModel("primary", delay=5), FakeModel("secondary")
+        router = LLMRouter({"primary": primary, "secondary": secondary})
+        hedges = LLM_HEDGES.value()
+        cancelled = LLM_CALLS.value(provider="primary", outcome="cancelled")
+
+        start = time.monotonic()
+        assert router.invoke([]) == "secondary"
+
+        assert time.monotonic() - start < 1
+        assert LLM_HEDGES.value() == hedges + 1
+        assert LLM_CALLS.value(provider="primary", outcome="cancelled") == cancelled + 1
+        deadline = time.monotonic() + 1
+        while not primary.cancelled and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert primary.cancelled
+
+    def test_cancelled_loser_latency_is_recorded(self, hedge_settings):
+        """A cancelled hedge loser should still count, with the time it had run."""
+        router = LLMRouter({"primary": FakeModel("primary", delay=5), "secondary": FakeModel("secondary")})
+
+        router.invoke([])
+
+        deadline = time.monotonic() + 1
+        while not router.tracker._samples.get("primary") and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert list(router.tracker._samples["primary"]) == [pytest.approx(0.05, abs=0.05)]
+
+    def test_hedging_disabled_waits_for_primary(self, hedge_settings):
+        """With hedging off, a slow primary should still answer alone."""
+        hedge_settings.HEDGE_ENABLED = False
+        primary, secondary = FakeModel("primary", delay=0.1), FakeModel("secondary")
+        router = LLMRouter({"primary": primary, "secondary": secondary})
+
+        assert router.invoke([]) == "primary"
+        assert secondary.calls == 0
+
+
+class TestFailover:
+    """Tests for moving on when a provider fails."""
+
+    def test_error_fails_over_immediately(self, hedge_settings):
+        """A failing primary should hand over to the next provider without waiting."""
+        hedge_settings.HEDGE_DEFAULT_DELAY = 1.0
+        primary = FakeModel("primary", error=RuntimeError("down"))
+        secondary = FakeModel("secondary")
+        router = LLMRouter({"primary": primary, "secondary": secondary})
+
+        start = time.monotonic()
+        assert router.invoke([]) == "secondary"
+        assert time.monotonic() - start < 0.5
+
+    def test_all_providers_failing_raises_last_error(self, hedge_settings):
+        """When every provider fails the caller should see the last error."""
+        router = LLMRouter({
+            "primary": FakeModel("primary", error=RuntimeError("first")),
+            "secondary": FakeModel("secondary", error=ValueError("second")),
+        })
+
+        with pytest.raises(ValueError, match="second"):
+            router.invoke([])
+
+    def test_single_provider_uses_sync_call(self, hedge_settings):
+        """A lone provider should be called directly and its errors passed through."""
+        model = FakeModel("only", error=RuntimeError("down"))
+        router = LLMRouter({"only": model})
+
+        with pytest.raises(RuntimeError):
+            router.invoke([])
+        assert model.calls == 0
+
+
+    def test_hung_providers_time_out(self, hedge_settings):
+        """When no provider answers in time the call should fail and cancel them."""
+        hedge_settings.LLM_TIMEOUT_SECONDS = 0.2
+        primary, secondary = FakeModel("primary", delay=5), FakeModel("secondary", delay=5)
+        router = LLMRouter({"primary": primary, "secondary": secondary})
+
+        with pytest.raises(TimeoutError):
+            router.invoke([])
+
+        deadline = time.monotonic() + 1
+        while not secondary.cancelled and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert primary.cancelled and secondary.cancelled
+
+
+class TestHedgeDelay:
+    """Tests for the latency-based hedge delay."""
+
+    def test_default_until_enough_samples(self, hedge_settings):
+        """Without enough samples the default delay should be used."""
+        router = LLMRouter({"primary": FakeModel("primary")})
+        router.tracker.observe("primary", 0.3)
+        assert router.hedge_delay("primary") == 0.05
+
+    def test_follows_percentile_within_bounds(self, hedge_settings):
+        """The delay should track the provider's p95, clamped to the bounds."""
+        tracker = LatencyTracker()
+        router = LLMRouter({"primary": FakeModel("primary")}, tracker=tracker)
+        for seconds in (0.1, 0.1, 0.1, 0.1, 0.4):
+            tracker.observe("primary", seconds)
+        assert router.hedge_delay("primary") == pytest.approx(0.4)
+
+        for _ in range(10):
+            tracker.observe("primary", 30)
+        assert router.hedge_delay("primary") == 1.0
@@ -0,0 +1,72 @@
+"""Tests for the load-test harness and the stub LLM server."""
+
+import asyncio
+import json
+import random
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.loadtest import LoadConfig, format_report, percentile, run_load, summarize
+from app.stub_llm import StubConfig, completion_seconds, create_app
+
+
+class TestStubLLM:
+    """Tests for the stub chat completions server."""
+
+    def test_answers_in_rag_json_shape(self):
+        """Completions should be OpenAI-shaped with the JSON answer the RAG prompt expects."""
+        client = TestClient(create_app(StubConfig(latency=0, jitter=0, completion_tokens=20)))
+        response = client.post(
+            "/openai/v1/chat/completions",
+            json={"model": "m", "messages": [{"role": "user", "content": "What is RAG?"}]}
+        )
+
+        body = response.json()
+        content = json.loads(body["choices"][0]["message"]["content"])
+        assert response.status_code == 200
+        assert content["confidence"] == 7
+        assert body["usage"]["completion_tokens"] == 20
+
+    def test_error_rate_returns_rate_limits(self):
+        """Configured errors should look like provider 429s with Retry-After."""
+        client = TestClient(create_app(StubConfig(latency=0, jitter=0, error_rate=1.0)))
+        response = client.post("/v1/chat/completions", json={"messages": []})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+    def test_duration_includes_token_generation(self):
+        """Latency should be time to first token plus tokens / rate."""
+        config = StubConfig(latency=0.5, jitter=0, tokens_per_second=100, completion_tokens=50)
+        assert completion_seconds(config, random.Random(0)) == 1.0
+
+
+class TestLoadGenerator:
+    """Tests for driving the API and summarizing results."""
+
+    def test_percentile_nearest_rank(self):
+        """Percentiles should use the nearest-rank definition."""
+        values = [float(n) for n in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0.0
+
+    def test_closed_loop_run_reports_per_endpoint(self):
+        """A short run against the app should report throughput, latency and RSS."""
+        from app.main import app
+
+        answer = {"answer": "A", "confidence": 8, "sources": []}
+        config = LoadConfig(base_url="http://test", duration=0.3, concurrency=2, mix={"ask": 1.0})
+        with patch("app.main.answer_question", return_value=answer), \
+                patch("app.main.index_generation", return_value=("v1",)):
+            report = asyncio.run(run_load(config, transport=httpx.ASGITransport(app=app)))
+
+        summary = summarize(report)
+        stats = summary["endpoints"]["ask"]
+        assert stats["requests"] > 0
+        assert stats["error_rate"] == 0
+        assert stats["p50"] <= stats["p99"] <= stats["max"]
+        assert summary["rss_mb"]["peak"] > 0
+        assert "ask" in format_report(summary)
@@ -0,0 +1,92 @@
+"""Tests for pipeline metrics and the /metrics endpoint."""
+
+import time
+from unittest.mock import patch, MagicMock
+
+from app.metrics import (
+    Counter,
+    Histogram,
+    REFUSALS,
+    STAGE_LATENCY,
+    timed,
+)
+
+
+class TestMetricTypes:
+    """Tests for counters and histograms."""
+
+    def test_counter_increments_per_label(self):
+        """Counters should track each label set separately."""
+        counter = Counter("test_total", "Test counter.", ("cache",))
+        counter.inc(cache="index")
+        counter.inc(2, cache="index")
+        counter.inc(cache="query")
+
+        assert counter.value(cache="index") == 3
+        assert counter.value(cache="query") == 1
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Histogram buckets should be cumulative and end with +Inf."""
+        histogram = Histogram("test_seconds", "Test histogram.", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        text = "\n".join(histogram.render())
+
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="1.0"} 2' in text
+        assert 'test_seconds_bucket{le="+Inf"} 3' in text
+        assert "test_seconds_count 3" in text
+
+    def test_timed_records_stage(self):
+        """timed() should record one observation for the stage."""
+        before = STAGE_LATENCY.count(pipeline="test", stage="noop")
+        with timed("test", "noop"):
+            pass
+        assert STAGE_LATENCY.count(pipeline="test", stage="noop") == before + 1
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_metrics_exposition_format(self, test_client):
+        """Should return Prometheus text with the stage histogram."""
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE rag_stage_duration_seconds histogram" in response.text
+        assert "# TYPE rag_ingestion_queue_depth gauge" in response.text
+
+    @patch("app.rag.load_vectorstore")
+    @patch("app.rag.get_llm")
+    def test_refusal_is_counted(self, mock_groq, mock_vectorstore):
+        """Refusals should increment the refusal counter."""
+        from app.rag import answer_question
+
+        mock_vs = MagicMock()
+        mock_vs.similarity_search_with_score_by_vector.return_value = []
+        mock_vectorstore.return_value = mock_vs
+
+        before = REFUSALS.value()
+        answer_question("Unrelated question?")
+
+        assert REFUSALS.value() == before + 1
+
+    @patch("app.rag.load_vectorstore")
+    @patch("app.rag.get_llm")
+    def test_retrieve_excludes_query_embedding(self, mock_groq, mock_vectorstore):
+        """The retrieve stage should time the vector search only, not the query embedding."""
+        from app.rag import answer_question
+
+        mock_vs = MagicMock()
+        mock_vs.embedding_function.embed_query.side_effect = lambda text: time.sleep(0.2) or [0.0]
+        mock_vs.similarity_search_with_score_by_vector.return_value = []
+        mock_vectorstore.return_value = mock_vs
+
+        with patch.object(STAGE_LATENCY, "observe", wraps=STAGE_LATENCY.observe) as observe:
+            answer_question("Slow to embed?")
+
+        retrieve = [c[0][0] for c in observe.call_args_list if c[1] == {"pipeline": "ask", "stage": "retrieve"}]
+        assert len(retrieve) == 1 and retrieve[0] < 0.2
@@ -0,0 +1,149 @@
+"""Tests for embedding model tags and migrating collections between models."""
+
+import os
+import shutil
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import ingest, manifest
+from app.config import settings
+from app.index_store import (
+    LEGACY_EMBEDDING_MODEL,
+    EMBEDDING_FILE,
+    IndexRegistry,
+    collection_path,
+    index_model,
+    write_lock,
+)
+from app.ingest import RebuildError, delete_document, ingest_single_document, rebuild_collection
+from app.rag import load_vectorstore, search_live
+
+
+MODELS = {
+    "all-MiniLM-L6-v2": DeterministicFakeEmbedding(size=32),
+    "bge-small-en-v1.5": DeterministicFakeEmbedding(size=16),
+}
+
+
+def model_embeddings(backend=None, model=None):
+    return MODELS[model or settings.EMBEDDING_MODEL]
+
+
+@pytest.fixture
+def fake_models():
+    """Fake embeddings per model name, with a different dimension for each."""
+    with patch("app.ingest.get_embeddings", side_effect=model_embeddings), \
+            patch("app.rag.get_query_embeddings", side_effect=lambda model=None: model_embeddings(model=model)):
+        yield
+
+
+def write_text(temp_dir, name, text):
+    path = os.path.join(temp_dir, name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+class TestModelTags:
+    """Tests for recording which model an index was embedded with."""
+
+    def test_new_index_is_tagged_with_configured_model(self, fake_models, sample_txt_file, monkeypatch):
+        """A collection's first write should tag it with EMBEDDING_MODEL."""
+        monkeypatch.setattr(settings, "EMBEDDING_MODEL", "bge-small-en-v1.5")
+        ingest_single_document(sample_txt_file)
+
+        assert index_model(collection_path()) == "bge-small-en-v1.5"
+        assert load_vectorstore().index.d == 16
+
+    def test_untagged_index_uses_legacy_model(self, fake_models, sample_txt_file, monkeypatch):
+        """Indexes from before tagging keep the model they were built with."""
+        ingest_single_document(sample_txt_file)
+        os.remove(os.path.join(collection_path(), EMBEDDING_FILE))
+        monkeypatch.setattr(settings, "EMBEDDING_MODEL", "bge-small-en-v1.5")
+
+        assert index_model(collection_path()) == LEGACY_EMBEDDING_MODEL
+        assert search_live(load_vectorstore(), "RAG", 3)
+
+
+class TestMigration:
+    """Tests for rebuilding a collection with another embedding model."""
+
+    def test_migration_switches_model(self, fake_models, sample_txt_file, test_client):
+        """A rebuild with a model should re-embed the collection and serve it with that model."""
+        ingest_single_document(sample_txt_file)
+        response = test_client.post("/collections/default/rebuild", json={"model": "bge-small-en-v1.5"})
+        status = test_client.get(f"/ingest/{response.json()['job_id']}/status").json()
+
+        assert status["status"] == "completed"
+        assert load_vectorstore().index.d == 16
+        assert search_live(load_vectorstore(), "RAG", 3)
+        assert test_client.get("/collections").json()[0]["embedding_model"] == "bge-small-en-v1.5"
+        assert test_client.post("/collections/default/rebuild", json={"model": "../x"}).status_code == 422
+
+    def test_writes_during_build_are_caught_up(self, fake_models, sample_txt_file, temp_dir):
+        """Documents added or deleted while the new index is built should be reflected after the swap."""
+        ingest_single_document(sample_txt_file)
+        build = ingest._rebuild_documents
+
+        def build_then_write(documents, *args, **kwargs):
+            chunk_ids = build(documents, *args, **kwargs)
+            if kwargs.get("max_duty"):
+                ingest_single_document(write_text(temp_dir, "tea.txt", "Tea is grown in Assam."))
+                delete_document("sample.txt")
+            return chunk_ids
+
+        with patch("app.ingest._rebuild_documents", side_effect=build_then_write):
+            rebuild_collection(model="bge-small-en-v1.5")
+
+        sources = {doc.metadata["source"] for doc, _ in search_live(load_vectorstore(), "tea", 10)}
+        assert sources == {"tea.txt"}
+        assert [e["source"] for e in manifest.load_manifest()["documents"].values()] == ["tea.txt"]
+        assert load_vectorstore().index.d == 16
+
+    def test_embedding_is_throttled(self, fake_models, sample_txt_file, monkeypatch):
+        """Below full duty, each embedding batch should be followed by a pause."""
+        ingest_single_document(sample_txt_file)
+        monkeypatch.setattr(settings, "REBUILD_EMBED_BATCH_SIZE", 1)
+        monkeypatch.setattr(settings, "REBUILD_MAX_DUTY", 0.25)
+
+        with patch("app.ingest.time.sleep") as sleep:
+            chunks = rebuild_collection()
+
+        assert sleep.call_count == chunks
+
+    def test_concurrent_rebuild_is_rejected(self, fake_models, sample_txt_file):
+        """A second rebuild of the same collection should fail while one is running."""
+        ingest_single_document(sample_txt_file)
+        ingest._rebuilding.add("default")
+        try:
+            with pytest.raises(RebuildError, match="already being rebuilt"):
+                rebuild_collection()
+        finally:
+            ingest._rebuilding.discard("default")
+
+
+class TestSwap:
+    """Tests for readers during the directory swap."""
+
+    def test_reader_waits_for_swap(self, temp_dir, monkeypatch):
+        """A read while the index directory is swapped out should wait rather than fail."""
+        monkeypatch.setattr(settings, "VECTOR_DB_PATH", os.path.join(temp_dir, "live"))
+        os.makedirs(settings.VECTOR_DB_PATH)
+        with open(os.path.join(settings.VECTOR_DB_PATH, "index.faiss"), "w") as f:
+            f.write("x")
+        registry = IndexRegistry(loader=lambda path: "store")
+        results = []
+
+        with write_lock("default"):
+            shutil.move(settings.VECTOR_DB_PATH, f"{settings.VECTOR_DB_PATH}.old")
+            reader = threading.Thread(target=lambda: results.append(registry.get("default")))
+            reader.start()
+            time.sleep(0.05)
+            shutil.move(f"{settings.VECTOR_DB_PATH}.old", settings.VECTOR_DB_PATH)
+        reader.join(timeout=5)
+
+        assert results == ["store"]
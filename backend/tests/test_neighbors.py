@@ -0,0 +1,114 @@
+"""Tests for the chunk adjacency index and neighbor expansion."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import manifest
+from app.config import settings
+from app.ingest import delete_document, ingest_single_document
+from app.rag import PASSAGE_GAP, _join_passage, answer_question, expand_neighbors, load_vectorstore
+
+
+SENTENCES = [f"Sentence {word} explains step {i} of the procedure." for i, word in enumerate(
+    ("one", "two", "three", "four", "five", "six", "seven", "eight")
+)]
+
+
+@pytest.fixture
+def procedure(temp_dir, monkeypatch):
+    """A document split into one chunk per sentence, in order."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 60)
+    monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+    path = os.path.join(temp_dir, "procedure.txt")
+    with open(path, "w") as f:
+        f.write("\n\n".join(SENTENCES))
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        ingest_single_document(path)
+        yield next(iter(manifest.load_manifest()["documents"].values()))
+
+
+def chunk(vectorstore, chunk_id):
+    return vectorstore.get_by_ids([chunk_id])[0]
+
+
+class TestAdjacency:
+    """Tests for chunk order recorded in the manifest."""
+
+    def test_sequence_fills_duplicate_positions(self):
+        """Collapsed chunks should take their position, citing the stored chunk."""
+        entry = {"chunk_ids": ["a", "c"], "duplicates": [{"chunk_id": "x", "position": 1}]}
+        assert manifest.document_sequence(entry) == ["a", "x", "c"]
+
+    def test_adjacency_follows_reading_order(self, procedure):
+        """Positions should follow the order chunks were split in."""
+        sequences, positions = manifest.load_adjacency()
+        content_hash, sequence = next(iter(sequences.items()))
+
+        assert sequence == procedure["chunk_ids"]
+        assert positions[(content_hash, sequence[3])] == 3
+
+
+class TestExpansion:
+    """Tests for widening hits into passages."""
+
+    def test_hit_is_widened_in_order(self, procedure):
+        """A middle hit should come back with its previous and next chunk around it."""
+        vectorstore = load_vectorstore()
+        hit = chunk(vectorstore, procedure["chunk_ids"][3])
+
+        expanded = expand_neighbors(vectorstore, [hit])[0]
+
+        assert expanded.page_content.split("\n") == SENTENCES[2:5]
+        assert expanded.metadata["expanded_chunks"] == 3
+        assert expanded.id == hit.id
+
+    def test_budget_and_context_limit_growth(self, procedure, monkeypatch):
+        """Neighbors already in the context or over budget should not be added."""
+        vectorstore = load_vectorstore()
+        ids = procedure["chunk_ids"]
+        hits = [chunk(vectorstore, ids[3]), chunk(vectorstore, ids[4])]
+
+        expanded = expand_neighbors(vectorstore, hits)
+        assert expanded[0].page_content.split("\n") == SENTENCES[2:4]
+        assert expanded[1].page_content.split("\n") == SENTENCES[4:6]
+
+        monkeypatch.setattr(settings, "CONTEXT_TOKEN_BUDGET", 10)
+        assert expand_neighbors(vectorstore, hits) == hits
+
+    def test_overlap_trimmed_only_within_a_document(self):
+        """Overlap should be cut between contiguous chunks, never from a duplicate of another document."""
+        first = Document("alpha beta gamma", metadata={"source": "a.txt", "content_hash": "a", "start_index": 0})
+        second = Document("gamma delta", metadata={"source": "a.txt", "content_hash": "a", "start_index": 11})
+        collapsed = Document("gamma epsilon", metadata={"source": "b.txt", "content_hash": "b", "start_index": 11})
+
+        assert _join_passage([first, second]) == "alpha beta gamma delta"
+        assert _join_passage([first, collapsed]) == "alpha beta gamma" + PASSAGE_GAP + "gamma epsilon"
+
+    def test_deleted_neighbors_are_skipped(self, procedure):
+        """Chunks of deleted documents should never be pulled back in."""
+        vectorstore = load_vectorstore()
+        hit = chunk(vectorstore, procedure["chunk_ids"][3])
+        delete_document("procedure.txt")
+
+        assert expand_neighbors(vectorstore, [hit]) == [hit]
+
+    @patch("app.rag.get_llm")
+    def test_answer_context_includes_neighbors(self, mock_llm, procedure, monkeypatch):
+        """The LLM should see the expanded passage, cited once."""
+        monkeypatch.setattr(settings, "TOP_K", 1)
+        monkeypatch.setattr(settings, "SIMILARITY_THRESHOLD", 100.0)
+        mock_llm.return_value = MagicMock(invoke=MagicMock(return_value=MagicMock(
+            content='{"answer": "Done.", "confidence": 8}'
+        )))
+
+        result = answer_question("What is step 3?")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0][1].content
+        assert sum(sentence in prompt for sentence in SENTENCES) >= 2
+        assert len(result["sources"]) == 1
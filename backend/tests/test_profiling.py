@@ -0,0 +1,132 @@
+"""Tests for on-demand request profiling."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app import profiling
+from app.config import settings
+
+
+@pytest.fixture
+def profiling_enabled(temp_dir):
+    """Enable profiling with profiles written to a temporary directory."""
+    with patch.object(settings, "PROFILING_ENABLED", True), \
+            patch.object(settings, "PROFILING_TOKEN", "secret"), \
+            patch.object(settings, "PROFILE_DIR", os.path.join(temp_dir, "profiles")), \
+            patch.object(settings, "PROFILE_SAMPLE_INTERVAL", 0.001):
+        yield
+
+
+def busy_work():
+    """Burn a little CPU so the sampler collects stacks."""
+    total = 0
+    for i in range(300000):
+        total += i * i
+    return total
+
+
+class TestProfileRequest:
+    """Tests for the profiling context manager."""
+
+    def test_writes_folded_stacks_and_summary(self, profiling_enabled):
+        """Should store flamegraph stacks and allocation stats."""
+        with profiling.profile_request("ask", "test") as handle:
+            busy_work()
+
+        summary = profiling.get_profile(handle.profile_id)
+        assert summary["kind"] == "ask"
+        assert summary["samples"] > 0
+        assert summary["peak_memory_bytes"] >= 0
+        assert "top_allocations" in summary
+
+        with open(profiling.get_flamegraph_path(handle.profile_id)) as f:
+            folded = f.read()
+        assert "busy_work" in folded
+
+    def test_rejects_path_traversal(self, profiling_enabled):
+        """Profile ids must not escape the profile directory."""
+        assert profiling.get_profile("../secret") is None
+
+    def test_armed_requests_are_consumed(self, profiling_enabled):
+        """Armed slots should profile exactly that many requests."""
+        profiling.arm("ingest", 1)
+
+        assert profiling.should_profile("ingest", None, None) is True
+        assert profiling.should_profile("ingest", None, None) is False
+
+    def test_header_requires_token(self, profiling_enabled):
+        """Header-triggered profiling should check the token."""
+        assert profiling.should_profile("ask", "1", "wrong") is False
+        assert profiling.should_profile("ask", "1", "secret") is True
+        assert profiling.should_profile("ask", "1", None) is False
+
+    def test_reserved_profiler_is_held_until_profiled(self, profiling_enabled):
+        """A reservation should block other profiles and be released by the reserved run."""
+        assert profiling.reserve("ingest", "a.txt") is True
+        assert profiling.reserve("ingest", "b.txt") is False
+        with profiling.profile_request("ask", "other") as handle:
+            assert handle is None
+
+        with profiling.maybe_profile("ingest", "a.txt", True, reserved=True) as handle:
+            assert handle is not None
+        assert profiling.reserve("ingest", "c.txt") is True
+        profiling._profile_lock.release()
+
+
+class TestProfilingEndpoints:
+    """Tests for profiling through the API."""
+
+    @patch("app.main.answer_question")
+    def test_ask_returns_profile_id(self, mock_answer, test_client, profiling_enabled):
+        """Profiled /ask requests should return the profile id header."""
+        mock_answer.return_value = {"answer": "x", "confidence": 5, "sources": []}
+
+        response = test_client.post(
+            "/ask",
+            json={"question": "What?"},
+            headers={"X-Profile": "1", "X-Profile-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+        listed = test_client.get("/admin/profiles", headers={"X-Profile-Token": "secret"})
+        assert profile_id in [p["profile_id"] for p in listed.json()]
+
+    @patch("app.main.answer_question")
+    def test_ask_not_profiled_by_default(self, mock_answer, test_client):
+        """Requests should not be profiled when profiling is disabled."""
+        mock_answer.return_value = {"answer": "x", "confidence": 5, "sources": []}
+
+        response = test_client.post("/ask", json={"question": "What?"}, headers={"X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_ingest_profile_id_only_when_profiler_free(self, test_client, profiling_enabled):
+        """An ingest should not promise a profile id when the profiler is busy."""
+        headers = {"X-Profile": "1", "X-Profile-Token": "secret"}
+        assert profiling.reserve("ask", "busy") is True
+        try:
+            with patch("app.main.process_ingestion_job"):
+                response = test_client.post(
+                    "/ingest", files={"file": ("a.txt", b"Some text.", "text/plain")}, headers=headers
+                )
+        finally:
+            profiling._profile_lock.release()
+
+        assert response.status_code == 200
+        assert response.json()["profile_id"] is None
+
+    def test_arm_count_is_bounded(self, test_client, profiling_enabled):
+        """Arming should reject non-positive and oversized counts."""
+        headers = {"X-Profile-Token": "secret"}
+        for count in (0, -1, 10**6):
+            response = test_client.post("/admin/profiling/arm", params={"kind": "ask", "count": count}, headers=headers)
+            assert response.status_code == 422
+
+    def test_admin_endpoints_hidden_when_disabled(self, test_client):
+        """Admin profiling endpoints should 404 when profiling is disabled."""
+        response = test_client.get("/admin/profiles")
+        assert response.status_code == 404
@@ -0,0 +1,135 @@
+"""Tests for push-based ingestion progress events."""
+
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import progress
+from app.models import JobStatus, _job_store, create_job, record_progress, update_job
+
+
+def read_events(response):
+    """Parse the data of each SSE message in a streamed response."""
+    return [
+        json.loads(line[len("data: "):])
+        for line in response.iter_lines()
+        if line.startswith("data: ")
+    ]
+
+
+class TestProgressBus:
+    """Tests for fanning events out to subscribers."""
+
+    def test_events_routed_by_job_parent_and_collection(self):
+        """Subscribers should see their job, its children, or their collection."""
+        bus = progress.ProgressBus()
+
+        async def scenario():
+            by_job = bus.subscribe(job_id="parent")
+            by_collection = bus.subscribe(collection="docs")
+            events = [
+                {"job_id": "parent", "parent_id": None, "collection": "docs"},
+                {"job_id": "child", "parent_id": "parent", "collection": "docs"},
+                {"job_id": "other", "parent_id": None, "collection": "other"},
+            ]
+            # Published from a worker thread, as ingestion jobs do
+            thread = threading.Thread(target=lambda: [bus.publish(e) for e in events])
+            thread.start()
+            thread.join()
+            await asyncio.sleep(0)
+            return [by_job.queue.qsize(), by_collection.queue.qsize()]
+
+        assert asyncio.run(scenario()) == [2, 2]
+
+    def test_slow_subscriber_keeps_latest_events(self):
+        """A full queue should drop the oldest events, not block publishers."""
+        bus = progress.ProgressBus(max_queued=2)
+
+        async def scenario():
+            subscription = bus.subscribe(collection="docs")
+            for n in range(5):
+                bus.publish({"job_id": "j", "collection": "docs", "n": n})
+            await asyncio.sleep(0)
+            first, second = await subscription.get(), await subscription.get()
+            return [first["n"], second["n"]], subscription.dropped
+
+        assert asyncio.run(scenario()) == ([3, 4], 3)
+
+
+class TestRecordProgress:
+    """Tests for job progress counters."""
+
+    def setup_method(self):
+        _job_store.clear()
+
+    def test_counts_roll_up_to_parent(self):
+        """Progress reported for a child should also advance its parent."""
+        parent = create_job("bulk")
+        child = create_job("a.txt", parent_id=parent.job_id)
+
+        with progress.tracking(child.job_id):
+            record_progress(pages_parsed=3)
+        record_progress(parent.job_id, chunks_embedded=10)
+
+        assert child.pages_parsed == 3
+        assert (parent.pages_parsed, parent.chunks_embedded) == (3, 10)
+
+    def test_no_op_outside_a_job(self):
+        """Ingestion outside a tracked job should not fail on progress reports."""
+        record_progress(pages_parsed=1)
+
+
+class TestProgressStreams:
+    """Tests for the SSE endpoints."""
+
+    def setup_method(self):
+        _job_store.clear()
+
+    def test_ingestion_pushes_transitions_and_counters(self, test_client, sample_txt_file):
+        """A job stream should report each stage and end when the job completes."""
+        from app.main import process_ingestion_job
+
+        job = create_job("sample.txt")
+        embeddings = DeterministicFakeEmbedding(size=32)
+
+        def run_job(response_started):
+            response_started.wait(5)
+            with patch("app.ingest.get_embeddings", return_value=embeddings):
+                process_ingestion_job(job.job_id, sample_txt_file)
+
+        started = threading.Event()
+        worker = threading.Thread(target=run_job, args=(started,))
+        worker.start()
+        with test_client.stream("GET", f"/ingest/{job.job_id}/events") as response:
+            started.set()
+            events = read_events(response)
+        worker.join()
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        statuses = [e["status"] for e in events if e["type"] == "status"]
+        assert statuses == ["pending", "processing", "completed"]
+        assert any(e["pages_parsed"] == 1 for e in events)
+        assert events[-1]["chunks_embedded"] == events[-1]["chunks_added"] > 0
+        assert any(e["status"] == "processing" and e["chunks_committed"] > 0 for e in events)
+        assert events[-1]["chunks_committed"] == events[-1]["chunks_added"]
+
+    def test_finished_job_returns_snapshot(self, test_client):
+        """Streaming a finished job should send its final state and close."""
+        job = create_job("done.txt")
+        update_job(job.job_id, status=JobStatus.COMPLETED, chunks_added=4)
+
+        with test_client.stream("GET", f"/ingest/{job.job_id}/events") as response:
+            events = read_events(response)
+
+        assert [(e["status"], e["chunks_added"]) for e in events] == [("completed", 4)]
+
+    def test_unknown_job_is_404(self, test_client):
+        """Streaming an unknown job should 404 rather than hang."""
+        assert test_client.get("/ingest/missing/events").status_code == 404
+
+    def test_invalid_collection_is_400(self, test_client):
+        """Collection streams should validate the collection name."""
+        assert test_client.get("/collections/bad.name/events").status_code == 400
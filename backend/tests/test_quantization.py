@@ -0,0 +1,109 @@
+"""Tests for reduced-precision vector storage and rescoring."""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import quantization
+from app.config import settings
+
+
+def build_store(path, count=200, size=32):
+    """Save a float32 FAISS index of random texts at path."""
+    embeddings = DeterministicFakeEmbedding(size=size)
+    texts = [f"passage {i}" for i in range(count)]
+    store = FAISS.from_texts(texts, embeddings, ids=[f"id-{i}" for i in range(count)])
+    store.save_local(path)
+    return store, embeddings
+
+
+class TestQuantizedIndex:
+    """Tests for loading and searching quantized indexes."""
+
+    @pytest.mark.parametrize("precision", ["float16", "int8"])
+    def test_rescored_results_match_float32(self, temp_dir, precision, monkeypatch):
+        """Rescored search should return the float32 top-k with exact distances."""
+        monkeypatch.setattr(settings, "RESCORE_FACTOR", 4)
+        full, embeddings = build_store(temp_dir)
+
+        store = quantization.load_index(temp_dir, embeddings, precision=precision)
+        assert isinstance(store, quantization.QuantizedFAISS)
+
+        expected = full.similarity_search_with_score("passage 42", k=5)
+        results = store.similarity_search_with_score("passage 42", k=5)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+        np.testing.assert_allclose(
+            [score for _, score in results], [score for _, score in expected], rtol=1e-4
+        )
+
+    def test_missing_files_built_on_load(self, temp_dir):
+        """An existing float32 index should be converted on first load."""
+        _, embeddings = build_store(temp_dir)
+        quantization.load_index(temp_dir, embeddings, precision="int8")
+
+        assert os.path.exists(os.path.join(temp_dir, quantization.quantized_file("int8")))
+        assert os.path.exists(os.path.join(temp_dir, quantization.VECTORS_FILE))
+
+    def test_sidecars_of_another_index_version_are_rebuilt(self, temp_dir):
+        """Sidecars with the right vector count but built from an older index should not be used."""
+        store, embeddings = build_store(temp_dir)
+        quantization.save_index(store, temp_dir, precision="float16")
+        store.delete(["id-0"])
+        store.add_texts(["a replacement passage"], ids=["id-new"])
+        store.save_local(temp_dir)
+
+        loaded = quantization.load_index(temp_dir, embeddings, precision="float16")
+
+        doc, score = loaded.similarity_search_with_score("a replacement passage", k=1)[0]
+        assert doc.id == "id-new"
+        assert score == pytest.approx(0.0, abs=1e-4)
+
+    def test_float32_save_removes_stale_files(self, temp_dir):
+        """Saving at float32 should drop reduced-precision files from earlier runs."""
+        store, embeddings = build_store(temp_dir)
+        quantization.save_index(store, temp_dir, precision="float16")
+        quantization.save_index(store, temp_dir, precision="float32")
+
+        assert not os.path.exists(os.path.join(temp_dir, quantization.quantized_file("float16")))
+        assert not os.path.exists(os.path.join(temp_dir, quantization.VECTORS_FILE))
+
+
+class TestRecallReport:
+    """Tests for the float32 comparison report."""
+
+    @pytest.mark.parametrize("precision,ratio", [("float16", 2), ("int8", 4)])
+    def test_report_memory_and_recall(self, temp_dir, precision, ratio):
+        """The report should show the memory saving and high rescored recall."""
+        build_store(temp_dir)
+        report = quantization.recall_report(temp_dir, precision, k=5, queries=50)
+
+        assert report["float32_bytes"] == ratio * report["resident_bytes"]
+        assert report["recall_rescored"] >= 0.95
+        assert report["recall_rescored"] >= report["recall"]
+
+
+class TestQuantizedIngestion:
+    """Tests for ingestion with reduced precision enabled."""
+
+    @patch("app.rag.get_query_embeddings")
+    @patch("app.ingest.get_embeddings")
+    def test_ingest_writes_quantized_copy(self, mock_ingest_emb, mock_query_emb, sample_txt_file, monkeypatch):
+        """Ingestion should keep the quantized copy in step with the float32 index."""
+        from app.ingest import ingest_single_document
+        from app.rag import load_vectorstore
+
+        embeddings = DeterministicFakeEmbedding(size=32)
+        mock_ingest_emb.return_value = embeddings
+        mock_query_emb.return_value = embeddings
+        monkeypatch.setattr(settings, "VECTOR_PRECISION", "int8")
+
+        chunks = ingest_single_document(sample_txt_file)
+        store = load_vectorstore()
+
+        assert isinstance(store, quantization.QuantizedFAISS)
+        assert store.index.ntotal == chunks
+        assert len(store.similarity_search_with_score("features", k=5)) == min(5, chunks)
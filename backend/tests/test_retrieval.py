@@ -67,7 +67,7 @@ class TestRefusalBehavior:
         assert REFUSAL_RESPONSE["sources"] == []
 
     @patch("app.rag.load_vectorstore")
-    @patch("app.rag.ChatGroq")
+    @patch("app.rag.get_llm")
     def test_no_llm_call_on_refusal(self, mock_groq, mock_vectorstore):
         """LLM should NOT be called when no relevant docs found."""
         from app.rag import answer_question
@@ -77,7 +77,7 @@ class TestRefusalBehavior:
         mock_doc = MagicMock()
         mock_doc.metadata = {"source": "test.pdf"}
         # Score of 1.5 is above default threshold of 0.8
-        mock_vs.similarity_search_with_score.return_value = [
+        mock_vs.similarity_search_with_score_by_vector.return_value = [
             (mock_doc, 1.5),
             (mock_doc, 1.8),
         ]
@@ -97,7 +97,7 @@ class TestRelevantRetrieval:
     """Tests for behavior when relevant context is found."""
 
     @patch("app.rag.load_vectorstore")
-    @patch("app.rag.ChatGroq")
+    @patch("app.rag.get_llm")
     def test_llm_called_with_relevant_docs(self, mock_groq, mock_vectorstore):
         """LLM should be called when relevant docs found."""
         from app.rag import answer_question
@@ -108,7 +108,7 @@ class TestRelevantRetrieval:
         mock_doc.page_content = "Test content about AI"
         mock_doc.metadata = {"source": "ai.pdf", "page": 1}
         # Score of 0.3 is below default threshold of 0.8
-        mock_vs.similarity_search_with_score.return_value = [
+        mock_vs.similarity_search_with_score_by_vector.return_value = [
             (mock_doc, 0.3),
         ]
         mock_vectorstore.return_value = mock_vs
@@ -131,7 +131,7 @@ class TestRelevantRetrieval:
         assert result["sources"][0]["source"] == "ai.pdf"
 
     @patch("app.rag.load_vectorstore")
-    @patch("app.rag.ChatGroq")
+    @patch("app.rag.get_llm")
     def test_sources_include_page_and_section(self, mock_groq, mock_vectorstore):
         """Sources should include page and section when available."""
         from app.rag import answer_question
@@ -144,7 +144,7 @@ class TestRelevantRetrieval:
             "page": 5,
             "section": "Results"
         }
-        mock_vs.similarity_search_with_score.return_value = [(mock_doc, 0.2)]
+        mock_vs.similarity_search_with_score_by_vector.return_value = [(mock_doc, 0.2)]
         mock_vectorstore.return_value = mock_vs
 
         mock_llm_instance = MagicMock()
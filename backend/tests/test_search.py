@@ -0,0 +1,110 @@
+"""Tests for the retrieval-only /search endpoint."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.config import settings
+from app.ingest import ingest_single_document
+from app.rag import TimedEmbeddings
+
+
+@pytest.fixture
+def indexed_documents(temp_dir, monkeypatch):
+    """Ingest two multi-chunk documents with deterministic embeddings."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 60)
+    monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        for name in ("alpha.txt", "beta.txt"):
+            path = os.path.join(temp_dir, name)
+            with open(path, "w") as f:
+                f.write("\n\n".join(f"{name} passage number {i} about search." for i in range(8)))
+            ingest_single_document(path)
+        yield
+
+
+class TestSearchEndpoint:
+    """Tests for /search."""
+
+    @patch("app.rag.get_llm")
+    def test_returns_ranked_chunks_without_llm(self, mock_llm, test_client, indexed_documents):
+        """Search should return scored chunks with spans and never call the LLM."""
+        response = test_client.post("/search", json={"query": "passage", "k": 5})
+
+        assert response.status_code == 200
+        hits = response.json()["hits"]
+        assert len(hits) == 5
+        assert [hit["score"] for hit in hits] == sorted(hit["score"] for hit in hits)
+        assert hits[0]["end_index"] - hits[0]["start_index"] == len(hits[0]["content"])
+        assert hits[0]["chunk_id"]
+        mock_llm.assert_not_called()
+
+    def test_pagination_has_no_overlap(self, test_client, indexed_documents):
+        """Consecutive pages should not repeat chunks and the last page has no next_offset."""
+        first = test_client.post("/search", json={"query": "passage", "k": 10}).json()
+        second = test_client.post(
+            "/search", json={"query": "passage", "k": 10, "offset": first["next_offset"]}
+        ).json()
+
+        first_ids = {hit["chunk_id"] for hit in first["hits"]}
+        second_ids = {hit["chunk_id"] for hit in second["hits"]}
+        assert first["next_offset"] == 10
+        assert first_ids.isdisjoint(second_ids)
+        assert len(first_ids | second_ids) == 16
+        assert second["next_offset"] is None
+
+    def test_source_filter(self, test_client, indexed_documents):
+        """Only chunks from the requested sources should be returned."""
+        response = test_client.post(
+            "/search", json={"query": "passage", "k": 20, "sources": ["beta.txt"]}
+        )
+
+        hits = response.json()["hits"]
+        assert len(hits) == 8
+        assert {hit["source"] for hit in hits} == {"beta.txt"}
+
+    def test_filter_matching_nothing_ends_at_index_end(self, test_client, indexed_documents):
+        """A filter no chunk matches should widen to the whole index and return an empty last page."""
+        response = test_client.post("/search", json={"query": "passage", "sources": ["missing.txt"]})
+
+        assert response.status_code == 200
+        assert response.json()["hits"] == []
+        assert response.json()["next_offset"] is None
+
+    def test_unknown_collection_returns_404(self, test_client):
+        """Searching a collection without an index should return 404."""
+        response = test_client.post("/search", json={"query": "x", "collection": "missing"})
+        assert response.status_code == 404
+
+    def test_invalid_k_rejected(self, test_client):
+        """k outside 1-100 should fail validation."""
+        response = test_client.post("/search", json={"query": "x", "k": 0})
+        assert response.status_code == 422
+
+
+class TestQueryEmbeddingCache:
+    """Tests for caching query vectors."""
+
+    def test_repeated_query_embedded_once(self):
+        """The same query text should only be embedded once."""
+        model = MagicMock()
+        model.embed_query.return_value = [0.1, 0.2]
+        embeddings = TimedEmbeddings(model, cache_size=2)
+
+        assert embeddings.embed_query("tea") == embeddings.embed_query("tea")
+        model.embed_query.assert_called_once_with("tea")
+
+    def test_least_recent_query_evicted(self):
+        """The cache should drop the least recently used query when full."""
+        model = MagicMock()
+        model.embed_query.side_effect = lambda text: [float(len(text))]
+        embeddings = TimedEmbeddings(model, cache_size=2)
+
+        for text in ("a", "bb", "a", "ccc", "bb"):
+            embeddings.embed_query(text)
+
+        assert model.embed_query.call_count == 4
@@ -0,0 +1,156 @@
+"""Tests for conversation sessions on /ask."""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import rag, sessions
+from app.config import settings
+from app.ingest import ingest_single_document
+from app.rag import SYSTEM_PROMPT, estimate_tokens
+from app.sessions import Session, SessionStore, Turn
+
+
+ANSWER = '{"answer": "The RAG system uses vector embeddings to find documents.", "confidence": 8}'
+
+
+def fake_llm(rewrite="How does the RAG system find documents?", summary="Discussed the RAG system."):
+    """An LLM replying according to which prompt it was sent."""
+    def invoke(messages):
+        system = messages[0].content
+        if system == sessions.REWRITE_PROMPT:
+            return MagicMock(content=rewrite)
+        if system.startswith("You maintain the running summary"):
+            return MagicMock(content=summary)
+        return MagicMock(content=ANSWER)
+    return MagicMock(invoke=MagicMock(side_effect=invoke))
+
+
+@pytest.fixture
+def indexed(sample_txt_file, monkeypatch):
+    """The sample document indexed with deterministic embeddings, every chunk relevant."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(settings, "SIMILARITY_THRESHOLD", 100.0)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        ingest_single_document(sample_txt_file)
+        yield
+
+
+class TestSessionStore:
+    """Tests for bounding the sessions held in memory."""
+
+    def test_least_recently_used_is_evicted(self):
+        """Over capacity, the session used longest ago should go first."""
+        store = SessionStore(max_sessions=2, ttl=0)
+        store.get_or_create("a")
+        store.get_or_create("b")
+        store.get_or_create("a")
+        store.get_or_create("c")
+
+        assert store.get("b") is None
+        assert store.get("a") is not None and store.get("c") is not None
+
+    def test_idle_sessions_expire(self):
+        """Sessions idle past the TTL should be dropped."""
+        store = SessionStore(ttl=60)
+        store.get_or_create("old").last_used = time.monotonic() - 120
+        store.get_or_create("new")
+
+        assert store.get("old") is None
+        assert len(store) == 1
+
+
+class TestHistory:
+    """Tests for keeping the history in the prompt bounded."""
+
+    def test_history_fits_budget(self, monkeypatch):
+        """Formatted history should stay within budget, keeping the newest turns."""
+        monkeypatch.setattr(settings, "SESSION_HISTORY_TOKENS", 100)
+        session = Session("s", summary="Earlier topics.")
+        session.turns = [Turn(f"Question {i}?", "word " * 40) for i in range(10)]
+
+        history = sessions.format_history(session)
+
+        assert estimate_tokens(history) <= 100 + 2
+        assert history.startswith("Summary of the earlier conversation: Earlier topics.")
+        assert "Question 9?" in history and "Question 0?" not in history
+
+    @patch("app.rag.get_llm")
+    def test_prompt_stays_bounded_over_long_conversation(self, mock_llm, indexed, test_client, monkeypatch):
+        """However many turns, the prompt sent with a question should not grow past the budget."""
+        monkeypatch.setattr(settings, "SESSION_HISTORY_TOKENS", 150)
+        mock_llm.return_value = fake_llm()
+        for i in range(12):
+            response = test_client.post("/ask", json={"question": f"Tell me more, part {i}?", "session_id": "long"})
+            assert response.json()["session_id"] == "long"
+
+        prompts = [
+            call[0][0][1].content for call in mock_llm.return_value.invoke.call_args_list
+            if call[0][0][0].content == SYSTEM_PROMPT
+        ]
+        session = sessions.store.get("long")
+        assert len(prompts) == 12
+        assert session.summary == "Discussed the RAG system."
+        assert len(session.turns) < 12
+        assert estimate_tokens(sessions.format_history(session)) <= 150
+        assert max(len(p) for p in prompts) - len(prompts[0]) <= (150 + 30) * 4
+
+    @patch("app.rag.get_llm")
+    def test_summary_falls_back_without_llm(self, mock_llm):
+        """A failing summary call should still compact, keeping the questions."""
+        mock_llm.side_effect = RuntimeError("LLM down")
+        summary = sessions.summarize("", [Turn("What is RAG?", "An approach.")])
+        assert summary == "Asked: What is RAG?"
+
+
+class TestRewrite:
+    """Tests for standalone questions used for retrieval."""
+
+    @patch("app.rag.get_llm")
+    def test_follow_up_is_rewritten_for_retrieval(self, mock_llm, indexed, test_client):
+        """Retrieval should use the rewritten question while the LLM answers the original."""
+        mock_llm.return_value = fake_llm()
+        test_client.post("/ask", json={"question": "What is RAG?", "session_id": "s1"})
+
+        with patch("app.rag.search_live", wraps=rag.search_live) as search:
+            test_client.post("/ask", json={"question": "How does it find them?", "session_id": "s1"})
+
+        assert search.call_args[0][1] == "How does the RAG system find documents?"
+        prompt = mock_llm.return_value.invoke.call_args_list[-1][0][0][1].content
+        assert prompt.startswith("Conversation so far")
+        assert "User: What is RAG?" in prompt
+        assert "How does it find them?" in prompt
+
+    @patch("app.rag.get_llm")
+    def test_first_question_and_failed_rewrite_use_question(self, mock_llm):
+        """Without history, or when the rewrite fails, the question should be used as is."""
+        session = Session("s")
+        assert sessions.standalone_question(session, "What is RAG?") == "What is RAG?"
+        mock_llm.assert_not_called()
+
+        session.turns.append(Turn("What is RAG?", "An approach."))
+        mock_llm.side_effect = RuntimeError("LLM down")
+        assert sessions.standalone_question(session, "And it?") == "And it?"
+
+    @patch("app.rag.get_llm")
+    def test_rewrite_is_bounded_but_question_is_not(self, mock_llm, test_client):
+        """Only the rewritten question should be cut to MAX_QUESTION_CHARS; /ask accepts long questions."""
+        session = Session("s", turns=[Turn("What is RAG?", "An approach.")])
+        mock_llm.return_value = fake_llm(rewrite="x" * (settings.MAX_QUESTION_CHARS + 100))
+        assert len(sessions.standalone_question(session, "And it?")) == settings.MAX_QUESTION_CHARS
+
+        answer = {"answer": "Long.", "confidence": 5, "sources": []}
+        with patch("app.main.answer_question", return_value=answer):
+            response = test_client.post("/ask", json={"question": "y" * (settings.MAX_QUESTION_CHARS + 100)})
+        assert response.status_code == 200
+
+    def test_session_can_be_ended(self, test_client):
+        """Deleting a session should forget it; unknown sessions are 404."""
+        sessions.store.get_or_create("s2")
+        assert test_client.delete("/sessions/s2").status_code == 204
+        assert test_client.delete("/sessions/s2").status_code == 404
+        response = test_client.post("/ask", json={"question": "Hi", "session_id": "bad id!"})
+        assert response.status_code == 422
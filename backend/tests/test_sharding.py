@@ -0,0 +1,117 @@
+"""Tests for sharded indexes and scatter-gather search."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import sharding
+from app.config import settings
+from app.index_store import collection_path
+
+
+def write_docs(path, count, prefix):
+    with open(path, "w") as f:
+        f.write("\n\n".join(f"{prefix} paragraph {i} about topic {i % 7}." for i in range(count)))
+
+
+class TestShardRouting:
+    """Tests for routing chunks to shards."""
+
+    def test_hash_routing_is_stable_and_in_range(self):
+        """The same chunk id should always map to the same valid shard."""
+        layout = {"shards": 4, "partitioning": "hash"}
+        shards = [sharding.shard_for(f"id-{i}", "a.txt", layout) for i in range(100)]
+
+        assert shards == [sharding.shard_for(f"id-{i}", "a.txt", layout) for i in range(100)]
+        assert set(shards) <= {0, 1, 2, 3}
+        assert len(set(shards)) > 1
+
+    def test_source_routing_keeps_document_together(self):
+        """Source partitioning should keep all chunks of a document on one shard."""
+        layout = {"shards": 4, "partitioning": "source"}
+        shards = {sharding.shard_for(f"id-{i}", "a.txt", layout) for i in range(50)}
+        assert len(shards) == 1
+
+
+class TestScatterGather:
+    """Tests for merging per-shard results."""
+
+    def test_matches_unsharded_top_k(self, temp_dir):
+        """Merged shard results should equal a search over one index."""
+        embeddings = DeterministicFakeEmbedding(size=16)
+        texts = [f"text {i}" for i in range(40)]
+        ids = [f"id-{i}" for i in range(40)]
+        vectors = embeddings.embed_documents(texts)
+        layout = sharding.write_layout(temp_dir, 3, "hash")
+
+        by_shard = {}
+        for text, vector, chunk_id in zip(texts, vectors, ids):
+            by_shard.setdefault(sharding.shard_for(chunk_id, "", layout), []).append((text, vector, chunk_id))
+        for shard, items in by_shard.items():
+            FAISS.from_embeddings(
+                [(text, vector) for text, vector, _ in items],
+                embeddings,
+                ids=[chunk_id for _, _, chunk_id in items]
+            ).save_local(sharding.shard_path(temp_dir, shard))
+        single = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, ids=ids)
+
+        store = sharding.ShardedVectorStore.open(temp_dir, embeddings, backend="local")
+        sharded = store.similarity_search_with_score("text 7", k=5)
+        expected = single.similarity_search_with_score("text 7", k=5)
+
+        assert [doc.id for doc, _ in sharded] == [doc.id for doc, _ in expected]
+        assert store.ntotal == 40
+        assert {doc.id for doc in store.get_by_ids(["id-1", "id-2"])} == {"id-1", "id-2"}
+
+    def test_process_shard_counts_in_worker(self, temp_dir):
+        """A process shard should get its vector count from its worker, not load the shard itself."""
+        embeddings = DeterministicFakeEmbedding(size=16)
+        path = sharding.shard_path(temp_dir, 0)
+        FAISS.from_texts([f"text {i}" for i in range(5)], embeddings).save_local(path)
+        worker = ThreadPoolExecutor(max_workers=1, initializer=sharding._worker_init, initargs=(path,))
+
+        with patch("app.sharding.load_shard", wraps=sharding.load_shard) as load:
+            shard = sharding.ProcessShard(path, worker)
+            assert shard.ntotal == shard.ntotal == 5
+        worker.shutdown()
+
+        assert load.call_count == 1
+
+
+class TestShardedIngestion:
+    """Tests for ingesting into a sharded collection."""
+
+    @patch("app.rag.get_query_embeddings")
+    @patch("app.ingest.get_embeddings")
+    def test_ingest_splits_chunks_across_shards(self, mock_ingest_emb, mock_query_emb, temp_dir, monkeypatch):
+        """New collections should be sharded when INDEX_SHARDS > 1 and stay searchable."""
+        from app.ingest import ingest_single_document
+        from app.rag import load_vectorstore
+
+        embeddings = DeterministicFakeEmbedding(size=16)
+        mock_ingest_emb.return_value = embeddings
+        mock_query_emb.return_value = embeddings
+        monkeypatch.setattr(settings, "INDEX_SHARDS", 3)
+        monkeypatch.setattr(settings, "CHUNK_SIZE", 60)
+        monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+
+        file_path = os.path.join(temp_dir, "big.txt")
+        write_docs(file_path, 30, "Sharded")
+        chunks = ingest_single_document(file_path, collection="sharded")
+
+        path = collection_path("sharded")
+        assert sharding.read_layout(path) == {"shards": 3, "partitioning": "hash"}
+        counts = [
+            FAISS.load_local(sharding.shard_path(path, shard), embeddings, allow_dangerous_deserialization=True).index.ntotal
+            for shard in range(3)
+            if os.path.exists(os.path.join(sharding.shard_path(path, shard), "index.faiss"))
+        ]
+        assert sum(counts) == chunks
+        assert len(counts) > 1
+
+        store = load_vectorstore("sharded")
+        assert isinstance(store, sharding.ShardedVectorStore)
+        assert len(store.similarity_search_with_score("Sharded paragraph 3", k=4)) == 4
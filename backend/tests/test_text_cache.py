@@ -0,0 +1,137 @@
+"""Tests for the extracted-text cache and index rebuilds."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import manifest, text_cache
+from app.config import settings
+from app.ingest import (
+    RebuildError, delete_document, ingest_documents, ingest_single_document, load_document, rebuild_collection
+)
+from app.rag import load_vectorstore, search_live
+from app.uploads import file_sha256
+
+
+@pytest.fixture
+def fake_embeddings():
+    """Use deterministic embeddings for both ingestion and queries."""
+    embeddings = DeterministicFakeEmbedding(size=32)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), \
+            patch("app.rag.get_query_embeddings", return_value=embeddings):
+        yield embeddings
+
+
+@pytest.fixture
+def ingested(fake_embeddings, sample_txt_file):
+    """The sample document ingested into the default collection, then removed from disk."""
+    ingest_single_document(sample_txt_file)
+    content_hash = file_sha256(sample_txt_file)
+    os.remove(sample_txt_file)
+    return content_hash
+
+
+def no_parsing():
+    """Fail if a document loader is used."""
+    return patch(
+        "langchain_community.document_loaders.TextLoader.lazy_load",
+        side_effect=AssertionError("document was parsed")
+    )
+
+
+class TestTextCache:
+    """Tests for caching extracted pages."""
+
+    def test_ingestion_caches_pages(self, ingested):
+        """Ingested documents should be cached under their hash with page metadata."""
+        pages = text_cache.load_pages(ingested, "renamed.txt")
+
+        assert os.path.exists(text_cache.cache_path(ingested))
+        assert "sample document" in pages[0].page_content
+        assert pages[0].metadata["source"] == "renamed.txt"
+        assert pages[0].metadata["section"] == "Introduction"
+
+    def test_cached_document_is_not_parsed(self, ingested):
+        """Loading a cached document should skip the loader entirely."""
+        with no_parsing():
+            pages = load_document("sample.txt", "sample.txt", ingested)
+        assert pages[0].metadata["content_hash"] == ingested
+
+    def test_unreadable_cache_is_a_miss(self, temp_dir):
+        """A corrupt cache file should be ignored rather than fail ingestion."""
+        path = text_cache.cache_path("ab" * 32)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"not gzip")
+        assert text_cache.load_pages("ab" * 32, "x.txt") is None
+
+
+class TestRebuild:
+    """Tests for rebuilding an index from cached text."""
+
+    def test_rebuild_rechunks_without_originals(self, ingested, monkeypatch):
+        """A rebuild should apply new chunk settings using only the cache."""
+        before = load_vectorstore().index.ntotal
+        monkeypatch.setattr(settings, "CHUNK_SIZE", 100)
+        monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+
+        with no_parsing():
+            chunks = rebuild_collection()
+
+        entry = manifest.load_manifest()["documents"][ingested]
+        assert chunks > before
+        assert load_vectorstore().index.ntotal == chunks == len(entry["chunk_ids"])
+        assert not os.path.exists(f"{settings.VECTOR_DB_PATH}.rebuild")
+
+    def test_rebuild_drops_tombstoned_documents(self, ingested, temp_dir):
+        """Deleted documents should not come back, and tombstones should be cleared."""
+        other = os.path.join(temp_dir, "other.txt")
+        with open(other, "w") as f:
+            f.write("Tea is grown in Assam.")
+        ingest_single_document(other)
+        delete_document("sample.txt")
+
+        assert rebuild_collection() == 1
+        assert manifest.load_tombstones() == frozenset()
+        assert {doc.metadata["source"] for doc, _ in search_live(load_vectorstore(), "RAG", 5)} == {"other.txt"}
+
+    def test_directory_ingest_numbers_chunks_like_rebuild(self, fake_embeddings, monkeypatch):
+        """Ingesting the uploads directory should give each document the chunk indexes a rebuild gives it."""
+        monkeypatch.setattr(settings, "CHUNK_SIZE", 60)
+        monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+        os.makedirs(settings.DOCS_PATH, exist_ok=True)
+        for name in ("alpha.txt", "beta.txt"):
+            with open(os.path.join(settings.DOCS_PATH, name), "w") as f:
+                f.write("\n\n".join(f"{name} paragraph {i} of the guide." for i in range(4)))
+
+        def layout():
+            store = load_vectorstore()
+            docs = store.get_by_ids(list(store.index_to_docstore_id.values()))
+            return sorted((d.metadata["source"], d.metadata["chunk_index"], d.metadata["start_index"]) for d in docs)
+
+        ingest_documents()
+        ingested = layout()
+        rebuild_collection()
+
+        assert ingested == layout()
+        assert ("beta.txt", 1, 0) in ingested
+
+    def test_missing_text_aborts_rebuild(self, ingested):
+        """Without cached text or the upload, the live index should be left alone."""
+        os.remove(text_cache.cache_path(ingested))
+        before = load_vectorstore().index.ntotal
+
+        with pytest.raises(RebuildError, match="sample.txt"):
+            rebuild_collection()
+        assert load_vectorstore().index.ntotal == before
+
+    def test_rebuild_endpoint_runs_job(self, ingested, test_client):
+        """POST /collections/{name}/rebuild should rebuild as a background job."""
+        response = test_client.post("/collections/default/rebuild")
+        status = test_client.get(f"/ingest/{response.json()['job_id']}/status").json()
+
+        assert status["status"] == "completed"
+        assert status["chunks_added"] == load_vectorstore().index.ntotal
+        assert test_client.post("/collections/missing/rebuild").status_code == 404
@@ -0,0 +1,96 @@
+"""Tests for streaming uploads and content-hash deduplication."""
+
+import hashlib
+import os
+from unittest.mock import patch
+
+from app import manifest
+from app.config import settings
+from app.uploads import source_name_for
+
+
+class TestUploadEndpoint:
+    """Tests for the /upload endpoint."""
+
+    def test_upload_stored_under_content_hash(self, test_client):
+        """Uploads should be written as <sha256><ext> with the name recorded."""
+        content = b"hello world" * 1000
+        response = test_client.post(
+            "/upload",
+            files={"file": ("notes.txt", content, "text/plain")}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        expected_hash = hashlib.sha256(content).hexdigest()
+        assert data["content_hash"] == expected_hash
+        assert data["size"] == len(content)
+
+        stored_path = os.path.join(settings.DOCS_PATH, f"{expected_hash}.txt")
+        with open(stored_path, "rb") as f:
+            assert f.read() == content
+        assert source_name_for(stored_path) == "notes.txt"
+
+    def test_identical_uploads_stored_once(self, test_client):
+        """The same content under two names should be stored once."""
+        for name in ("a.txt", "b.txt"):
+            test_client.post("/upload", files={"file": (name, b"same bytes", "text/plain")})
+
+        stored = [f for f in os.listdir(settings.DOCS_PATH) if not f.startswith(".")]
+        assert len(stored) == 1
+        assert not any(f.endswith(".part") for f in os.listdir(settings.DOCS_PATH))
+        assert source_name_for(os.path.join(settings.DOCS_PATH, stored[0])) == "a.txt"
+
+    def test_extension_check_ignores_case(self, test_client):
+        """/ingest should accept upper-case extensions like /ingest/bulk does."""
+        with patch("app.main.process_ingestion_job"):
+            response = test_client.post("/ingest", files={"file": ("NOTES.TXT", b"Shouting notes.", "text/plain")})
+
+        assert response.status_code == 200
+        assert os.path.exists(os.path.join(settings.DOCS_PATH, f"{hashlib.sha256(b'Shouting notes.').hexdigest()}.txt"))
+
+    def test_upload_too_large_rejected(self, test_client):
+        """Uploads over MAX_UPLOAD_BYTES should get 413 and leave no file."""
+        with patch.object(settings, "MAX_UPLOAD_BYTES", 10), \
+                patch.object(settings, "UPLOAD_CHUNK_SIZE", 4):
+            response = test_client.post(
+                "/upload",
+                files={"file": ("big.txt", b"x" * 100, "text/plain")}
+            )
+
+        assert response.status_code == 413
+        assert os.listdir(settings.DOCS_PATH) == []
+
+
+class TestHashSkipsIngestion:
+    """Tests for skipping ingestion of already-known content."""
+
+    def test_known_hash_skips_background_job(self, test_client):
+        """Re-ingesting identical content should complete without a job run."""
+        content = b"Already indexed content."
+        manifest.record_document(hashlib.sha256(content).hexdigest(), "old.txt", ["id-1"])
+
+        with patch("app.main.process_ingestion_job") as mock_process:
+            response = test_client.post(
+                "/ingest",
+                files={"file": ("new-name.txt", content, "text/plain")}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["duplicate"] is True
+        mock_process.assert_not_called()
+
+        status = test_client.get(f"/ingest/{response.json()['job_id']}/status").json()
+        assert status["status"] == "completed"
+        assert status["chunks_added"] == 0
+
+    def test_ingest_single_document_skips_known_hash(self, sample_txt_file):
+        """Known content should not be parsed or embedded again."""
+        from app.ingest import ingest_single_document
+        from app.uploads import file_sha256
+
+        manifest.record_document(file_sha256(sample_txt_file), "sample.txt", ["id-1"])
+
+        with patch("app.ingest.load_document") as mock_load:
+            assert ingest_single_document(sample_txt_file) == 0
+        mock_load.assert_not_called()
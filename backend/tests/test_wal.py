@@ -0,0 +1,199 @@
+"""Tests for the ingestion write-ahead log, job resumption and startup recovery."""
+
+import json
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from app import manifest, wal
+from app.config import settings
+from app.index_store import collection_path
+from app.ingest import ingest_single_document
+from app.main import resume_interrupted_jobs
+from app.models import JobStatus, get_job
+from app.rag import load_vectorstore
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that count embedded texts and can fail like a crash."""
+
+    def __init__(self, fail_after=None):
+        self.inner = DeterministicFakeEmbedding(size=32)
+        self.fail_after = fail_after
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        if self.fail_after is not None and self.texts >= self.fail_after:
+            raise RuntimeError("process killed")
+        self.texts += len(texts)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.inner.embed_query(text)
+
+
+@pytest.fixture(autouse=True)
+def query_embeddings():
+    """Query with the same deterministic embeddings."""
+    with patch("app.rag.get_query_embeddings", return_value=DeterministicFakeEmbedding(size=32)):
+        yield
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Several one-chunk batches per document."""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 100)
+    monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+    monkeypatch.setattr(settings, "INGEST_EMBED_BATCH_SIZE", 1)
+
+
+def begin_ingest(job_id, path):
+    return wal.begin(
+        job_id,
+        "ingest",
+        filename="sample.txt",
+        file_path=path,
+        source_name="sample.txt",
+        content_hash=None,
+        collection="default",
+        replace=False
+    )
+
+
+def crash_during_ingest(job_id, path, embeddings):
+    """Run an ingestion inside a job journal until embeddings fails."""
+    begin_ingest(job_id, path)
+    with patch("app.ingest.get_embeddings", return_value=embeddings), wal.journal(job_id), \
+            pytest.raises(RuntimeError):
+        ingest_single_document(path)
+
+
+class TestResume:
+    """Tests for resuming jobs from their journal."""
+
+    def test_resume_skips_embedded_batches(self, sample_txt_file, small_chunks):
+        """A resumed job should only embed the chunks not checkpointed before the crash."""
+        crash_during_ingest("job-1", sample_txt_file, CountingEmbeddings(fail_after=2))
+        with open(os.path.join(settings.WAL_PATH, "job-1", wal.JOURNAL_FILE), "a") as f:
+            f.write('{"op": "embed')
+
+        embeddings = CountingEmbeddings()
+        with patch("app.ingest.get_embeddings", return_value=embeddings):
+            resume_interrupted_jobs([])
+
+        job = get_job("job-1")
+        assert job.status == JobStatus.COMPLETED
+        assert job.chunks_added == load_vectorstore().index.ntotal > 2
+        assert embeddings.texts == job.chunks_added - 2
+        assert not os.path.exists(os.path.join(settings.WAL_PATH, "job-1"))
+
+    def test_interrupted_index_write_is_not_duplicated(self, sample_txt_file):
+        """Chunks written before the manifest was updated should be tombstoned, then re-ingested once."""
+        embeddings = CountingEmbeddings()
+        begin_ingest("job-2", sample_txt_file)
+        with patch("app.ingest.get_embeddings", return_value=embeddings), wal.journal("job-2"), \
+                patch("app.ingest._record_documents", side_effect=RuntimeError("process killed")), \
+                pytest.raises(RuntimeError):
+            ingest_single_document(sample_txt_file)
+        orphans = set(load_vectorstore().index_to_docstore_id.values())
+
+        with patch("app.ingest.get_embeddings", return_value=embeddings):
+            resume_interrupted_jobs([])
+
+        data = manifest.load_manifest()
+        live = manifest.referenced_chunk_ids(data["documents"].values())
+        assert set(data["tombstones"]) == orphans
+        assert live and not live & orphans
+        assert get_job("job-2").status == JobStatus.COMPLETED
+
+    def test_committed_job_is_not_rerun(self, sample_txt_file):
+        """A job whose index write completed should be marked done without running again."""
+        begin_ingest("job-3", sample_txt_file)
+        with patch("app.ingest.get_embeddings", return_value=CountingEmbeddings()), wal.journal("job-3"):
+            added = ingest_single_document(sample_txt_file)
+
+        with patch("app.main.process_ingestion_job") as process:
+            resume_interrupted_jobs([])
+
+        process.assert_not_called()
+        assert get_job("job-3").chunks_added == added
+        assert not os.path.exists(os.path.join(settings.WAL_PATH, "job-3"))
+
+
+    def test_committed_replace_reports_chunks_and_retires_old_version(self, sample_txt_file, temp_dir):
+        """A replace whose new version was indexed should report its chunks and drop the old version."""
+        with patch("app.ingest.get_embeddings", return_value=CountingEmbeddings()):
+            ingest_single_document(sample_txt_file, "guide.txt")
+        new_path = os.path.join(temp_dir, "guide-v2.txt")
+        with open(new_path, "w") as f:
+            f.write("The second edition of the guide covers retrieval in depth.")
+        wal.begin(
+            "job-4", "ingest", filename="guide.txt", file_path=new_path, source_name="guide.txt",
+            content_hash=None, collection="default", replace=True
+        )
+        with patch("app.ingest.get_embeddings", return_value=CountingEmbeddings()), wal.journal("job-4"):
+            added = ingest_single_document(new_path, "guide.txt")
+
+        with patch("app.main.process_ingestion_job") as process, \
+                patch("app.ingest.get_embeddings", return_value=CountingEmbeddings()):
+            resume_interrupted_jobs([])
+
+        process.assert_not_called()
+        assert get_job("job-4").chunks_added == added > 0
+        assert [entry["source"] for entry in manifest.load_manifest()["documents"].values()] == ["guide.txt"]
+
+
+class TestRecovery:
+    """Tests for repairing collection files at startup."""
+
+    @pytest.fixture
+    def index_path(self, sample_txt_file):
+        with patch("app.ingest.get_embeddings", return_value=CountingEmbeddings()):
+            ingest_single_document(sample_txt_file)
+        return collection_path()
+
+    def test_saved_index_passes_check(self, index_path):
+        """A saved index should have checksums and no leftover staging."""
+        assert os.path.exists(os.path.join(index_path, wal.CHECKSUM_FILE))
+        assert not os.path.exists(os.path.join(index_path, wal.STAGING_DIR))
+        assert wal.verify_index(index_path, full=True)
+        assert wal.recover_collections() == []
+
+    def test_damaged_index_is_moved_aside(self, index_path):
+        """A truncated index file should be detected and moved aside for a rebuild."""
+        with open(os.path.join(index_path, "index.pkl"), "r+b") as f:
+            f.truncate(10)
+
+        assert wal.recover_collections() == ["default"]
+        assert os.path.exists(os.path.join(index_path, "index.pkl" + wal.DAMAGED_SUFFIX))
+        assert not os.path.exists(os.path.join(index_path, "index.faiss"))
+
+    def test_staged_save_is_rolled_forward_or_back(self, index_path):
+        """A committed staged save should be installed, an uncommitted one discarded."""
+        staging = os.path.join(index_path, wal.STAGING_DIR)
+        shutil.copytree(index_path, staging, ignore=shutil.ignore_patterns(wal.STAGING_DIR))
+        os.remove(os.path.join(index_path, "index.faiss"))
+        assert wal.recover_collections() == []
+        assert os.path.exists(os.path.join(index_path, "index.faiss"))
+
+        os.makedirs(staging)
+        with open(os.path.join(staging, "index.faiss"), "w") as f:
+            f.write("partial")
+        assert wal.recover_collections() == []
+        assert not os.path.exists(staging)
+        assert wal.verify_index(index_path, full=True)
+
+    def test_interrupted_swap_is_finished(self, index_path):
+        """A crash between the two renames of a rebuild swap should leave the new index live."""
+        shutil.copytree(index_path, f"{index_path}.rebuild")
+        with open(os.path.join(f"{index_path}.rebuild", "marker"), "w") as f:
+            json.dump({}, f)
+        os.rename(index_path, f"{index_path}.old")
+
+        wal.recover_collections()
+
+        assert os.path.exists(os.path.join(index_path, "marker"))
+        assert not os.path.exists(f"{index_path}.old") and not os.path.exists(f"{index_path}.rebuild")
@@ -0,0 +1,66 @@
+"""Tests for lazy imports, startup warm-up and readiness."""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import warmup
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Give each test its own warm-up state."""
+    monkeypatch.setattr(warmup, "state", warmup.WarmupState())
+
+
+class TestLazyImports:
+    """Tests that heavy dependencies stay out of the import path."""
+
+    def test_importing_app_defers_heavy_modules(self):
+        """Importing app.main should not load FAISS, loaders, splitters or the LLM client."""
+        code = (
+            "import sys, app.main; "
+            f"print('loaded:' + ','.join(m for m in {warmup.DEFERRED_MODULES!r} if m in sys.modules))"
+        )
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=backend_dir
+        )
+        assert result.stdout.strip().splitlines()[-1] == "loaded:"
+
+
+class TestWarmup:
+    """Tests for the warm-up phase and /ready."""
+
+    def test_not_ready_before_warmup(self, test_client):
+        """/ready should return 503 until warm-up has run."""
+        response = test_client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "pending"
+
+    @patch("app.rag.get_query_embeddings")
+    def test_ready_after_warmup(self, mock_embeddings, test_client):
+        """A successful warm-up should report every step and make /ready return 200."""
+        mock_embeddings.return_value = DeterministicFakeEmbedding(size=8)
+
+        warmup.warm_up()
+        response = test_client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+        assert set(response.json()["steps"]) == set(warmup.WARMUP_STEPS)
+
+    @patch("app.rag.get_query_embeddings", side_effect=RuntimeError("model missing"))
+    def test_failed_warmup_reported(self, mock_embeddings, test_client):
+        """A failed warm-up should keep /ready at 503 with the error."""
+        warmup.warm_up()
+        response = test_client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert "model missing" in response.json()["error"]
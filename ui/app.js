@@ -338,6 +338,48 @@ async function pollJobStatus(jobId) {
   return null;
 }
 
+/**
+ * Follows job progress over Server-Sent Events, falling back to polling
+ */
+function followJob(jobId) {
+  if (!window.EventSource) {
+    return pollJobStatus(jobId);
+  }
+
+  return new Promise(resolve => {
+    const source = new EventSource(`${INGEST_URL}/${jobId}/events`);
+
+    const onEvent = event => {
+      const data = JSON.parse(event.data);
+      if (data.job_id !== jobId) return;
+
+      if (data.status === 'completed') {
+        source.close();
+        updateUploadStatus(`Ingested ${data.chunks_added} chunks from ${data.filename}`, 'success');
+        resolve(data);
+      } else if (data.status === 'failed') {
+        source.close();
+        updateUploadStatus(`Error: ${data.error || 'Ingestion failed'}`, 'error');
+        resolve(data);
+      } else if (data.chunks_embedded > 0) {
+        updateUploadStatus(`Embedding ${data.filename}: ${data.chunks_embedded} chunks...`, 'info');
+      } else if (data.pages_parsed > 0) {
+        updateUploadStatus(`Parsing ${data.filename}: ${data.pages_parsed} pages...`, 'info');
+      } else {
+        updateUploadStatus(`Processing ${data.filename}...`, 'info');
+      }
+    };
+
+    source.addEventListener('status', onEvent);
+    source.addEventListener('progress', onEvent);
+    source.onerror = () => {
+      // Stream unavailable (e.g. a proxy without SSE support): poll instead
+      source.close();
+      resolve(pollJobStatus(jobId));
+    };
+  });
+}
+
 /**
  * Uploads a file and starts ingestion
  */
@@ -373,7 +415,7 @@ async function uploadFile(file) {
     updateUploadStatus(`Ingestion started for ${file.name}`, 'info');
 
     // Poll for completion
-    await pollJobStatus(data.job_id);
+    await followJob(data.job_id);
 
   } catch (err) {
     console.error('Upload error:', err);